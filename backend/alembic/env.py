@@ -24,6 +24,8 @@ from app.models.role import Role
 
 # 导入其他模型
 from app.models.activity import Activity
+from app.models.analysis_job import AnalysisJob
+from app.models.cache_invalidation import CacheInvalidation
 from app.models.scoring import ScoringFactor 
 from app.models.pull_request_result import PullRequestResult
 from app.models.pull_request import PullRequest
@@ -0,0 +1,36 @@
+"""20261017_1800_add mall items fts
+
+Revision ID: 2b6e9d4c1f58
+Revises: 8e5b3d1f7a42
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b6e9d4c1f58'
+down_revision: Union[str, None] = '8e5b3d1f7a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 商品全文检索表仅在 SQLite 下创建；索引内容由应用首次检索时自动重建
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS mall_items_fts USING fts5("
+        "item_id UNINDEXED, name, short_description, tags, description,"
+        " tokenize='unicode61 remove_diacritics 2')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TABLE IF EXISTS mall_items_fts")
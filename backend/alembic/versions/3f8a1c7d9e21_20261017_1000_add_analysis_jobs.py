@@ -0,0 +1,50 @@
+"""20261017_1000_add analysis jobs
+
+Revision ID: 3f8a1c7d9e21
+Revises: d6ae7fee1518
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8a1c7d9e21'
+down_revision: Union[str, None] = 'd6ae7fee1518'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('analysis_jobs',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('pr_node_id', sa.String(length=100), nullable=False),
+    sa.Column('repository', sa.String(length=100), nullable=False),
+    sa.Column('head_sha', sa.String(length=100), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('lease_owner', sa.String(length=100), nullable=True),
+    sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    sa.Column('available_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_analysis_jobs')),
+    sa.UniqueConstraint('pr_node_id', 'head_sha', name='uq_analysis_jobs_pr_sha')
+    )
+    with op.batch_alter_table('analysis_jobs', schema=None) as batch_op:
+        batch_op.create_index('idx_analysis_jobs_status_repo', ['status', 'repository', 'available_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('analysis_jobs', schema=None) as batch_op:
+        batch_op.drop_index('idx_analysis_jobs_status_repo')
+
+    op.drop_table('analysis_jobs')
@@ -0,0 +1,36 @@
+"""20261017_1400_add company summary indexes
+
+Revision ID: 5d8f1a3c6e42
+Revises: e4a7c2d9b813
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8f1a3c6e42'
+down_revision: Union[str, None] = 'e4a7c2d9b813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('idx_users_company_id', ['company_id'], unique=False)
+
+    with op.batch_alter_table('departments', schema=None) as batch_op:
+        batch_op.create_index('idx_departments_company_id', ['company_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('departments', schema=None) as batch_op:
+        batch_op.drop_index('idx_departments_company_id')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('idx_users_company_id')
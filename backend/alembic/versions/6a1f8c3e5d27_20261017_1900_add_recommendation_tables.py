@@ -0,0 +1,69 @@
+"""20261017_1900_add recommendation tables
+
+Revision ID: 6a1f8c3e5d27
+Revises: 2b6e9d4c1f58
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a1f8c3e5d27'
+down_revision: Union[str, None] = '2b6e9d4c1f58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user_category_affinities',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('score', sa.Integer(), nullable=False),
+        sa.Column('last_purchased_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'category', name='uq_user_category_affinities_user_category')
+    )
+    op.create_table(
+        'mall_item_popularity',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=True),
+        sa.Column('item_id', sa.String(length=36), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('is_featured', sa.Boolean(), nullable=False),
+        sa.Column('purchase_count', sa.Integer(), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('category_rank', sa.Integer(), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+        sa.ForeignKeyConstraint(['item_id'], ['mall_items.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('mall_item_popularity', schema=None) as batch_op:
+        batch_op.create_index('idx_mall_item_popularity_company_rank', ['company_id', 'rank'], unique=False)
+
+    # 根据已有购买记录初始化用户分类偏好；热门候选列表在首次请求或定时任务中生成
+    op.execute(
+        "INSERT INTO user_category_affinities (user_id, category, score, last_purchased_at, updated_at) "
+        "SELECT p.user_id, i.category, COUNT(p.id), MAX(p.created_at), CURRENT_TIMESTAMP "
+        "FROM point_purchases p JOIN mall_items i ON i.id = p.item_id "
+        "WHERE p.status != 'CANCELLED' "
+        "GROUP BY p.user_id, i.category"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('mall_item_popularity', schema=None) as batch_op:
+        batch_op.drop_index('idx_mall_item_popularity_company_rank')
+
+    op.drop_table('mall_item_popularity')
+    op.drop_table('user_category_affinities')
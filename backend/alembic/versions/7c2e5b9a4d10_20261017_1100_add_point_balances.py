@@ -0,0 +1,60 @@
+"""20261017_1100_add point balances
+
+Revision ID: 7c2e5b9a4d10
+Revises: 3f8a1c7d9e21
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+import uuid
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e5b9a4d10'
+down_revision: Union[str, None] = '3f8a1c7d9e21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    point_balances = op.create_table('point_balances',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('balance', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], name=op.f('fk_point_balances_company_id_companies')),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name=op.f('fk_point_balances_user_id_users')),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_point_balances')),
+    sa.UniqueConstraint('user_id', 'company_id', name='uq_point_balances_user_company')
+    )
+
+    # 以现有交易流水初始化余额表
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        "SELECT user_id, company_id, SUM(amount) FROM point_transactions GROUP BY user_id, company_id"
+    )).fetchall()
+    now = datetime.utcnow().replace(microsecond=0)
+    if rows:
+        op.bulk_insert(point_balances, [
+            {
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "company_id": company_id,
+                "balance": int(total or 0),
+                "version": 0,
+                "updated_at": now,
+            }
+            for user_id, company_id, total in rows
+        ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('point_balances')
@@ -0,0 +1,55 @@
+"""20261017_1700_add scheduler tables
+
+Revision ID: 8e5b3d1f7a42
+Revises: c7d2f4a8e169
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e5b3d1f7a42'
+down_revision: Union[str, None] = 'c7d2f4a8e169'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'scheduler_leases',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('owner', sa.String(length=100), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('acquired_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table(
+        'scheduler_runs',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('job_name', sa.String(length=100), nullable=False),
+        sa.Column('owner', sa.String(length=100), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('scheduled_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('duration_ms', sa.Integer(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('summary', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('scheduler_runs', schema=None) as batch_op:
+        batch_op.create_index('idx_scheduler_runs_job_started', ['job_name', 'started_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('scheduler_runs', schema=None) as batch_op:
+        batch_op.drop_index('idx_scheduler_runs_job_started')
+
+    op.drop_table('scheduler_runs')
+    op.drop_table('scheduler_leases')
@@ -0,0 +1,43 @@
+"""20261017_2000_add notification unread counters
+
+Revision ID: 9c4e2a7f1b63
+Revises: 6a1f8c3e5d27
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e2a7f1b63'
+down_revision: Union[str, None] = '6a1f8c3e5d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'notification_unread_counters',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('unread_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # 根据已有未读通知初始化计数
+    op.execute(
+        "INSERT INTO notification_unread_counters (user_id, unread_count, updated_at) "
+        "SELECT user_id, COUNT(id), CURRENT_TIMESTAMP FROM notifications "
+        "WHERE status = 'PENDING' "
+        "GROUP BY user_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('notification_unread_counters')
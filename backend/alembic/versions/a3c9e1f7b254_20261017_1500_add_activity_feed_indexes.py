@@ -0,0 +1,32 @@
+"""20261017_1500_add activity feed indexes
+
+Revision ID: a3c9e1f7b254
+Revises: 5d8f1a3c6e42
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c9e1f7b254'
+down_revision: Union[str, None] = '5d8f1a3c6e42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('activities', schema=None) as batch_op:
+        batch_op.create_index('idx_activities_created_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('idx_activities_user_created_id', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('activities', schema=None) as batch_op:
+        batch_op.drop_index('idx_activities_user_created_id')
+        batch_op.drop_index('idx_activities_created_id')
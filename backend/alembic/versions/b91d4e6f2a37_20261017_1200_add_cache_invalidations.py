@@ -0,0 +1,39 @@
+"""20261017_1200_add cache invalidations
+
+Revision ID: b91d4e6f2a37
+Revises: 7c2e5b9a4d10
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b91d4e6f2a37'
+down_revision: Union[str, None] = '7c2e5b9a4d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('cache_invalidations',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('cache_name', sa.String(length=50), nullable=False),
+    sa.Column('cache_key', sa.String(length=200), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_cache_invalidations'))
+    )
+    with op.batch_alter_table('cache_invalidations', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_cache_invalidations_created_at'), ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('cache_invalidations', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_cache_invalidations_created_at'))
+
+    op.drop_table('cache_invalidations')
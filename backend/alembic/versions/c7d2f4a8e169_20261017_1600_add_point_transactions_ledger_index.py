@@ -0,0 +1,34 @@
+"""20261017_1600_add point transactions ledger index
+
+Revision ID: c7d2f4a8e169
+Revises: a3c9e1f7b254
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2f4a8e169'
+down_revision: Union[str, None] = 'a3c9e1f7b254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('point_transactions', schema=None) as batch_op:
+        batch_op.create_index(
+            'idx_point_transactions_ledger',
+            ['user_id', 'company_id', 'created_at', 'id'],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('point_transactions', schema=None) as batch_op:
+        batch_op.drop_index('idx_point_transactions_ledger')
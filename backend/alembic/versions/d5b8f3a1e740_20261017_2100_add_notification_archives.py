@@ -0,0 +1,49 @@
+"""20261017_2100_add notification archives
+
+Revision ID: d5b8f3a1e740
+Revises: 9c4e2a7f1b63
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5b8f3a1e740'
+down_revision: Union[str, None] = '9c4e2a7f1b63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'notification_archives',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('category', sa.Enum('ACHIEVEMENT', 'TRANSACTION', 'SOCIAL', 'SYSTEM', 'WORKFLOW', 'ALERT', name='notificationcategory'), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'READ', 'ACTED', 'DISMISSED', 'EXPIRED', name='notificationstatus'), nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('summary', sa.String(length=500), nullable=True),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('source', sa.String(length=100), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('read_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('notification_archives', schema=None) as batch_op:
+        batch_op.create_index('idx_notification_archives_user_created', ['user_id', 'created_at'], unique=False)
+        batch_op.create_index('idx_notification_archives_created', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('notification_archives', schema=None) as batch_op:
+        batch_op.drop_index('idx_notification_archives_created')
+        batch_op.drop_index('idx_notification_archives_user_created')
+
+    op.drop_table('notification_archives')
@@ -0,0 +1,30 @@
+"""20261017_1300_add users department index
+
+Revision ID: e4a7c2d9b813
+Revises: b91d4e6f2a37
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a7c2d9b813'
+down_revision: Union[str, None] = 'b91d4e6f2a37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('idx_users_department_completed', ['department_id', 'completed_tasks'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('idx_users_department_completed')
@@ -0,0 +1,31 @@
+"""20261017_2200_add point_purchases stock_reserved
+
+Revision ID: f2c6a9d4b318
+Revises: d5b8f3a1e740
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c6a9d4b318'
+down_revision: Union[str, None] = 'd5b8f3a1e740'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 已有购买记录在下单时未扣减库存，取消时不应归还库存，因此默认为 false
+    with op.batch_alter_table('point_purchases', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('stock_reserved', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('point_purchases', schema=None) as batch_op:
+        batch_op.drop_column('stock_reserved')
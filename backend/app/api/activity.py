@@ -1,7 +1,9 @@
 # backend/app/api/activity.py
 """活动管理 API 模块包."""
 import asyncio
+import base64
 import uuid
+from datetime import datetime
 from typing import Optional
 
 from app.api.auth import get_current_user
@@ -18,6 +20,7 @@ from fastapi import (
     BackgroundTasks,
     Depends,
     HTTPException,
+    Query,
 )
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -50,33 +53,106 @@ class ActivityQuery(PaginationParams):
 base_router = BaseAPIRouter(prefix="/api/activities", tags=["activity"])
 router = base_router.router
 
+def _encode_activity_cursor(created_at: datetime, activity_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{activity_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_activity_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, activity_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), activity_id
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+
+
 @router.get("/")
 @handle_api_errors
 async def get_activities(
     query: ActivityQuery = Depends(),
+    cursor: str | None = Query(None, description="上一页返回的 nextCursor"),
     db: AsyncSession = Depends(get_db),
 ):
-    """获取活动列表."""
-    from sqlalchemy import desc, select
-
-    # 构建查询
-    query_stmt = select(Activity)
+    """获取活动列表.
+
+    按 (created_at, id) 倒序做游标分页，只投影列表展示所需的列（不含 description、AI 分析结果）；
+    created_at 为空的活动无法定位游标，不出现在列表中。
+    查询参数：search, user_id, per_page(1-100), cursor（不再支持 page）
+    返回：items[], nextCursor, hasMore.
+    """
+    from sqlalchemy import select
+
+    if query.page != 1:
+        raise HTTPException(status_code=400, detail="活动列表已改为游标分页，请使用 cursor 参数翻页")
+
+    limit = max(1, min(query.per_page, 100))
+
+    query_stmt = (
+        select(
+            Activity.id,
+            Activity.show_id,
+            Activity.title,
+            Activity.points,
+            Activity.user_id,
+            Activity.status,
+            Activity.activity_type,
+            Activity.created_at,
+            Activity.completed_at,
+            User.name.label("user_name"),
+            User.avatar_url,
+        )
+        .outerjoin(User, User.id == Activity.user_id)
+        .where(Activity.created_at.isnot(None))
+    )
 
     if query.user_id:
-        query_stmt = query_stmt.filter(Activity.user_id == query.user_id)
+        query_stmt = query_stmt.where(Activity.user_id == query.user_id)
 
     if query.search:
         search_filter = Activity.title.contains(query.search) | Activity.description.contains(query.search)
-        query_stmt = query_stmt.filter(search_filter)
+        query_stmt = query_stmt.where(search_filter)
 
-    query_stmt = query_stmt.order_by(desc(Activity.created_at))
+    if cursor:
+        cursor_created_at, cursor_id = _decode_activity_cursor(cursor)
+        query_stmt = query_stmt.where(
+            (Activity.created_at < cursor_created_at)
+            | ((Activity.created_at == cursor_created_at) & (Activity.id < cursor_id))
+        )
 
-    # 执行查询
-    result = await db.execute(query_stmt)
-    activities = result.scalars().all()
+    # 多取一条用于判断是否还有下一页
+    query_stmt = query_stmt.order_by(Activity.created_at.desc(), Activity.id.desc()).limit(limit + 1)
+    rows = (await db.execute(query_stmt)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = [
+        {
+            "id": row.id,
+            "showId": row.show_id,
+            "title": row.title,
+            "points": row.points,
+            "userId": row.user_id,
+            "status": row.status,
+            "activityType": row.activity_type,
+            "createdAt": row.created_at.isoformat() if row.created_at else None,
+            "completedAt": row.completed_at.isoformat() if row.completed_at else None,
+            "user": {
+                "name": row.user_name,
+                "avatar": row.avatar_url,
+                "initials": row.user_name[0] if row.user_name else "无",
+            } if row.user_id is not None and row.user_name is not None else None,
+        }
+        for row in rows
+    ]
+    last = rows[-1] if rows else None
 
     return base_router.success_response(
-        data=[a.to_dict() for a in activities],
+        data={
+            "items": items,
+            "nextCursor": _encode_activity_cursor(last.created_at, last.id) if has_more else None,
+            "hasMore": has_more,
+        },
         message="查询成功"
     )
 
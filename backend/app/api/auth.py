@@ -191,6 +191,12 @@ async def get_current_user(
 
     return user
 
+async def require_super_admin(current_user: User = Depends(get_current_user)) -> User:
+    """用于验证当前用户是否是超级管理员."""
+    if not current_user.is_super_admin:
+        raise HTTPException(status_code=403, detail="需要超级管理员权限")
+    return current_user
+
 async def require_company_member(current_user: User = Depends(get_current_user)) -> None:
     """用于验证当前用户是否是公司成员."""
     if current_user.company_id is None:
@@ -10,7 +10,8 @@ from app.models.company import Company
 from app.models.department import Department
 from app.models.role import Role
 from app.models.user import User
-from fastapi import Body, Depends, HTTPException
+from app.services.company_service import CompanyService
+from fastapi import Body, Depends, HTTPException, Query
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -22,44 +23,17 @@ router = base_router.router
 @router.get("/")
 @handle_api_errors
 async def get_companies(
+    page: int | None = Query(None, ge=1, description="页码，不传则返回全部"),
+    per_page: int = Query(20, ge=1, le=100, description="每页数量"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(simple_user_required)
 ):
     """获取用户创建的公司列表."""
-    # 获取用户创建的公司
-    result = await db.execute(
-        select(Company)
-        .filter(Company.creator_user_id == current_user.id)
-        .order_by(Company.created_at.desc())
+    companies_data, total = await CompanyService(db).list_company_summaries(
+        creator_user_id=current_user.id, page=page, per_page=per_page
     )
-    companies = result.scalars().all()
-
-    companies_data = []
-    for company in companies:
-        # 手动构建公司数据，避免调用 to_dict() 中的关系访问
-        user_count = await db.scalar(select(func.count(User.id)).filter(User.company_id == company.id))
-        dept_count = await db.scalar(select(func.count(Department.id)).filter(Department.company_id == company.id))
-        # 获取创建人姓名
-        creator_name_result = await db.execute(select(User.name).filter(User.id == company.creator_user_id))
-        creator_name = creator_name_result.scalar()
-
-        company_dict = {
-            "id": company.id,
-            "name": company.name,
-            "description": company.description,
-            "domain": company.domain,
-            "inviteCode": company.invite_code,
-            "isActive": company.is_active,
-            "createdAt": company.created_at.isoformat() if company.created_at else None,
-            "updatedAt": company.updated_at.isoformat() if company.updated_at else None,
-            "creatorUserId": company.creator_user_id,
-            "creatorName": creator_name,
-            "userCount": user_count or 0,
-            "departmentCount": dept_count or 0,
-            "organizationCount": 0  # 暂时设为0，如果需要可以后续添加查询
-        }
-        companies_data.append(company_dict)
-
+    if page is not None:
+        return base_router.paginated_response(companies_data, total, page, per_page, "获取公司列表成功")
     return base_router.success_response(companies_data, "获取公司列表成功")
 
 
@@ -67,52 +41,17 @@ async def get_companies(
 @handle_api_errors
 async def get_available_companies(
     search: Optional[str] = None,
+    page: int | None = Query(None, ge=1, description="页码，不传则返回全部"),
+    per_page: int = Query(20, ge=1, le=100, description="每页数量"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(simple_user_required)
 ):
     """获取所有可用的公司列表（供新用户加入）."""
-    # 构建查询条件
-    query = select(Company).filter(Company.is_active)
-
-    # 如果有搜索关键词，添加搜索条件
-    if search and search.strip():
-        search_term = f"%{search.strip()}%"
-        query = query.filter(
-            Company.name.ilike(search_term) |
-            Company.description.ilike(search_term) |
-            Company.domain.ilike(search_term)
-        )
-
-    query = query.order_by(Company.created_at.desc())
-    result = await db.execute(query)
-    companies = result.scalars().all()
-
-    companies_data = []
-    for company in companies:
-        # 手动构建公司数据
-        user_count = await db.scalar(select(func.count(User.id)).filter(User.company_id == company.id))
-        dept_count = await db.scalar(select(func.count(Department.id)).filter(Department.company_id == company.id))
-        # 获取创建人姓名
-        creator_name_result = await db.execute(select(User.name).filter(User.id == company.creator_user_id))
-        creator_name = creator_name_result.scalar()
-
-        company_dict = {
-            "id": company.id,
-            "name": company.name,
-            "description": company.description,
-            "domain": company.domain,
-            "inviteCode": company.invite_code,
-            "isActive": company.is_active,
-            "createdAt": company.created_at.isoformat() if company.created_at else None,
-            "updatedAt": company.updated_at.isoformat() if company.updated_at else None,
-            "creatorUserId": company.creator_user_id,
-            "creatorName": creator_name,
-            "userCount": user_count or 0,
-            "departmentCount": dept_count or 0,
-            "organizationCount": 0  # 暂时设为0，如果需要可以后续添加查询
-        }
-        companies_data.append(company_dict)
-
+    companies_data, total = await CompanyService(db).list_company_summaries(
+        active_only=True, search=search, page=page, per_page=per_page
+    )
+    if page is not None:
+        return base_router.paginated_response(companies_data, total, page, per_page, "获取可用公司列表成功")
     return base_router.success_response(companies_data, "获取可用公司列表成功")
 
 
@@ -124,33 +63,11 @@ async def get_company(
 ):
     """获取单个公司详情."""
     try:
-        result = await db.execute(
-            select(Company)
-            .filter(Company.id == company_id)
-        )
-        company = result.scalars().first()
+        company_data = await CompanyService(db).get_company_summary(company_id)
 
-        if not company:
+        if not company_data:
             raise HTTPException(status_code=404, detail="公司不存在")
 
-        # 手动获取统计信息
-        user_count = await db.scalar(select(func.count(User.id)).filter(User.company_id == company.id))
-        dept_count = await db.scalar(select(func.count(Department.id)).filter(Department.company_id == company.id))
-
-        company_data = {
-            "id": company.id,
-            "name": company.name,
-            "description": company.description,
-            "domain": company.domain,
-            "inviteCode": company.invite_code,
-            "isActive": company.is_active,
-            "createdAt": company.created_at.isoformat() if company.created_at else None,
-            "updatedAt": company.updated_at.isoformat() if company.updated_at else None,
-            "userCount": user_count or 0,
-            "departmentCount": dept_count or 0,
-            "organizationCount": 0  # 暂时设为0，如果需要可以后续添加查询
-        }
-
         return {
             "success": True,
             "data": company_data,
@@ -285,23 +202,7 @@ async def update_company(
         await db.commit()
         await db.refresh(company)
 
-        # 手动获取统计信息
-        user_count = await db.scalar(select(func.count(User.id)).filter(User.company_id == company.id))
-        dept_count = await db.scalar(select(func.count(Department.id)).filter(Department.company_id == company.id))
-
-        company_data = {
-            "id": company.id,
-            "name": company.name,
-            "description": company.description,
-            "domain": company.domain,
-            "inviteCode": company.invite_code,
-            "isActive": company.is_active,
-            "createdAt": company.created_at.isoformat() if company.created_at else None,
-            "updatedAt": company.updated_at.isoformat() if company.updated_at else None,
-            "userCount": user_count or 0,
-            "departmentCount": dept_count or 0,
-            "organizationCount": 0
-        }
+        company_data = await CompanyService(db).get_company_summary(company.id)
 
         return {
             "success": True,
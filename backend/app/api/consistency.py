@@ -4,7 +4,7 @@ from app.api.auth import get_current_user
 from app.core.database import get_db
 from app.models.user import User
 from app.services.consistency_service import ConsistencyService
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -175,6 +175,7 @@ async def check_orphaned_records(
 
 @router.get("/consistency/sequence-issues")
 async def check_sequence_issues(
+    limit: int = Query(1000, ge=1, le=100000, description="最多返回的问题条数"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -184,10 +185,14 @@ async def check_sequence_issues(
     #     raise HTTPException(status_code=403, detail="需要管理员权限")
 
     consistency_service = ConsistencyService(db)
-    issues = await consistency_service.check_transaction_sequence_consistency()
+    # 多取一条用于判断结果是否被截断
+    issues = await consistency_service.check_transaction_sequence_consistency(limit=limit + 1)
+    truncated = len(issues) > limit
+    issues = issues[:limit]
 
     return {
         "sequenceIssues": issues,
         "count": len(issues),
-        "hasIssues": len(issues) > 0
+        "hasIssues": len(issues) > 0,
+        "truncated": truncated
     }
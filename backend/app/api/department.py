@@ -1,7 +1,7 @@
 """Department management API endpoints."""
 
 from fastapi import Body, Depends
-from sqlalchemy import select
+from sqlalchemy import case, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from datetime import datetime
@@ -18,6 +18,34 @@ from app.models.user import User
 base_router = BaseAPIRouter(prefix="/api/departments", tags=["department"])
 router = base_router.router
 
+
+async def get_department_member_stats(db: AsyncSession, department_ids: list[int]) -> dict[int, tuple[int, int]]:
+    """单次 GROUP BY 查询各组织的 (成员数, 活跃成员数)，活跃成员为完成任务数 > 0 的用户."""
+    if not department_ids:
+        return {}
+    result = await db.execute(
+        select(
+            User.department_id,
+            func.count(User.id),
+            func.sum(case((User.completed_tasks > 0, 1), else_=0)),
+        )
+        .where(User.department_id.in_(department_ids))
+        .group_by(User.department_id)
+    )
+    return {dept_id: (member_count, active_count or 0) for dept_id, member_count, active_count in result.all()}
+
+
+def _department_response(department: Department, stats: dict[int, tuple[int, int]]) -> dict:
+    """转换为组织格式，包含成员数量."""
+    member_count, active_members_count = stats.get(department.id, (0, 0))
+    dept_dict = department.to_dict()
+    dept_dict['description'] = ""  # departments表没有description字段
+    dept_dict['isActive'] = True   # departments表没有isActive字段
+    dept_dict['memberCount'] = member_count  # 总成员数
+    dept_dict['activeMembersCount'] = active_members_count  # 活跃成员数 (完成任务数 > 0)
+    return dept_dict
+
+
 @router.get("/")
 @handle_api_errors
 async def get_departments(
@@ -38,25 +66,9 @@ async def get_departments(
     result = await db.execute(query.order_by(Department.created_at.desc()))
     departments = result.scalars().all()
 
-    # 转换为组织格式，包含成员数量
-    departments_data = []
-    for dept in departments:
-        dept_dict = dept.to_dict()
-
-        # 计算该组织的成员数量
-        users_result = await db.execute(select(User).filter(User.department_id == dept.id))
-        all_users = users_result.scalars().all()
-
-        # 计算活跃成员数量 (完成任务数 > 0)
-        active_members_count = sum(1 for user in all_users if user.completed_tasks and user.completed_tasks > 0)
-
-        # 添加组织相关的字段
-        dept_dict['description'] = ""  # departments表没有description字段
-        dept_dict['isActive'] = True   # departments表没有isActive字段
-        dept_dict['memberCount'] = len(all_users)  # 总成员数
-        dept_dict['activeMembersCount'] = active_members_count  # 活跃成员数
-
-        departments_data.append(dept_dict)
+    # 一次聚合查询得到所有组织的成员数量
+    stats = await get_department_member_stats(db, [dept.id for dept in departments])
+    departments_data = [_department_response(dept, stats) for dept in departments]
 
     return base_router.success_response(departments_data, "获取组织列表成功")
 
@@ -104,13 +116,8 @@ async def create_department(
     await db.refresh(department)
 
     # 转换为组织格式返回
-    dept_dict = department.to_dict()
-    dept_dict['description'] = ""  # departments表没有description字段
-    dept_dict['isActive'] = True   # departments表没有isActive字段
-    dept_dict['memberCount'] = 0   # 新创建的组织成员数为0
-    dept_dict['activeMembersCount'] = 0  # 新创建的组织活跃成员数为0
-
-    return base_router.success_response(dept_dict, "创建组织")
+    # 新创建的组织成员数为0
+    return base_router.success_response(_department_response(department, {}), "创建组织")
 
 @router.get("/{department_id}")
 @handle_api_errors
@@ -130,18 +137,8 @@ async def get_department_detail(
     if not department:
         base_router.error_response("组织不存在", 404)
 
-    # 计算成员数量
-    users_result = await db.execute(select(User).filter(User.department_id == department_id))
-    all_users = users_result.scalars().all()
-    active_members_count = sum(1 for user in all_users if user.completed_tasks and user.completed_tasks > 0)
-
-    dept_dict = department.to_dict()
-    dept_dict['description'] = ""
-    dept_dict['isActive'] = True
-    dept_dict['memberCount'] = len(all_users)
-    dept_dict['activeMembersCount'] = active_members_count
-
-    return base_router.success_response(dept_dict, "获取组织详情成功")
+    stats = await get_department_member_stats(db, [department.id])
+    return base_router.success_response(_department_response(department, stats), "获取组织详情成功")
 
 
 @router.put("/{department_id}")
@@ -193,19 +190,8 @@ async def update_department(
     await db.flush()
     await db.refresh(department)
 
-    # 计算成员数量
-    users_result = await db.execute(select(User).filter(User.department_id == department_id))
-    all_users = users_result.scalars().all()
-    active_members_count = sum(1 for user in all_users if user.completed_tasks and user.completed_tasks > 0)
-
-    # 转换为组织格式返回
-    dept_dict = department.to_dict()
-    dept_dict['description'] = ""
-    dept_dict['isActive'] = True
-    dept_dict['memberCount'] = len(all_users)
-    dept_dict['activeMembersCount'] = active_members_count
-
-    return base_router.success_response(dept_dict, "更新组织信息成功")
+    stats = await get_department_member_stats(db, [department.id])
+    return base_router.success_response(_department_response(department, stats), "更新组织信息成功")
 
 @router.delete("/{department_id}")
 @handle_api_errors
@@ -223,11 +209,10 @@ async def delete_department(
         base_router.error_response("组织不存在", 404)
 
     # 检查是否有用户属于这个组织
-    users_result = await db.execute(select(User).filter(User.department_id == department_id))
-    users = users_result.scalars().all()
+    member_count, _ = (await get_department_member_stats(db, [department_id])).get(department_id, (0, 0))
 
-    if users:
-        base_router.error_response(f"无法删除组织，还有 {len(users)} 个用户属于该组织", 400)
+    if member_count:
+        base_router.error_response(f"无法删除组织，还有 {member_count} 个用户属于该组织", 400)
 
     await db.delete(department)
     await db.flush()
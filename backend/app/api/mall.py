@@ -1,8 +1,9 @@
 """积分商城API."""
 from typing import Any, Optional
 
-from app.api.auth import get_current_user
+from app.api.auth import get_current_user, require_super_admin
 from app.core.database import get_db
+from app.core.logging_config import logger
 from app.models.scoring import PurchaseStatus
 from app.models.user import User
 from app.services.mall_service import MallService
@@ -252,7 +253,7 @@ async def purchase_item(
 
     支持功能：
     - 公司维度的积分管理
-    - 库存实时检查
+    - 库存原子扣减，避免超卖
     - 详细的错误信息
     - 购买后统计更新
     """
@@ -260,21 +261,13 @@ async def purchase_item(
         raise HTTPException(status_code=400, detail="用户未加入任何公司，无法进行积分兑换")
 
     mall_service = MallService(db)
+    # 购买失败会回滚会话并使已加载对象过期，提前取出用户ID
+    user_id = current_user.id
 
     try:
-        # 先检查商品是否可购买
-        can_purchase, message = await mall_service.can_purchase_item(
-            user_id=current_user.id,
-            item_id=request.item_id,
-            company_id=current_user.company_id
-        )
-
-        if not can_purchase:
-            raise HTTPException(status_code=400, detail=message)
-
-        # 执行购买
+        # 执行购买（库存、权限与余额在同一事务内原子校验）
         purchase = await mall_service.purchase_item(
-            user_id=current_user.id,
+            user_id=user_id,
             item_id=request.item_id,
             delivery_info=request.delivery_info,
             company_id=current_user.company_id
@@ -285,7 +278,7 @@ async def purchase_item(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Purchase failed for user {current_user.id}, item {request.item_id}: {e}")
+        logger.error(f"Purchase failed for user {user_id}, item {request.item_id}: {e}")
         raise HTTPException(status_code=500, detail="购买失败，请稍后重试")
 
 
@@ -948,92 +941,97 @@ async def search_mall_items(
     min_points: Optional[float] = Query(None, description="最低积分"),
     max_points: Optional[float] = Query(None, description="最高积分"),
     sort_by: str = Query("relevance", description="排序方式: relevance, points_asc, points_desc, popularity"),
-    limit: int = Query(20, description="限制数量"),
-    offset: int = Query(0, description="偏移量"),
+    limit: int = Query(20, ge=1, le=100, description="限制数量"),
+    offset: int = Query(0, ge=0, description="偏移量"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """商品搜索API.
 
     支持功能：
-    - 关键词搜索（名称、描述）
+    - 全文检索（名称、简介、标签、描述），中文按二元组切分
+    - BM25 相关性排序
     - 多维度过滤
     - 多种排序方式
-    - 搜索结果高亮
+    - 真实命中总数与搜索结果高亮偏移
     """
     try:
         from app.models.reward import MallItem
-        from sqlalchemy import and_, asc, desc, or_, select
-
-        # 构建基础查询
-        query = select(MallItem).where(
-            and_(
-                MallItem.deleted_at.is_(None),
-                MallItem.is_available,
-                MallItem.stock > 0,
-                or_(
-                    MallItem.company_id.is_(None),
-                    MallItem.company_id == current_user.company_id
-                )
+        from app.services.mall_search import highlight_offsets, mall_search_index
+        from sqlalchemy import and_, asc, desc, func, or_
+
+        # 基础过滤条件
+        filters = [
+            MallItem.deleted_at.is_(None),
+            MallItem.is_available,
+            MallItem.stock > 0,
+            or_(
+                MallItem.company_id.is_(None),
+                MallItem.company_id == current_user.company_id
             )
-        )
-
-        # 关键词搜索
-        if q:
-            search_condition = or_(
-                MallItem.name.ilike(f"%{q}%"),
-                MallItem.description.ilike(f"%{q}%"),
-                MallItem.short_description.ilike(f"%{q}%")
-            )
-            query = query.where(search_condition)
+        ]
 
         # 分类过滤
         if category:
-            query = query.where(MallItem.category == category)
+            filters.append(MallItem.category == category)
 
         # 积分范围过滤
         if min_points is not None:
-            min_points_storage = PointConverter.to_storage(min_points)
-            query = query.where(MallItem.points_cost >= min_points_storage)
+            filters.append(MallItem.points_cost >= PointConverter.to_storage(min_points))
 
         if max_points is not None:
-            max_points_storage = PointConverter.to_storage(max_points)
-            query = query.where(MallItem.points_cost <= max_points_storage)
+            filters.append(MallItem.points_cost <= PointConverter.to_storage(max_points))
 
         # 排序
         if sort_by == "points_asc":
-            query = query.order_by(asc(MallItem.points_cost))
+            order_by = [asc(MallItem.points_cost)]
         elif sort_by == "points_desc":
-            query = query.order_by(desc(MallItem.points_cost))
+            order_by = [desc(MallItem.points_cost)]
         elif sort_by == "popularity":
-            query = query.order_by(desc(MallItem.purchase_count), desc(MallItem.view_count))
-        else:  # relevance
-            # 简单的相关性排序：推荐商品优先，然后按浏览量
-            query = query.order_by(desc(MallItem.is_featured), desc(MallItem.view_count))
-
-        # 分页
-        query = query.limit(limit).offset(offset)
-
-        result = await db.execute(query)
-        items = result.scalars().all()
+            order_by = [desc(MallItem.purchase_count), desc(MallItem.view_count)]
+        else:  # relevance，全文检索时由 BM25 分数排序
+            order_by = None
+
+        scores = {}
+        if await mall_search_index.ensure(db):
+            rows, total = await mall_search_index.search(
+                db, q, filters, order_by=order_by, limit=limit, offset=offset
+            )
+            items = [item for item, _ in rows]
+            scores = {item.id: score for item, score in rows}
+        else:
+            # 不支持 FTS5 时回退到 LIKE 查询
+            filters.append(or_(
+                MallItem.name.ilike(f"%{q}%"),
+                MallItem.description.ilike(f"%{q}%"),
+                MallItem.short_description.ilike(f"%{q}%")
+            ))
+            total = await db.scalar(select(func.count(MallItem.id)).where(and_(*filters))) or 0
+            query = (
+                select(MallItem)
+                .where(and_(*filters))
+                .order_by(*(order_by or [desc(MallItem.is_featured), desc(MallItem.view_count)]))
+                .limit(limit)
+                .offset(offset)
+            )
+            items = (await db.execute(query)).scalars().all()
 
         # 转换为API响应格式
         search_results = []
         for item in items:
             item_data = item.to_api_response()
-
-            # 添加搜索高亮（简单实现）
-            if q:
-                item_data["highlight"] = {
-                    "name": q.lower() in item.name.lower(),
-                    "description": q.lower() in (item.description or "").lower()
-                }
-
+            # bm25 分数越小越相关，取反后越大越相关
+            item_data["score"] = round(-scores[item.id], 4) if item.id in scores else None
+            item_data["highlight"] = {
+                "name": highlight_offsets(item.name, q),
+                "shortDescription": highlight_offsets(item.short_description, q),
+                "description": highlight_offsets(item.description, q)
+            }
             search_results.append(item_data)
 
         return {
             "items": search_results,
-            "total": len(search_results),
+            "total": total,
             "query": q,
             "filters": {
                 "category": category,
@@ -1043,7 +1041,8 @@ async def search_mall_items(
             },
             "pagination": {
                 "limit": limit,
-                "offset": offset
+                "offset": offset,
+                "hasMore": offset + len(search_results) < total
             }
         }
 
@@ -1054,89 +1053,34 @@ async def search_mall_items(
 
 @router.get("/recommendations")
 async def get_recommendations(
-    limit: int = Query(10, description="推荐数量"),
+    limit: int = Query(10, ge=1, le=50, description="推荐数量"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """获取个性化推荐商品.
 
-    推荐策略：
-    1. 用户历史购买偏好
-    2. 热门商品
+    推荐策略（候选列表预先计算，请求时只做过滤）：
+    1. 用户历史购买偏好（购买/取消时增量维护）
+    2. 公司内热门商品（定时物化的排名）
     3. 推荐商品
     4. 积分范围匹配
     """
     try:
-        from app.models.reward import MallItem
-        from app.models.scoring import PointPurchase
         from app.services.point_service import PointService
-        from sqlalchemy import desc, func, select
+        from app.services.recommendation_service import RecommendationService
 
-        # 获取用户当前积分
-        point_service = PointService(db)
-        user_balance = await point_service.get_user_balance_for_display_by_company(
+        # 获取用户当前积分（余额表单行读取）
+        balance = await PointService(db).get_user_balance_by_company(
             current_user.id, current_user.company_id
         )
 
-        # 获取用户购买历史的分类偏好
-        user_categories_result = await db.execute(
-            select(
-                MallItem.category,
-                func.count(PointPurchase.id).label('purchase_count')
-            )
-            .join(PointPurchase, MallItem.id == PointPurchase.item_id)
-            .where(
-                and_(
-                    PointPurchase.user_id == current_user.id,
-                    PointPurchase.status != PurchaseStatus.CANCELLED
-                )
-            )
-            .group_by(MallItem.category)
-            .order_by(desc(func.count(PointPurchase.id)))
-            .limit(3)
-        )
-
-        preferred_categories = [row.category for row in user_categories_result.fetchall()]
-
-        # 构建推荐查询
-        query = select(MallItem).where(
-            and_(
-                MallItem.deleted_at.is_(None),
-                MallItem.is_available,
-                MallItem.stock > 0,
-                MallItem.points_cost <= PointConverter.to_storage(user_balance * 1.2),  # 稍微超出预算的商品也推荐
-                or_(
-                    MallItem.company_id.is_(None),
-                    MallItem.company_id == current_user.company_id
-                )
-            )
+        result = await RecommendationService(db).get_recommendations(
+            current_user.id, current_user.company_id, balance, limit
         )
-
-        # 推荐排序策略
-        if preferred_categories:
-            # 有购买历史：偏好分类 + 热门度 + 推荐标记
-            category_condition = MallItem.category.in_(preferred_categories)
-            query = query.order_by(
-                desc(category_condition),  # 偏好分类优先
-                desc(MallItem.is_featured),  # 推荐商品优先
-                desc(MallItem.purchase_count),  # 热门度
-                desc(MallItem.view_count)
-            )
-        else:
-            # 无购买历史：推荐商品 + 热门度
-            query = query.order_by(
-                desc(MallItem.is_featured),
-                desc(MallItem.purchase_count),
-                desc(MallItem.view_count)
-            )
-
-        query = query.limit(limit)
-
-        result = await db.execute(query)
-        items = result.scalars().all()
+        preferred_categories = result["preferredCategories"]
 
         recommendations = []
-        for item in items:
+        for item, purchase_count in result["items"]:
             item_data = item.to_api_response()
 
             # 添加推荐原因
@@ -1145,7 +1089,7 @@ async def get_recommendations(
                 reasons.append("基于您的购买偏好")
             if item.is_featured:
                 reasons.append("热门推荐")
-            if item.purchase_count > 10:
+            if purchase_count > 10:
                 reasons.append("用户喜爱")
             if not reasons:
                 reasons.append("为您精选")
@@ -1155,7 +1099,7 @@ async def get_recommendations(
 
         return {
             "recommendations": recommendations,
-            "userBalance": user_balance,
+            "userBalance": PointConverter.format_for_api(balance),
             "preferredCategories": preferred_categories,
             "total": len(recommendations)
         }
@@ -1163,3 +1107,19 @@ async def get_recommendations(
     except Exception as e:
         logger.error(f"Get recommendations failed: {e}")
         raise HTTPException(status_code=500, detail="获取推荐失败")
+
+
+@router.post("/admin/recommendations/refresh")
+async def refresh_recommendations(
+    rebuild_affinities: bool = Query(False, description="是否同时根据购买记录重建用户分类偏好"),
+    current_user: User = Depends(require_super_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """立即刷新热门商品候选列表 - 超级管理员功能."""
+    from app.services.recommendation_service import RecommendationService
+
+    service = RecommendationService(db)
+    result = await service.refresh_all_popularity()
+    if rebuild_affinities:
+        result["affinities"] = await service.rebuild_affinities()
+    return result
@@ -1,12 +1,12 @@
 """通知API."""
-import asyncio
-import json
 import logging
-from datetime import datetime, timezone
+from datetime import UTC, datetime, timedelta
 from typing import Optional
 
-from app.api.auth import get_current_user
+from app.api.auth import get_current_user, require_super_admin
 from app.core.database import get_db
+from app.core.pubsub import pubsub
+from app.core.sse_broker import notification_broker
 from app.models.notification import (
     NotificationCategory,
     NotificationStatus,
@@ -15,7 +15,7 @@ from app.models.user import User
 from app.services.notification_service import NotificationService
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(prefix="/api", tags=["notifications"])
@@ -42,7 +42,27 @@ class NotificationSummaryResponse(BaseModel):
 
 
 class MarkAsReadRequest(BaseModel):
-    notification_ids: list[str] = Field(..., description="通知ID列表")
+    notification_ids: list[str] = Field(
+        ...,
+        validation_alias=AliasChoices("notification_ids", "notificationIds"),
+        description="通知ID列表"
+    )
+
+
+class BulkDeleteRequest(BaseModel):
+    """批量删除通知请求；指定 notification_ids 时按 ID 删除，否则按条件删除."""
+    notification_ids: list[str] | None = Field(
+        None,
+        validation_alias=AliasChoices("notification_ids", "notificationIds"),
+        description="通知ID列表"
+    )
+    category: str | None = Field(None, description="通知类型")
+    older_than_days: int | None = Field(
+        None,
+        ge=0,
+        validation_alias=AliasChoices("older_than_days", "olderThanDays"),
+        description="删除创建时间早于该天数的通知"
+    )
 
 
 @router.get("/notifications", response_model=list[NotificationResponse])
@@ -141,7 +161,53 @@ async def mark_all_notifications_as_read(
 
     count = await notification_service.mark_all_as_read(current_user.id)
 
-    return {"message": f"已标记 {count} 条通知为已读"}
+    return {"message": f"已标记 {count} 条通知为已读", "count": count}
+
+
+@router.post("/notifications/batch-read")
+async def mark_notifications_as_read_batch(
+    request: MarkAsReadRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """批量标记指定通知为已读."""
+    notification_service = NotificationService(db)
+
+    count = await notification_service.mark_as_read_bulk(current_user.id, request.notification_ids)
+
+    return {"message": f"已标记 {count} 条通知为已读", "count": count}
+
+
+@router.post("/notifications/batch-delete")
+async def delete_notifications_batch(
+    request: BulkDeleteRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """批量删除通知：按ID列表，或按类型和/或时间条件."""
+    notification_service = NotificationService(db)
+
+    category = None
+    if request.category:
+        try:
+            category = NotificationCategory(request.category.upper())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="无效的通知类型")
+    older_than = None
+    if request.older_than_days is not None:
+        older_than = datetime.now(UTC) - timedelta(days=request.older_than_days)
+
+    try:
+        count = await notification_service.delete_notifications_bulk(
+            current_user.id,
+            notification_ids=request.notification_ids,
+            category=category,
+            older_than=older_than
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"message": f"已删除 {count} 条通知", "count": count}
 
 
 @router.delete("/notifications/{notification_id}")
@@ -161,72 +227,30 @@ async def delete_notification(
     return {"message": "通知已删除"}
 
 
-# SSE 连接管理
-notification_connections = {}  # {user_id: [queue1, queue2, ...]}
 logger = logging.getLogger(__name__)
 
 
-async def notification_event_generator(user_id: int):
-    """为特定用户生成 SSE 事件流."""
-    queue = asyncio.Queue()
+NOTIFICATION_CHANNEL = "notifications"
 
-    # 将连接添加到管理器
-    if user_id not in notification_connections:
-        notification_connections[user_id] = []
-    notification_connections[user_id].append(queue)
 
-    try:
-        # 发送初始连接确认
-        initial_message = {
-            'type': 'connected',
-            'message': 'SSE连接已建立',
-            'timestamp': datetime.now(timezone.utc).isoformat()
-        }
-        yield f"data: {json.dumps(initial_message, ensure_ascii=False)}\n\n"
+def _deliver_notification(message: dict):
+    """将发布/订阅消息投递到本进程持有的 SSE 连接."""
+    notification_broker.publish(message["userId"], message["data"], coalesce_key=message.get("coalesceKey"))
 
-        # 持续监听队列中的新通知
-        while True:
-            try:
-                # 等待新通知，设置超时以发送心跳
-                notification_data = await asyncio.wait_for(queue.get(), timeout=30.0)
-                yield f"data: {json.dumps(notification_data, ensure_ascii=False)}\n\n"
-            except asyncio.TimeoutError:
-                # 发送心跳保持连接
-                heartbeat_message = {
-                    'type': 'heartbeat',
-                    'timestamp': datetime.now(timezone.utc).isoformat()
-                }
-                yield f"data: {json.dumps(heartbeat_message, ensure_ascii=False)}\n\n"
-            except Exception as e:
-                logger.error(f"SSE 事件生成错误: {e}")
-                break
-
-    except asyncio.CancelledError:
-        pass
-    except Exception as e:
-        logger.error(f"SSE 连接错误: {e}")
-    finally:
-        # 清理连接
-        if user_id in notification_connections:
-            try:
-                notification_connections[user_id].remove(queue)
-                if not notification_connections[user_id]:
-                    del notification_connections[user_id]
-            except ValueError:
-                pass
 
+pubsub.subscribe(NOTIFICATION_CHANNEL, _deliver_notification)
 
-def broadcast_notification_to_user(user_id: int, notification_data: dict):
-    """向特定用户的所有 SSE 连接广播通知."""
-    if user_id in notification_connections:
-        for queue in notification_connections[user_id]:
-            try:
-                # 使用 put_nowait 避免阻塞
-                queue.put_nowait(notification_data)
-            except asyncio.QueueFull:
-                logger.warning(f"用户 {user_id} 的通知队列已满")
-            except Exception as e:
-                logger.error(f"向用户 {user_id} 广播通知失败: {e}")
+
+def broadcast_notification_to_user(user_id: int, notification_data: dict, coalesce_key: str | None = None):
+    """向特定用户的所有 SSE 连接广播通知（跨 worker）."""
+    try:
+        pubsub.publish(NOTIFICATION_CHANNEL, {
+            "userId": user_id,
+            "data": notification_data,
+            "coalesceKey": coalesce_key,
+        })
+    except Exception as e:
+        logger.error(f"向用户 {user_id} 广播通知失败: {e}")
 
 
 async def get_current_user_for_sse(
@@ -263,19 +287,35 @@ async def get_current_user_for_sse(
     return user
 
 
+@router.get("/notifications/stream/stats")
+async def get_notification_stream_stats(current_user: User = Depends(require_super_admin)):
+    """获取本 worker 的通知 SSE 连接数与队列深度指标（超级管理员）."""
+    return notification_broker.stats()
+
+
 @router.get("/notifications/stream")
 async def stream_notifications(
+    request: Request,
+    last_event_id: str | None = Query(None, alias="lastEventId", description="断线重连时的最后事件ID"),
     current_user: User = Depends(get_current_user_for_sse)
 ):
-    """SSE 端点，用于实时推送通知."""
+    """SSE 端点，用于实时推送通知.
+
+    断线补发只在同一 worker 进程内有效；事件 ID 来自其他 worker 或重启前的进程时下发 resync。
+    """
+    # EventSource 重连时会自动携带 Last-Event-ID 请求头
+    header_event_id = request.headers.get("Last-Event-ID")
+    if header_event_id:
+        last_event_id = header_event_id
+
     return StreamingResponse(
-        notification_event_generator(current_user.id),
+        notification_broker.stream(current_user.id, last_event_id),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
             "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "Cache-Control, X-User-Id",
+            "Access-Control-Allow-Headers": "Cache-Control, X-User-Id, Last-Event-ID",
             "Access-Control-Allow-Methods": "GET",
             "X-Accel-Buffering": "no",
             "Content-Type": "text/event-stream; charset=utf-8"
@@ -2,24 +2,29 @@ import asyncio
 import json
 from datetime import datetime, timezone
 
+from app.api.auth import get_current_user, require_super_admin
 from app.core.ai_service import calculate_points_from_analysis, perform_pr_analysis
 from app.core.database import AsyncSessionLocal, get_db
+from app.core.llm_cache import llm_result_cache
+from app.core.pubsub import pubsub
 from app.models.activity import Activity
 from app.models.pull_request import PullRequest
 from app.models.pull_request_result import PullRequestResult
 from app.models.scoring import TransactionType
+from app.models.user import User
 from app.services.point_service import PointService
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(prefix="/api/pr", tags=["Pull Requests"])
 
-# 用于存储活跃的 SSE 客户端连接
+# 用于存储本进程内活跃的 SSE 客户端连接
 connections: dict[str, list[asyncio.Queue]] = {}
+ANALYSIS_CHANNEL = "pr_analysis"
 
-async def _full_pr_analysis_and_save(activity_show_id: str):
+async def _full_pr_analysis_and_save(activity_show_id: str, bypass_cache: bool = False):
     """在后台执行完整的 PR AI 分析并保存结果到数据库。."""
     async with AsyncSessionLocal() as db:
         try:
@@ -48,7 +53,7 @@ async def _full_pr_analysis_and_save(activity_show_id: str):
 
             print(f"Background task: Starting AI analysis for PR {pr.pr_node_id}")
             try:
-                analysis_result = await perform_pr_analysis(pr)
+                analysis_result = await perform_pr_analysis(pr, bypass_cache=bypass_cache)
                 print(f"Background task: AI analysis completed for PR {pr.pr_node_id}. Raw Result: {analysis_result}")
             except Exception as e:
                 print(f"Background task: Error during perform_pr_analysis for PR {pr.pr_node_id}: {e}")
@@ -155,21 +160,43 @@ async def _event_generator(activity_show_id: str):
         if not connections[activity_show_id]:
             del connections[activity_show_id]
 
+def _deliver_analysis_update(message: dict):
+    """将发布/订阅消息投递到本进程内订阅了该活动的 SSE 连接."""
+    for q in connections.get(message["activityShowId"], ()):
+        try:
+            q.put_nowait(message["data"])
+        except Exception as e:
+            print(f"Error putting data to queue for {message['activityShowId']}: {e}")
+
+
+pubsub.subscribe(ANALYSIS_CHANNEL, _deliver_analysis_update)
+
+
 def notify_clients(activity_show_id: str, data: dict):
-    """向所有订阅了特定 activity_show_id 的客户端发送通知。."""
-    if activity_show_id in connections:
-        # 使用 asyncio.create_task 确保发送操作是非阻塞的
-        for q in connections[activity_show_id]:
-            try:
-                asyncio.create_task(q.put(data))
-            except Exception as e:
-                print(f"Error putting data to queue for {activity_show_id}: {e}")
+    """向所有订阅了特定 activity_show_id 的客户端发送通知（跨 worker）."""
+    try:
+        pubsub.publish(ANALYSIS_CHANNEL, {"activityShowId": activity_show_id, "data": data})
+    except Exception as e:
+        print(f"Error publishing analysis update for {activity_show_id}: {e}")
 
 @router.get("/stream-analysis-updates/{activity_show_id}")
 async def stream_analysis_updates(activity_show_id: str):
     """SSE 端点，用于客户端订阅 AI 分析状态更新。."""
     return StreamingResponse(_event_generator(activity_show_id), media_type="text/event-stream")
 
+@router.get("/ai-cache/stats")
+async def get_ai_cache_stats(current_user: User = Depends(require_super_admin)):
+    """获取 LLM 结果缓存的命中统计（超级管理员）."""
+    return await llm_result_cache.stats()
+
+
+@router.delete("/ai-cache")
+async def clear_ai_cache(current_user: User = Depends(require_super_admin)):
+    """清空 LLM 结果缓存（超级管理员）."""
+    removed = await llm_result_cache.clear()
+    return {"message": "LLM 结果缓存已清空", "removed": removed}
+
+
 @router.get("/{pr_node_id}")
 async def get_pull_request_details(pr_node_id: str, db: AsyncSession = Depends(get_db)):
     """根据 PR 的 Node ID 获取其详细信息和时间线事件。."""
@@ -325,11 +352,18 @@ async def calculate_pr_points(
 async def analyze_pull_request(
     activity_show_id: str,
     background_tasks: BackgroundTasks,
+    bypass_cache: bool = Query(False, alias="bypassCache", description="忽略 LLM 结果缓存，强制重新分析（超级管理员）"),
+    user_id: str | None = Header(None, alias="X-User-Id"),
     db: AsyncSession = Depends(get_db)
 ):
     """触发指定 PR 的 AI 评分。
     该接口将立即返回，AI 分析在后台异步执行。.
     """
+    # 接口本身无需登录，仅 bypassCache 需要超级管理员身份
+    if bypass_cache:
+        current_user = await get_current_user(user_id, db)
+        if not current_user.is_super_admin:
+            raise HTTPException(status_code=403, detail="需要超级管理员权限")
     print(f"Received analyze request for activity_show_id: {activity_show_id}")
     try:
         activity_result = await db.execute(select(Activity).filter(Activity.show_id == activity_show_id))
@@ -338,7 +372,7 @@ async def analyze_pull_request(
             raise HTTPException(status_code=404, detail=f"Activity with show ID {activity_show_id} not found.")
 
         # 将耗时的 AI 分析和数据库保存操作放到后台任务中
-        background_tasks.add_task(_full_pr_analysis_and_save, activity_show_id)
+        background_tasks.add_task(_full_pr_analysis_and_save, activity_show_id, bypass_cache)
 
         return {"message": "PR AI analysis triggered successfully. Analysis will be performed in the background."}
     except HTTPException as e:
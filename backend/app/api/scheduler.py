@@ -0,0 +1,59 @@
+"""定时任务调度管理API."""
+
+from app.api.auth import require_super_admin
+from app.core.database import get_db
+from app.core.job_scheduler import job_scheduler
+from app.models.scheduler_run import SchedulerRun
+from app.models.user import User
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+router = APIRouter(prefix="/api/scheduler", tags=["scheduler"])
+
+
+@router.get("/jobs")
+async def list_scheduled_jobs(
+    current_user: User = Depends(require_super_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """列出定时任务及最近一次执行的耗时与结果（超级管理员）."""
+    return await job_scheduler.describe(db)
+
+
+@router.get("/runs")
+async def list_scheduler_runs(
+    job_name: str | None = Query(None, alias="jobName"),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(require_super_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """查询定时任务执行历史（超级管理员）."""
+    query = select(SchedulerRun).order_by(SchedulerRun.id.desc()).limit(limit)
+    if job_name:
+        query = query.where(SchedulerRun.job_name == job_name)
+    runs = (await db.execute(query)).scalars().all()
+
+    return {
+        "runs": [run.to_dict() for run in runs],
+        "count": len(runs)
+    }
+
+
+@router.post("/jobs/{job_name}/run")
+async def trigger_scheduled_job(
+    job_name: str,
+    current_user: User = Depends(require_super_admin)
+):
+    """立即执行一次定时任务（超级管理员）."""
+    try:
+        await job_scheduler.run_now(job_name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return {
+        "message": f"任务 {job_name} 已触发",
+        "jobName": job_name
+    }
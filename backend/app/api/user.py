@@ -10,8 +10,8 @@ from app.core.decorators import handle_api_errors, transaction
 from app.models.department import Department
 from app.models.user import User
 from app.services.point_service import PointConverter
-from fastapi import Body, Depends, File, UploadFile
-from sqlalchemy import select
+from fastapi import Body, Depends, File, Query, UploadFile
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -179,45 +179,59 @@ async def upload_avatar(user_id: int, file: UploadFile = File(...), db: AsyncSes
 async def list_company_members(
     companyId: int | None = None,
     q: str | None = None,
-    page: int = 1,
-    pageSize: int = 20,
+    page: int = Query(1, ge=1),
+    pageSize: int = Query(20, ge=1, le=100),
+    cursor: int | None = Query(None, description="上一页最后一个成员的ID，传入时使用游标分页并忽略 page"),
+    includeTotal: bool = True,
     db: AsyncSession = Depends(get_db)
 ):
     """获取公司成员列表。若未提供 companyId，尝试通过 X-User-Id 识别当前用户并使用其 company_id。.
     
-    查询参数：companyId, q(搜索), page, pageSize
+    查询参数：companyId, q(搜索), page, pageSize, cursor, includeTotal
     
-    返回：items[], total, page, pageSize.
+    返回：items[], total, page, pageSize, nextCursor.
     """
-    # 基础查询
-    query = select(User).filter(User.company_id == companyId)
+    # 只查询需要的列，不加载密码哈希与关联关系
+    filters = [User.company_id == companyId]
     if q:
         like = f"%{q.strip()}%"
-        query = query.filter((User.name.ilike(like)) | (User.email.ilike(like)))
-
-    total_result = await db.execute(query)
-    all_users = total_result.scalars().all()
-    total = len(all_users)
-
-    # 分页
-    start = (page - 1) * pageSize
-    end = start + pageSize
-    page_users = all_users[start:end]
-
-    items = []
-    for u in page_users:
-        items.append({
-            "id": u.id,
-            "name": u.name,
-            "email": u.email,
-            "avatar": u.avatar_url,
-            "companyId": u.company_id,
-            "departmentId": u.department_id,
-        })
+        filters.append((User.name.ilike(like)) | (User.email.ilike(like)))
+
+    query = (
+        select(User.id, User.name, User.email, User.avatar_url, User.company_id, User.department_id)
+        .where(*filters)
+        .order_by(User.id)
+    )
+    if cursor is not None:
+        query = query.where(User.id > cursor)
+    else:
+        query = query.offset((page - 1) * pageSize)
+
+    # 多取一条用于判断是否还有下一页
+    rows = (await db.execute(query.limit(pageSize + 1))).all()
+    has_more = len(rows) > pageSize
+    rows = rows[:pageSize]
+
+    total = None
+    if includeTotal:
+        total = await db.scalar(select(func.count(User.id)).where(*filters))
+
+    items = [
+        {
+            "id": row.id,
+            "name": row.name,
+            "email": row.email,
+            "avatar": row.avatar_url,
+            "companyId": row.company_id,
+            "departmentId": row.department_id,
+        }
+        for row in rows
+    ]
 
     return base_router.success_response({
         "items": items,
         "total": total,
         "page": page,
         "pageSize": pageSize,
+        "nextCursor": rows[-1].id if has_more else None,
     }, "获取公司成员成功")
@@ -12,7 +12,7 @@ from uuid import uuid4
 from app.core.config import Settings
 from app.core.database import AsyncSessionLocal, get_db
 from app.core.logging_config import logger
-from app.core.scheduler import process_pending_tasks
+from app.core.scheduler import analysis_worker_pool, enqueue_analysis
 from app.models.activity import Activity
 from app.models.pull_request import PullRequest
 from app.models.pull_request_event import PullRequestEvent
@@ -127,10 +127,11 @@ async def process_pull_request_event(
 
                 await db.commit()
 
-                # 将分析任务放入队列
+                # 将分析任务放入队列（同一 head SHA 只分析一次）
                 existing_activity_result = await db.execute(select(Activity).filter(Activity.id == pr_node_id))
                 existing_activity = existing_activity_result.scalars().first()
                 try:
+                    _, job_created = await enqueue_analysis(db, pr_node_id, repo_name, pr.commit_sha)
                     if not existing_activity:
                         activity = Activity(title=title, description=None, points=0, user_id=user.id, status="pending", created_at=pr.created_at)
                         activity.id = pr_node_id
@@ -138,13 +139,15 @@ async def process_pull_request_event(
                         db.add(activity)
                     else:
                         # 只更新非user_id字段，user_id一旦绑定不可更改
-                        existing_activity.status = "pending"
+                        if job_created:
+                            existing_activity.status = "pending"
                         existing_activity.diff_url = pr.diff_url
                         existing_activity.created_at = pr.created_at
                     await db.commit()
                     print(f"    Pending task for PR #{pr_number} saved/updated successfully.")
 
-                    asyncio.create_task(process_pending_tasks())
+                    if job_created:
+                        analysis_worker_pool.notify()
                 except Exception as e:
                     await db.rollback()
                     print(f"    Error saving/updating pending task for PR #{pr_number}: {e}")
@@ -2,10 +2,13 @@ import asyncio
 import json
 import re
 import time
+from collections.abc import Iterable, Iterator
 from functools import wraps
 
 import httpx
 from app.core.config import Settings
+from app.core.github_client import get_github_client
+from app.core.llm_cache import llm_result_cache
 from app.core.logging_config import logger
 from app.models.pull_request import PullRequest
 
@@ -13,6 +16,10 @@ DOUBAO_MODEL=Settings.DOUBAO_MODEL
 DOUBAO_API_KEY=Settings.DOUBAO_API_KEY
 DOUBAO_URLS=Settings.DOUBAO_URLS
 
+# 提示词版本：修改 pr_score_agent / pr_suggestion_agent 的提示词后需递增，使旧的缓存结果失效
+SCORE_PROMPT_VERSION = "score-v1"
+SUGGESTION_PROMPT_VERSION = "suggestion-v1"
+
 _httpx_client = None
 _openai_client = None
 
@@ -51,115 +58,338 @@ def timeit(func):
             return result
         return wrapper
 
-def parse_unified_diff(patch_text: str):
-    """将 unified diff 文本解析为结构化数据。
-    返回: List[dict]，每个 dict 包含:
-      - file_path: 文件相对路径
-      - added_lines: List[List[int]]   每个 hunk 的新增行号列表
-      - added_code: List[str]          每个 hunk 的新增代码（多行字符串）
-      - deleted_lines: List[List[int]] 每个 hunk 的删除行号列表
-      - deleted_code: List[str]        每个 hunk 的删除代码（多行字符串）.
-    """
-    result = []
-    current_file_entry = None
-    added_lines: list[int] = []
-    added_code: list[str] = []
-    deleted_lines: list[int] = []
-    deleted_code: list[str] = []
+_FILE_PATH_RE = re.compile(r'^\+\+\+\s*(?:b/)?(.+)$')
+_HUNK_HEADER_RE = re.compile(r'^@@ -(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@')
+
+
+class DiffHunk:
+    """单个 hunk 的增删行，代码按行保存，避免反复 join/split."""
+
+    __slots__ = ("added_lines", "added_code", "deleted_lines", "deleted_code")
+
+    def __init__(self):
+        """初始化空 hunk."""
+        self.added_lines: list[int] = []
+        self.added_code: list[str] = []
+        self.deleted_lines: list[int] = []
+        self.deleted_code: list[str] = []
+
+    def __bool__(self) -> bool:
+        """hunk 中有增删代码时为真."""
+        return bool(self.added_code or self.deleted_code)
+
+
+class DiffFile:
+    """单个文件的 diff 记录."""
+
+    __slots__ = ("file_path", "hunks")
+
+    def __init__(self, file_path: str):
+        """初始化文件记录."""
+        self.file_path = file_path
+        self.hunks: list[DiffHunk] = []
+
+    def to_dict(self) -> dict:
+        """转换为 parse_unified_diff 返回的字典格式."""
+        return {
+            "file_path": self.file_path,
+            "added_lines": [h.added_lines for h in self.hunks],
+            "added_code": ["\n".join(h.added_code) for h in self.hunks],
+            "deleted_lines": [h.deleted_lines for h in self.hunks],
+            "deleted_code": ["\n".join(h.deleted_code) for h in self.hunks],
+        }
 
-    # 更宽松的文件路径正则，兼容 `+++ b/path`、`+++ /dev/null` 等
-    file_path_re = re.compile(r'^\+\+\+\s*(?:b/)?(.+)$')
-    hunk_header_re = re.compile(r'^@@ -(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@')
 
+def iter_text_lines(text: str, block_size: int = 64 * 1024) -> Iterator[str]:
+    """按块切分文本并逐行产出，避免一次性构造整个行列表（行分隔规则与 str.splitlines 一致）."""
+    start = 0
+    length = len(text)
+    while start < length:
+        end = text.find("\n", min(start + block_size, length))
+        if end == -1:
+            end = length
+        yield from text[start:end].splitlines()
+        start = end + 1
+
+
+def iter_unified_diff(lines: str | Iterable[str | bytes]) -> Iterator[DiffFile]:
+    """流式解析 unified diff，每解析完一个文件即产出一条 DiffFile.
+
+    lines 可以是完整的 diff 文本，也可以是逐行的 str/bytes 可迭代对象（如文件句柄、响应流）。
+    """
+    if isinstance(lines, str):
+        lines = iter_text_lines(lines)
+
+    current: DiffFile | None = None
+    hunk = DiffHunk()
     old_line_no = new_line_no = 0
+    pending_minus: str | None = None  # 可能是 `--- a/path` 文件头，需要看下一行才能确定
 
-    def flush_hunk():
-        nonlocal added_lines, added_code, deleted_lines, deleted_code
-        if current_file_entry and (added_code or deleted_code):
-            current_file_entry["added_lines"].append(added_lines)
-            current_file_entry["added_code"].append("\n".join(added_code))
-            current_file_entry["deleted_lines"].append(deleted_lines)
-            current_file_entry["deleted_code"].append("\n".join(deleted_code))
-        # 重置
-        added_lines, added_code, deleted_lines, deleted_code = [], [], [], []
-
-    lines = patch_text.splitlines()
     for line in lines:
-        if line.startswith("diff --git"):
-            # 保存前一个文件
-            flush_hunk()
-            if current_file_entry:
-                result.append(current_file_entry)
-            current_file_entry = None
-            continue
-        if line.startswith("+++ "):
-            m = file_path_re.match(line)
-            if m:
-                flush_hunk()
-                if current_file_entry:
-                    result.append(current_file_entry)
-                current_file_entry = {
-                    "file_path": m.group(1),
-                    "added_lines": [],
-                    "added_code": [],
-                    "deleted_lines": [],
-                    "deleted_code": [],
-                }
-            continue
-        if line.startswith("@@"):
-            flush_hunk()
-            m = hunk_header_re.match(line)
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="replace")
+        line = line.rstrip("\r\n")
+
+        if pending_minus is not None:
+            # 后面不是 `+++ ` 文件头，说明是一条以 "-- " 开头的删除行
+            if current is not None and not line.startswith("+++ "):
+                hunk.deleted_lines.append(old_line_no)
+                hunk.deleted_code.append(pending_minus[1:])
+                old_line_no += 1
+            pending_minus = None
+
+        first = line[:1]
+        if first == "+":
+            if line.startswith("+++ "):
+                m = _FILE_PATH_RE.match(line)
+                if m:
+                    if current is not None:
+                        if hunk:
+                            current.hunks.append(hunk)
+                        yield current
+                    current, hunk = DiffFile(m.group(1)), DiffHunk()
+            elif current is not None:
+                hunk.added_lines.append(new_line_no)
+                hunk.added_code.append(line[1:])
+                new_line_no += 1
+        elif first == "-":
+            if line.startswith("--- "):
+                pending_minus = line
+            elif current is not None:
+                hunk.deleted_lines.append(old_line_no)
+                hunk.deleted_code.append(line[1:])
+                old_line_no += 1
+        elif first == "@" and line.startswith("@@"):
+            if current is not None and hunk:
+                current.hunks.append(hunk)
+            hunk = DiffHunk()
+            m = _HUNK_HEADER_RE.match(line)
             if m:
                 old_line_no = int(m.group(1))
                 new_line_no = int(m.group(2))
-            continue
-        if line.startswith("+"):
-            if current_file_entry is not None:
-                added_lines.append(new_line_no)
-                added_code.append(line[1:])
-                new_line_no += 1
-            continue
-        if line.startswith("-"):
-            if current_file_entry is not None:
-                deleted_lines.append(old_line_no)
-                deleted_code.append(line[1:])
-                old_line_no += 1
-            continue
-        # 上下文行
-        if current_file_entry is not None:
+        elif first == "d" and line.startswith("diff --git"):
+            if current is not None:
+                if hunk:
+                    current.hunks.append(hunk)
+                yield current
+            current, hunk = None, DiffHunk()
+        elif current is not None:
+            # 上下文行
             old_line_no += 1
             new_line_no += 1
 
-    # 处理最后一个文件/ hunk
-    flush_hunk()
-    if current_file_entry:
-        result.append(current_file_entry)
+    if pending_minus is not None and current is not None:
+        hunk.deleted_lines.append(old_line_no)
+        hunk.deleted_code.append(pending_minus[1:])
+    if current is not None:
+        if hunk:
+            current.hunks.append(hunk)
+        yield current
+
+
+def parse_unified_diff(patch_text: str | Iterable[str | bytes]):
+    """将 unified diff 文本解析为结构化数据.
+
+    返回: List[dict]，每个 dict 包含:
+      - file_path: 文件相对路径
+      - added_lines: List[List[int]]   每个 hunk 的新增行号列表
+      - added_code: List[str]          每个 hunk 的新增代码（多行字符串）
+      - deleted_lines: List[List[int]] 每个 hunk 的删除行号列表
+      - deleted_code: List[str]        每个 hunk 的删除代码（多行字符串）.
+
+    需要逐文件处理时请直接使用 iter_unified_diff。
+    """
+    return [diff_file.to_dict() for diff_file in iter_unified_diff(patch_text)]
+
+
+def _truncate_code_lines(lines: list[str], max_lines: int) -> str:
+    if len(lines) > max_lines:
+        half = max_lines // 2
+        return "\n".join(lines[:half] + ['...省略...'] + lines[-half:])
+    return "\n".join(lines)
 
-    return result
 
 def compress_diff(structured_diff, max_lines: int = 50):
-    """对结构化 diff 进行摘要，限制每个 hunk 的代码行数."""
+    """对结构化 diff 进行摘要，限制每个 hunk 的代码行数.
+
+    structured_diff 可以是 parse_unified_diff 返回的字典列表，
+    也可以是 iter_unified_diff 产出的 DiffFile 迭代器（按文件惰性消费）。
+    """
     compressed = []
     for entry in structured_diff:
+        if isinstance(entry, DiffFile):
+            compressed.append({
+                "file_path": entry.file_path,
+                "added_lines": [h.added_lines for h in entry.hunks],
+                "added_code": [_truncate_code_lines(h.added_code, max_lines) for h in entry.hunks],
+                "deleted_lines": [h.deleted_lines for h in entry.hunks],
+                "deleted_code": [_truncate_code_lines(h.deleted_code, max_lines) for h in entry.hunks],
+            })
+            continue
         new_entry = entry.copy()
-        new_entry['added_code'] = []
-        new_entry['deleted_code'] = []
-        for code in entry.get('added_code', []):
-            lines = code.split('\n')
-            if len(lines) > max_lines:
-                half = max_lines // 2
-                lines = lines[:half] + ['...省略...'] + lines[-half:]
-            new_entry['added_code'].append('\n'.join(lines))
-        for code in entry.get('deleted_code', []):
-            lines = code.split('\n')
-            if len(lines) > max_lines:
-                half = max_lines // 2
-                lines = lines[:half] + ['...省略...'] + lines[-half:]
-            new_entry['deleted_code'].append('\n'.join(lines))
+        new_entry['added_code'] = [
+            _truncate_code_lines(code.split('\n'), max_lines) for code in entry.get('added_code', [])
+        ]
+        new_entry['deleted_code'] = [
+            _truncate_code_lines(code.split('\n'), max_lines) for code in entry.get('deleted_code', [])
+        ]
         compressed.append(new_entry)
     return compressed
 
+
+def iter_pr_file_patch_lines(files_data: Iterable[dict]) -> Iterator[str]:
+    """将 GitHub /pulls/{n}/files 的响应逐行展开为 unified diff，不拼接整段文本."""
+    for file in files_data:
+        if isinstance(file, dict) and file.get('patch'):
+            filename = file.get('filename') or file.get('previous_filename') or 'unknown_file'
+            yield f"+++ b/{filename}"
+            yield from iter_text_lines(file['patch'])
+
+
+def estimate_tokens(obj) -> int:
+    """粗略估算文本/结构化数据的 token 数（按 3 个字符约 1 个 token，偏保守）."""
+    text = obj if isinstance(obj, str) else json.dumps(obj, ensure_ascii=False)
+    return len(text) // 3 + 1
+
+
+def _split_entry_by_hunk(entry: dict, token_budget: int) -> list[dict]:
+    """将超出预算的单个文件按 hunk 拆分为多个同名文件条目."""
+    hunk_count = len(entry.get("added_code", []))
+    parts: list[dict] = []
+    current = None
+    current_tokens = 0
+    for i in range(hunk_count):
+        hunk = {
+            "added_lines": entry["added_lines"][i],
+            "added_code": entry["added_code"][i],
+            "deleted_lines": entry["deleted_lines"][i],
+            "deleted_code": entry["deleted_code"][i],
+        }
+        hunk_tokens = estimate_tokens(hunk)
+        if current is None or current_tokens + hunk_tokens > token_budget:
+            current = {"file_path": entry["file_path"], "added_lines": [], "added_code": [],
+                       "deleted_lines": [], "deleted_code": []}
+            parts.append(current)
+            current_tokens = 0
+        for field, value in hunk.items():
+            current[field].append(value)
+        current_tokens += hunk_tokens
+    return parts or [entry]
+
+
+def plan_diff_chunks(structured_diff: list[dict], token_budget: int | None = None) -> list[list[dict]]:
+    """按 token 预算将结构化 diff 切分为若干块.
+
+    以文件为单位贪心装箱；单个文件超出预算时按 hunk 拆分。
+    单个 hunk 已由 compress_diff 限制行数，不再继续拆分。
+    """
+    token_budget = token_budget or Settings.LLM_CHUNK_TOKEN_BUDGET
+    chunks: list[list[dict]] = []
+    current: list[dict] = []
+    current_tokens = 0
+    for entry in structured_diff:
+        entry_tokens = estimate_tokens(entry)
+        pieces = [entry] if entry_tokens <= token_budget else _split_entry_by_hunk(entry, token_budget)
+        for piece in pieces:
+            piece_tokens = entry_tokens if piece is entry else estimate_tokens(piece)
+            if current and current_tokens + piece_tokens > token_budget:
+                chunks.append(current)
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def build_score_digest(structured_diff: list[dict], suggestions: list[dict], token_budget: int | None = None) -> list[dict]:
+    """汇总各分块的分析结果，作为大 PR 评分（reduce 阶段）的输入.
+
+    每个文件保留增删行数、hunk 数以及分块建议的要点；在预算允许时附带首个 hunk 的代码。
+    """
+    token_budget = token_budget or Settings.LLM_CHUNK_TOKEN_BUDGET
+    notes_by_file: dict[str, list[str]] = {}
+    for s in suggestions:
+        title = s.get("简要标题") or s.get("title")
+        if title:
+            kind = s.get("类型") or s.get("type") or ""
+            notes_by_file.setdefault(s.get("file_path"), []).append(f"[{kind}] {title}")
+
+    digest: dict[str, dict] = {}
+    for entry in structured_diff:
+        item = digest.setdefault(entry["file_path"], {
+            "file_path": entry["file_path"],
+            "added_line_count": 0,
+            "deleted_line_count": 0,
+            "hunk_count": 0,
+            "review_notes": notes_by_file.get(entry["file_path"], [])[:5],
+        })
+        item["added_line_count"] += sum(len(lines) for lines in entry.get("added_lines", []))
+        item["deleted_line_count"] += sum(len(lines) for lines in entry.get("deleted_lines", []))
+        item["hunk_count"] += len(entry.get("added_code", []))
+
+    # 按改动量从大到小保留文件，超出预算的文件合并为一条汇总
+    items = sorted(digest.values(), key=lambda x: x["added_line_count"] + x["deleted_line_count"], reverse=True)
+    kept: list[dict] = []
+    used = 0
+    for idx, item in enumerate(items):
+        cost = estimate_tokens(item)
+        if used + cost > token_budget:
+            rest = items[idx:]
+            kept.append({
+                "file_path": f"(其余 {len(rest)} 个文件)",
+                "added_line_count": sum(x["added_line_count"] for x in rest),
+                "deleted_line_count": sum(x["deleted_line_count"] for x in rest),
+                "hunk_count": sum(x["hunk_count"] for x in rest),
+            })
+            break
+        kept.append(item)
+        used += cost
+
+    # 剩余预算内为保留的文件补充首个 hunk 的新增代码作为样例
+    kept_paths = {item["file_path"] for item in kept}
+    for entry in structured_diff:
+        if entry["file_path"] not in kept_paths:
+            continue
+        item = digest[entry["file_path"]]
+        if "sample_added_code" in item or not entry.get("added_code"):
+            continue
+        sample = entry["added_code"][0]
+        cost = estimate_tokens(sample)
+        if used + cost > token_budget:
+            break
+        item["sample_added_code"] = sample
+        used += cost
+    return kept
+
+
+async def _map_suggestions(chunks: list[list[dict]], pr_info: dict, bypass_cache: bool = False) -> list[dict]:
+    """分块的 map 阶段：并发对每个分块调用建议 agent，受信号量限制."""
+    semaphore = asyncio.Semaphore(Settings.LLM_MAX_CONCURRENCY)
+
+    async def run(chunk):
+        async with semaphore:
+            return await pr_suggestion_agent(chunk, pr_info, bypass_cache=bypass_cache)
+
+    results = await asyncio.gather(*(run(chunk) for chunk in chunks), return_exceptions=True)
+    suggestions: list[dict] = []
+    errors = []
+    for idx, result in enumerate(results):
+        if isinstance(result, BaseException):
+            logger.warning(f"[perform_pr_analysis] 第 {idx + 1}/{len(chunks)} 个分块建议生成失败: {result}")
+            errors.append(result)
+        else:
+            suggestions.extend(result)
+    if errors and len(errors) == len(chunks):
+        raise errors[0]
+    return suggestions
+
+
 @timeit
+@llm_result_cache.cached_agent(
+    "pr_score_agent", DOUBAO_MODEL, SCORE_PROMPT_VERSION,
+    should_cache=lambda result: bool(result.get("dimensions")),
+)
 async def pr_score_agent(structured_diff, pr_info) -> dict:
     """评分agent：全方面分析结构化diff和PR信息，输出各维度评分和理由。."""
     prompt = f"""
@@ -271,6 +501,7 @@ PR 信息:
     return result
 
 @timeit
+@llm_result_cache.cached_agent("pr_suggestion_agent", DOUBAO_MODEL, SUGGESTION_PROMPT_VERSION)
 async def pr_suggestion_agent(structured_diff, pr_info) -> list:
     """建议agent：针对所有结构化diff片段，进行单次AI调用，给出综合建议列表。."""
     combined_diff_content = ""
@@ -347,47 +578,29 @@ PR信息:
     return final_suggestions
 
 @timeit
-async def perform_pr_analysis(pr: PullRequest) -> dict:
-    """执行指定 PR 的 AI 分析，不触及数据库。."""
+async def perform_pr_analysis(pr: PullRequest, bypass_cache: bool = False) -> dict:
+    """执行指定 PR 的 AI 分析，不触及数据库.
+
+    bypass_cache 为 True 时忽略已缓存的 LLM 结果，强制重新调用模型。
+    """
     logger.info(f"[perform_pr_analysis] 开始执行 PR 分析 for PR {pr.pr_node_id}")
     owner, repo_name = pr.repository.split('/')
     pr_number = pr.pr_number
 
-    github_api_url = f"https://api.github.com/repos/{owner}/{repo_name}/pulls/{pr_number}/files"
-    github_pr_url = f"https://api.github.com/repos/{owner}/{repo_name}/pulls/{pr_number}"
-
-    diff_content = ""
+    files_data: list = []
     additions = None
     deletions = None
     try:
-        headers = {
-            "User-Agent": "PerfPulseAI-Bot/1.0 (https://github.com/v-trace-cn/PerfPulseAI)",
-            "Accept": "application/vnd.github.v3+json"
-        }
-        github_pat = Settings.GITHUB_PAT
-        if github_pat:
-            headers["Authorization"] = f"token {github_pat}"
-        logger.debug(f"[perform_pr_analysis] 尝试并行获取 GitHub diff 和 PR 信息。API URLs: {github_api_url}, {github_pr_url}")
-        client = await get_httpx_client()
-        files_task = client.get(github_api_url, headers=headers, follow_redirects=True)
-        pr_task = client.get(github_pr_url, headers=headers, follow_redirects=True)
-        files_response, pr_response = await asyncio.gather(files_task, pr_task)
-
-        files_response.raise_for_status()
-        pr_response.raise_for_status()
-
-        files_data = json.loads(files_response.text)
+        logger.debug(f"[perform_pr_analysis] 尝试并行获取 GitHub diff 和 PR 信息: {owner}/{repo_name}#{pr_number}")
+        client = get_github_client()
+        files_task = client.list_pull_request_files(f"{owner}/{repo_name}", pr_number)
+        pr_task = client.get_pull_request(f"{owner}/{repo_name}", pr_number)
+        files_data, pr_data = await asyncio.gather(files_task, pr_task)
+
         if not isinstance(files_data, list):
             raise ValueError("GitHub API did not return a list of files.")
         logger.debug(f"[perform_pr_analysis] 从 GitHub 获取到 {len(files_data)} 个文件数据。")
-        for file in files_data:
-            if isinstance(file, dict) and 'patch' in file and file['patch']:
-                filename = file.get('filename') or file.get('previous_filename') or 'unknown_file'
-                diff_content += f"+++ b/{filename}\n"
-                diff_content += file['patch'] + "\n"
-        logger.debug(f"[perform_pr_analysis] diff_content 构造完成，长度: {len(diff_content)}。")
-
-        pr_data = json.loads(pr_response.text)
+
         additions = pr_data.get("additions")
         deletions = pr_data.get("deletions")
         logger.debug(f"[perform_pr_analysis] PR 信息获取完成。Additions: {additions}, Deletions: {deletions}")
@@ -398,7 +611,7 @@ async def perform_pr_analysis(pr: PullRequest) -> dict:
         traceback.print_exc()
         raise ValueError(f"An unexpected error occurred while fetching diff from GitHub API: {e}")
 
-    if not diff_content:
+    if not any(isinstance(file, dict) and file.get('patch') for file in files_data):
         logger.warning(f"[perform_pr_analysis] No diff content for PR {pr.pr_node_id}, skipping analysis.")
         return {
             "overall_score": 0,
@@ -410,12 +623,8 @@ async def perform_pr_analysis(pr: PullRequest) -> dict:
             "summary": "No diff content found for this Pull Request."
         }
 
-    # 结构化diff
-    structured_diff = parse_unified_diff(diff_content)
-    logger.debug(f"[perform_pr_analysis] 结构化 diff 完成。文件数量: {len(structured_diff)}。")
-
-    # 智能摘要 diff
-    compressed_diff = compress_diff(structured_diff)
+    # 结构化 diff 并智能摘要：逐文件流式解析，不拼接整段 diff 文本
+    compressed_diff = compress_diff(iter_unified_diff(iter_pr_file_patch_lines(files_data)))
     logger.debug(f"[perform_pr_analysis] diff 已压缩，文件数: {len(compressed_diff)}")
 
     pr_info = {
@@ -428,12 +637,21 @@ async def perform_pr_analysis(pr: PullRequest) -> dict:
         "deletions": deletions,
     }
 
-    # 并行调用两个 Agent
     try:
         ai_start = time.time()
-        score_task = pr_score_agent(compressed_diff, pr_info)
-        suggestion_task = pr_suggestion_agent(compressed_diff, pr_info)
-        score_result, suggestions = await asyncio.gather(score_task, suggestion_task)
+        chunks = plan_diff_chunks(compressed_diff)
+        if len(chunks) <= 1:
+            # 并行调用两个 Agent
+            score_task = pr_score_agent(compressed_diff, pr_info, bypass_cache=bypass_cache)
+            suggestion_task = pr_suggestion_agent(compressed_diff, pr_info, bypass_cache=bypass_cache)
+            score_result, suggestions = await asyncio.gather(score_task, suggestion_task)
+        else:
+            # 大 PR：分块并发生成建议（map），再基于汇总结果评分（reduce）
+            logger.info(f"[perform_pr_analysis] diff 超出单次预算，拆分为 {len(chunks)} 个分块分析")
+            suggestions = await _map_suggestions(chunks, pr_info, bypass_cache=bypass_cache)
+            score_digest = build_score_digest(compressed_diff, suggestions)
+            score_info = {**pr_info, "note": "PR 较大，结构化 diff 已按文件汇总为增删行数、分块评审要点和代码样例"}
+            score_result = await pr_score_agent(score_digest, score_info, bypass_cache=bypass_cache)
         ai_elapsed = time.time() - ai_start
         logger.info(f"[perform_pr_analysis] AI agent calls completed in {ai_elapsed:.2f}s")
 
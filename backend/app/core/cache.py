@@ -0,0 +1,189 @@
+"""进程内缓存组件.
+
+- LRUCache: 带容量上限与 TTL 的 LRU 缓存，统计命中/未命中/淘汰次数
+- CacheInvalidationBus: 基于 cache_invalidations 表的跨进程失效广播，
+  写入方在业务事务内登记失效记录，其他 uvicorn worker 定期拉取并清理本地缓存
+"""
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from datetime import datetime, timedelta
+from typing import Any, Protocol
+
+from app.core.logging_config import logger
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+_MISSING = object()
+
+
+class CacheBackend(Protocol):
+    """缓存后端接口，可替换为 Redis 等实现."""
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取缓存，未命中或已过期时返回 default."""
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """写入缓存."""
+
+    def delete(self, key: Hashable) -> bool:
+        """删除指定键，返回键是否存在."""
+
+    def clear(self) -> None:
+        """清空缓存."""
+
+    def stats(self) -> dict[str, Any]:
+        """返回缓存统计信息."""
+
+
+class LRUCache:
+    """容量受限、带过期时间的 LRU 缓存（非线程安全，供单个事件循环使用）."""
+
+    def __init__(self, maxsize: int = 10000, ttl: float | None = 300):
+        """初始化缓存；ttl 为空或 0 表示不过期."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        """返回当前缓存条目数（含尚未清理的过期条目）."""
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """判断键是否存在且未过期."""
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取缓存，命中时将条目移到队尾，未命中或已过期时返回 default."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at and expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """写入缓存，超过容量时淘汰最久未使用的条目."""
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0.0
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> bool:
+        """删除指定键，返回键是否存在."""
+        return self._data.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """清空缓存."""
+        self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """返回容量、命中率与淘汰次数等统计信息."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class CacheInvalidationBus:
+    """基于数据库表的跨进程缓存失效广播.
+
+    publish 与业务写操作处于同一事务，提交后对其他进程可见；
+    poll 按 poll_interval 限频拉取新的失效记录并分发给订阅的缓存。
+    """
+
+    def __init__(self, poll_interval: float = 1.0, retention_seconds: int = 3600):
+        """初始化失效总线；retention_seconds 为失效记录保留时长."""
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._handlers: dict[str, Callable[[str], None]] = {}
+        self._last_id: int | None = None
+        self._last_poll = 0.0
+        self._last_prune = 0.0
+
+    def subscribe(self, cache_name: str, handler: Callable[[str], None]) -> None:
+        """登记缓存的失效处理函数，收到该缓存的失效记录时以失效键调用."""
+        self._handlers[cache_name] = handler
+
+    async def publish(self, db: AsyncSession, cache_name: str, key: str) -> None:
+        """在当前事务中登记一条失效记录（由调用方提交）."""
+        from app.models.cache_invalidation import CacheInvalidation
+
+        db.add(CacheInvalidation(cache_name=cache_name, cache_key=key))
+        await self._prune(db)
+
+    async def publish_many(self, db: AsyncSession, cache_name: str, keys: list[str]) -> None:
+        """批量登记失效记录，一条 INSERT 写入（由调用方提交）."""
+        from app.models.cache_invalidation import CacheInvalidation
+
+        if not keys:
+            return
+        now = datetime.utcnow()
+        await db.execute(insert(CacheInvalidation), [
+            {"cache_name": cache_name, "cache_key": key, "created_at": now} for key in keys
+        ])
+        await self._prune(db)
+
+    async def _prune(self, db: AsyncSession) -> None:
+        from app.models.cache_invalidation import CacheInvalidation
+
+        # 顺带清理过期的失效记录，避免表无限增长
+        now = time.monotonic()
+        if now - self._last_prune > self.retention_seconds / 4:
+            self._last_prune = now
+            cutoff = datetime.utcnow() - timedelta(seconds=self.retention_seconds)
+            await db.execute(delete(CacheInvalidation).where(CacheInvalidation.created_at < cutoff))
+
+    async def poll(self, db: AsyncSession, force: bool = False) -> int:
+        """拉取其他进程登记的失效记录并应用到本地缓存，返回处理条数."""
+        from app.models.cache_invalidation import CacheInvalidation
+
+        now = time.monotonic()
+        if not force and now - self._last_poll < self.poll_interval:
+            return 0
+        self._last_poll = now
+
+        try:
+            if self._last_id is None:
+                # 首次拉取只记录水位，本进程启动前的失效与本地缓存无关
+                result = await db.execute(select(func.max(CacheInvalidation.id)))
+                self._last_id = result.scalar() or 0
+                return 0
+
+            result = await db.execute(
+                select(CacheInvalidation.id, CacheInvalidation.cache_name, CacheInvalidation.cache_key)
+                .where(CacheInvalidation.id > self._last_id)
+                .order_by(CacheInvalidation.id)
+            )
+            rows = result.all()
+        except Exception as e:
+            logger.warning(f"[缓存] 拉取失效记录失败: {e}")
+            return 0
+
+        for row_id, cache_name, key in rows:
+            handler = self._handlers.get(cache_name)
+            if handler is not None:
+                handler(key)
+            self._last_id = row_id
+        return len(rows)
+
+
+# 全局失效广播实例
+invalidation_bus = CacheInvalidationBus()
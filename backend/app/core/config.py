@@ -17,6 +17,11 @@ class Settings:
     GITHUB_WEBHOOK_SECRET: str  = os.getenv("GITHUB_WEBHOOK_SECRET")
     GITHUB_PRIVATE_KEY_PATH: str= os.getenv("GITHUB_PRIVATE_KEY_PATH")
     GITHUB_PAT: str             = os.getenv("GITHUB_PAT", "")
+    GITHUB_API_URL: str         = os.getenv("GITHUB_API_URL", "https://api.github.com")
+    GITHUB_CACHE_PATH: str      = os.getenv("GITHUB_CACHE_PATH", str(BACKEND_DIR / 'db' / 'github_cache.db'))
+    GITHUB_CACHE_TTL_SECONDS: int = int(os.getenv("GITHUB_CACHE_TTL_SECONDS", 7 * 24 * 3600))  # 响应缓存保留时长
+    GITHUB_CACHE_MAX_ENTRIES: int = int(os.getenv("GITHUB_CACHE_MAX_ENTRIES", 20000))  # 响应缓存最多条数
+    GITHUB_RATE_PER_SECOND: float = float(os.getenv("GITHUB_RATE_PER_SECOND", 10))  # 本地令牌桶速率
 
     DATABASE_URL = f"sqlite+aiosqlite:///{str(BACKEND_DIR / 'db' / 'perf.db')}"
 
@@ -25,6 +30,54 @@ class Settings:
     DOUBAO_MODEL: str = os.getenv("DOUBAO_MODEL", "")
     DOUBAO_API_KEY: str = os.getenv("DOUBAO_API_KEY", "")
 
+    # LLM 结果缓存
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "True").lower() == "true"
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", str(BACKEND_DIR / 'db' / 'llm_cache.db'))
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 5000))
+
+    # 大 PR 分块分析
+    LLM_CHUNK_TOKEN_BUDGET: int = int(os.getenv("LLM_CHUNK_TOKEN_BUDGET", 12000))  # 单次调用的 diff token 预算
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", 4))  # 分块并发调用上限
+
+    # AI 分析任务队列
+    ANALYSIS_WORKERS: int = int(os.getenv("ANALYSIS_WORKERS", 2))  # 每个进程的 worker 数量
+    ANALYSIS_LEASE_SECONDS: int = int(os.getenv("ANALYSIS_LEASE_SECONDS", 300))  # 任务租约时长
+    ANALYSIS_MAX_ATTEMPTS: int = int(os.getenv("ANALYSIS_MAX_ATTEMPTS", 3))  # 最大重试次数
+    ANALYSIS_POLL_INTERVAL: float = float(os.getenv("ANALYSIS_POLL_INTERVAL", 5))  # 空闲轮询间隔（秒）
+
+
+    # SSE 推送
+    SSE_QUEUE_SIZE: int = int(os.getenv("SSE_QUEUE_SIZE", 100))  # 每个连接的待发送事件上限
+    SSE_REPLAY_SIZE: int = int(os.getenv("SSE_REPLAY_SIZE", 1000))  # 断线重连补发的环形缓冲区大小
+    SSE_HEARTBEAT_SECONDS: float = float(os.getenv("SSE_HEARTBEAT_SECONDS", 30))
+
+    # 公司列表摘要缓存（秒），0 表示不过期
+    COMPANY_LIST_CACHE_TTL: float = float(os.getenv("COMPANY_LIST_CACHE_TTL", 30))
+
+    # 跨 worker 发布/订阅：memory（单进程）或 sqlite（多 worker）
+    PUBSUB_BACKEND: str = os.getenv("PUBSUB_BACKEND", "memory")
+    PUBSUB_PATH: str = os.getenv("PUBSUB_PATH", str(BACKEND_DIR / 'db' / 'pubsub.db'))
+    PUBSUB_POLL_INTERVAL: float = float(os.getenv("PUBSUB_POLL_INTERVAL", 0.5))
+
+    # 定时任务调度器：多 worker 间通过数据库租约选出唯一执行者
+    SCHEDULER_ENABLED: bool = os.getenv("SCHEDULER_ENABLED", "True").lower() == "true"
+    SCHEDULER_LEASE_SECONDS: int = int(os.getenv("SCHEDULER_LEASE_SECONDS", 60))  # 领导者租约时长
+    SCHEDULER_HISTORY_DAYS: int = int(os.getenv("SCHEDULER_HISTORY_DAYS", 30))  # 执行历史保留天数
+
+    # 商品浏览量写回：内存中按商品合并，满足任一条件即批量写入数据库
+    VIEW_COUNT_FLUSH_INTERVAL: float = float(os.getenv("VIEW_COUNT_FLUSH_INTERVAL", 5))  # 写回间隔（秒）
+    VIEW_COUNT_FLUSH_THRESHOLD: int = int(os.getenv("VIEW_COUNT_FLUSH_THRESHOLD", 1000))  # 累计浏览事件数
+
+    # 商城推荐：每个公司物化的热门候选商品数量
+    RECOMMENDATION_TOP_N: int = int(os.getenv("RECOMMENDATION_TOP_N", 200))  # 全站热门候选数
+    RECOMMENDATION_CATEGORY_TOP_N: int = int(os.getenv("RECOMMENDATION_CATEGORY_TOP_N", 20))  # 每个分类的候选数
+
+    # 通知保留策略：到期通知标记过期，已处理的旧通知移入归档表，超过保留期限后物理删除
+    NOTIFICATION_ARCHIVE_AFTER_DAYS: int = int(os.getenv("NOTIFICATION_ARCHIVE_AFTER_DAYS", 30))  # 已处理通知归档天数
+    NOTIFICATION_RETENTION_DAYS: int = int(os.getenv("NOTIFICATION_RETENTION_DAYS", 180))  # 通知及归档保留天数
+    NOTIFICATION_RETENTION_BATCH_SIZE: int = int(os.getenv("NOTIFICATION_RETENTION_BATCH_SIZE", 200))  # 每个写事务最多处理的行数
+    NOTIFICATION_RETENTION_LOCK_BUDGET_MS: float = float(os.getenv("NOTIFICATION_RETENTION_LOCK_BUDGET_MS", 5))  # 每个写事务的目标耗时（毫秒）
 
     # Email settings
     MAIL_USERNAME: str = os.getenv("MAIL_USERNAME")
@@ -0,0 +1,118 @@
+"""计数器写回缓冲.
+
+高频自增计数（如商品浏览量）不再每次请求都执行 UPDATE + COMMIT，而是先在进程内按主键合并，
+每隔 flush_interval 秒或累计 flush_threshold 次事件后用一条 UPDATE ... CASE 批量写回，
+应用关闭时写回剩余计数。多个 worker 各自缓冲，写回的都是增量，互不覆盖。
+
+写回失败时增量会合并回缓冲区，下次写回时重试；进程异常退出时最多丢失一个周期内的计数。
+"""
+import asyncio
+from collections import defaultdict
+from typing import Any
+
+from app.core.logging_config import logger
+from sqlalchemy import case, update
+from sqlalchemy.orm import InstrumentedAttribute, sessionmaker
+
+# 单条 UPDATE 中 CASE 分支的上限
+FLUSH_CHUNK_SIZE = 500
+
+
+class CounterBuffer:
+    """按主键合并的计数器写回缓冲."""
+
+    def __init__(
+        self,
+        column: InstrumentedAttribute,
+        key_column: InstrumentedAttribute,
+        flush_interval: float,
+        flush_threshold: int,
+        session_factory: sessionmaker | None = None,
+    ):
+        """初始化缓冲；计数按 key_column 合并后写回 column."""
+        self.column = column
+        self.key_column = key_column
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._session_factory = session_factory
+        self._pending: dict[Any, int] = defaultdict(int)
+        self._events = 0
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._threshold_flush: asyncio.Task | None = None
+        self.flushed_statements = 0
+
+    @property
+    def pending(self) -> dict[Any, int]:
+        """尚未写回的增量."""
+        return dict(self._pending)
+
+    def increment(self, key: Any, amount: int = 1) -> None:
+        """记录一次自增；累计事件数达到阈值时在后台触发写回."""
+        self._pending[key] += amount
+        self._events += 1
+        if self._events >= self.flush_threshold and (
+            self._threshold_flush is None or self._threshold_flush.done()
+        ):
+            self._threshold_flush = asyncio.get_running_loop().create_task(self.flush())
+
+    async def flush(self) -> int:
+        """把缓冲的增量写回数据库，返回写回的行数."""
+        async with self._lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, defaultdict(int)
+            self._events = 0
+            try:
+                await self._write(pending)
+            except Exception as e:
+                # 写回失败时合并回缓冲区，下次重试
+                for key, amount in pending.items():
+                    self._pending[key] += amount
+                logger.warning(f"[计数写回] {self.column} 写回 {len(pending)} 行失败，稍后重试: {e}")
+                return 0
+            return len(pending)
+
+    async def _write(self, pending: dict[Any, int]) -> None:
+        if self._session_factory is None:
+            from app.core.database import AsyncSessionLocal
+            self._session_factory = AsyncSessionLocal
+
+        table = self.column.class_
+        items = list(pending.items())
+        async with self._session_factory() as db:
+            for start in range(0, len(items), FLUSH_CHUNK_SIZE):
+                chunk = dict(items[start:start + FLUSH_CHUNK_SIZE])
+                await db.execute(
+                    update(table)
+                    .where(self.key_column.in_(list(chunk)))
+                    .values({self.column.key: self.column + case(chunk, value=self.key_column, else_=0)})
+                    .execution_options(synchronize_session=False)
+                )
+                self.flushed_statements += 1
+            await db.commit()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def start(self) -> None:
+        """启动后台定期写回任务."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name=f"counter-buffer-{self.column}")
+
+    async def stop(self) -> None:
+        """停止定时写回并写回剩余计数."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._threshold_flush is not None:
+            await asyncio.gather(self._threshold_flush, return_exceptions=True)
+        await self.flush()
+        if self._pending:
+            logger.error(f"[计数写回] 关闭时 {self.column} 仍有 {len(self._pending)} 行未能写回")
@@ -0,0 +1,313 @@
+"""GitHub REST API 客户端.
+
+- 条件请求：响应的 ETag 与正文持久化到 SQLite，后续请求带 If-None-Match，
+  命中 304 时直接复用缓存正文（304 不消耗 GitHub 限额）
+- 完整分页：按 Link 头的 rel="next" 逐页拉取，每页 100 条
+- 限流：令牌桶控制本地突发，并根据 X-RateLimit-Remaining/Reset 动态放缓
+- 请求合并：同一 URL 的并发请求共享一次网络往返
+- base_url 可配置，便于指向本地的 GitHub 模拟服务
+"""
+import asyncio
+import json
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlencode
+
+import httpx
+from app.core.config import settings
+from app.core.logging_config import logger
+
+USER_AGENT = "PerfPulseAI-Bot/1.0 (https://github.com/v-trace-cn/PerfPulseAI)"
+_LINK_NEXT_RE = re.compile(r'<([^>]+)>;\s*rel="next"')
+
+
+class GitHubAPIError(ValueError):
+    """GitHub API 请求失败."""
+
+    def __init__(self, status_code: int, url: str, message: str = ""):
+        """记录状态码与请求地址."""
+        self.status_code = status_code
+        self.url = url
+        super().__init__(f"GitHub API {status_code} for {url}: {message}")
+
+
+class ResponseCache:
+    """基于 SQLite 文件的 ETag 响应缓存.
+
+    写入时清理超过 ttl_seconds 未刷新的条目，并在超过 max_entries 时删除最早写入的条目。
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        ttl_seconds: int | None = None,
+        max_entries: int | None = None,
+    ):
+        """初始化缓存；未指定的参数取自配置."""
+        self.path = Path(path or settings.GITHUB_CACHE_PATH)
+        self.ttl_seconds = settings.GITHUB_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = settings.GITHUB_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS github_responses ("
+                " url TEXT PRIMARY KEY, etag TEXT, link TEXT, body TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_github_responses_fetched ON github_responses (fetched_at)")
+            self._initialized = True
+        return conn
+
+    def _get(self, url: str) -> tuple[str, str | None, str] | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT etag, link, body FROM github_responses WHERE url = ?", (url,)
+            ).fetchone()
+        return row
+
+    def _put(self, url: str, etag: str, link: str | None, body: str) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO github_responses (url, etag, link, body, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (url, etag, link, body, now),
+            )
+            if self.ttl_seconds:
+                conn.execute("DELETE FROM github_responses WHERE fetched_at < ?", (now - self.ttl_seconds,))
+            if self.max_entries:
+                (count,) = conn.execute("SELECT COUNT(*) FROM github_responses").fetchone()
+                if count > self.max_entries:
+                    conn.execute(
+                        "DELETE FROM github_responses WHERE url IN ("
+                        " SELECT url FROM github_responses ORDER BY fetched_at ASC LIMIT ?)",
+                        (count - self.max_entries,),
+                    )
+
+    async def get(self, url: str) -> tuple[str, str | None, str] | None:
+        """返回 (etag, link, body)；未缓存时返回 None."""
+        try:
+            return await asyncio.to_thread(self._get, url)
+        except sqlite3.Error as e:
+            logger.warning(f"[GitHub] 读取响应缓存失败: {e}")
+            return None
+
+    async def put(self, url: str, etag: str, link: str | None, body: str) -> None:
+        """写入响应缓存；写入失败只记录日志."""
+        try:
+            await asyncio.to_thread(self._put, url, etag, link, body)
+        except sqlite3.Error as e:
+            logger.warning(f"[GitHub] 写入响应缓存失败: {e}")
+
+
+class RateLimiter:
+    """令牌桶 + GitHub 限额感知.
+
+    平时按 rate/capacity 限制突发；当剩余限额低于 reserve 时，
+    把剩余额度平摊到重置时间之前，额度耗尽则等待到重置时刻。
+    """
+
+    def __init__(self, rate: float | None = None, capacity: int = 20, reserve: int = 50, max_wait: float = 60.0):
+        """初始化限流器；rate 为每秒令牌数，capacity 为允许的突发请求数."""
+        self.rate = rate or settings.GITHUB_RATE_PER_SECOND
+        self.capacity = capacity
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._remaining: int | None = None
+        self._reset_at: float | None = None  # epoch 秒
+        self._lock = asyncio.Lock()
+
+    def update(self, headers: httpx.Headers) -> None:
+        """根据响应头更新剩余额度."""
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is not None:
+            try:
+                self._remaining = int(remaining)
+            except ValueError:
+                pass
+        if reset is not None:
+            try:
+                self._reset_at = float(reset)
+            except ValueError:
+                pass
+
+    def _current_rate(self) -> float:
+        if self._remaining is None or self._reset_at is None or self._remaining > self.reserve:
+            return self.rate
+        window = max(1.0, self._reset_at - time.time())
+        return min(self.rate, max(self._remaining, 0) / window)
+
+    async def acquire(self) -> None:
+        """获取一个请求令牌，必要时等待."""
+        async with self._lock:
+            if self._remaining is not None and self._remaining <= 0 and self._reset_at:
+                wait = min(self.max_wait, max(0.0, self._reset_at - time.time()))
+                if wait > 0:
+                    logger.warning(f"[GitHub] 限额已耗尽，等待 {wait:.1f}s 至重置")
+                    await asyncio.sleep(wait)
+                    self._remaining = None
+
+            rate = self._current_rate()
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * rate)
+            self._updated = now
+            if self._tokens < 1:
+                wait = min(self.max_wait, (1 - self._tokens) / rate) if rate > 0 else self.max_wait
+                await asyncio.sleep(wait)
+                self._tokens = 1.0
+                self._updated = time.monotonic()
+            self._tokens -= 1
+
+
+class GitHubClient:
+    """带缓存、分页、限流与请求合并的 GitHub 客户端."""
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        token: str | None = None,
+        cache: ResponseCache | None = None,
+        rate_limiter: RateLimiter | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        timeout: float = 30.0,
+    ):
+        """初始化客户端；未指定的参数取自配置."""
+        self.base_url = (base_url or settings.GITHUB_API_URL).rstrip("/")
+        self.token = settings.GITHUB_PAT if token is None else token
+        self.cache = cache or ResponseCache()
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self._client = httpx.AsyncClient(transport=transport, timeout=timeout, follow_redirects=True, verify=False)
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.stats = {"requests": 0, "not_modified": 0, "coalesced": 0}
+
+    def _headers(self) -> dict[str, str]:
+        headers = {
+            "User-Agent": USER_AGENT,
+            "Accept": "application/vnd.github.v3+json",
+        }
+        if self.token:
+            headers["Authorization"] = f"token {self.token}"
+        return headers
+
+    def _url(self, path: str, params: dict[str, Any] | None = None) -> str:
+        url = path if path.startswith("http") else f"{self.base_url}/{path.lstrip('/')}"
+        if params:
+            url = f"{url}{'&' if '?' in url else '?'}{urlencode(sorted(params.items()))}"
+        return url
+
+    async def _coalesced(self, url: str, fetch):
+        """同一 URL 的并发请求只发出一次."""
+        pending = self._inflight.get(url)
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[url] = future
+        try:
+            result = await fetch(url)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # 没有其他等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(url, None)
+
+    async def _fetch_page(self, url: str) -> tuple[Any, str | None]:
+        """请求单个 URL，返回 (json 数据, 下一页 URL)."""
+        headers = self._headers()
+        cached = await self.cache.get(url)
+        if cached:
+            headers["If-None-Match"] = cached[0]
+
+        await self.rate_limiter.acquire()
+        self.stats["requests"] += 1
+        response = await self._client.get(url, headers=headers)
+        self.rate_limiter.update(response.headers)
+
+        if response.status_code == 304 and cached:
+            self.stats["not_modified"] += 1
+            _, link, body = cached
+        elif response.is_success:
+            body = response.text
+            link = response.headers.get("Link")
+            etag = response.headers.get("ETag")
+            if etag:
+                await self.cache.put(url, etag, link, body)
+        else:
+            raise GitHubAPIError(response.status_code, url, response.text[:200])
+
+        next_match = _LINK_NEXT_RE.search(link or "")
+        return json.loads(body), (next_match.group(1) if next_match else None)
+
+    async def get_json(self, path: str, params: dict[str, Any] | None = None) -> Any:
+        """请求单个 JSON 资源，相同地址的并发请求会被合并."""
+        url = self._url(path, params)
+
+        async def fetch(u):
+            data, _ = await self._fetch_page(u)
+            return data
+
+        return await self._coalesced(url, fetch)
+
+    async def get_paginated(self, path: str, params: dict[str, Any] | None = None, max_pages: int = 100) -> list:
+        """按 Link 头拉取全部分页并合并为列表."""
+        url = self._url(path, {"per_page": 100, **(params or {})})
+
+        async def fetch(u):
+            items: list = []
+            next_url: str | None = u
+            for _ in range(max_pages):
+                if not next_url:
+                    break
+                data, next_url = await self._fetch_page(next_url)
+                if not isinstance(data, list):
+                    raise GitHubAPIError(200, u, "expected a list response")
+                items.extend(data)
+            return items
+
+        return await self._coalesced(url, fetch)
+
+    async def get_pull_request(self, repository: str, pr_number: int) -> dict:
+        """获取 PR 详情."""
+        return await self.get_json(f"/repos/{repository}/pulls/{pr_number}")
+
+    async def list_pull_request_files(self, repository: str, pr_number: int) -> list[dict]:
+        """获取 PR 的全部变更文件."""
+        return await self.get_paginated(f"/repos/{repository}/pulls/{pr_number}/files")
+
+    async def aclose(self) -> None:
+        """关闭底层 HTTP 连接."""
+        await self._client.aclose()
+
+
+_github_client: GitHubClient | None = None
+
+
+def get_github_client() -> GitHubClient:
+    """获取或创建全局 GitHubClient 实例."""
+    global _github_client
+    if _github_client is None:
+        _github_client = GitHubClient()
+    return _github_client
+
+
+async def close_github_client() -> None:
+    """关闭全局 GitHubClient 的连接池."""
+    global _github_client
+    if _github_client is not None:
+        await _github_client.aclose()
+        _github_client = None
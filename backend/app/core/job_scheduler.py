@@ -0,0 +1,453 @@
+"""定时任务调度器.
+
+- cron 表达式（分 时 日 月 周，UTC）计算下一次触发时间；tick 漂移或进程短暂停顿时
+  只要越过触发点就会执行，停机期间错过的多次触发合并为一次
+- 领导者租约：多个 uvicorn worker 通过 scheduler_leases 表竞争同一租约，
+  只有持有者执行任务；持有者退出或崩溃后，租约到期由其他 worker 接管
+- 每个任务独立运行：耗时任务不会阻塞其他任务的触发；同一任务上一次尚未结束时跳过本次
+- 支持随机延迟启动（jitter）与单次执行超时
+- run_in_thread=True 的重任务在独立线程的事件循环中执行（使用独立的数据库引擎），
+  不占用处理请求的事件循环；这类任务不得读写进程内缓存等仅限主事件循环使用的全局状态
+- 执行历史写入 scheduler_runs 表，供管理接口查询
+"""
+import asyncio
+import json
+import os
+import random
+import socket
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from typing import Any
+from uuid import uuid4
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.logging_config import logger
+from app.models.scheduler_run import SchedulerLease, SchedulerRun, SchedulerRunStatus
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+# 任务函数：接收会话工厂，返回写入执行历史的摘要（可选）
+JobFunc = Callable[[sessionmaker], Awaitable[dict[str, Any] | None]]
+
+# 执行历史中摘要与错误信息的最大长度
+MAX_SUMMARY_LENGTH = 2000
+
+
+class CronSpec:
+    """5 字段 cron 表达式：分 时 日 月 周（周日为 0 或 7）.
+
+    每个字段支持 *、*/n、a-b、a-b/n 以及逗号分隔的列表。
+    """
+
+    FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+    def __init__(self, expr: str):
+        """解析 5 字段 cron 表达式，格式错误时抛出 ValueError."""
+        parts = expr.split()
+        if len(parts) != 5:
+            raise ValueError(f"cron 表达式需要 5 个字段: {expr!r}")
+        self.expr = expr
+        fields = []
+        for part, (low, high) in zip(parts, self.FIELD_RANGES):
+            fields.append(self._parse_field(part, low, high, allow_seven=(high == 6)))
+        self.minutes, self.hours, self.days, self.months, self.weekdays = fields
+        # 与标准 cron 一致：日与周同时受限时满足其一即可
+        self._day_restricted = parts[2] != "*"
+        self._weekday_restricted = parts[4] != "*"
+
+    @staticmethod
+    def _parse_field(part: str, low: int, high: int, allow_seven: bool = False) -> frozenset[int]:
+        values: set[int] = set()
+        for item in part.split(","):
+            step = 1
+            if "/" in item:
+                item, step_str = item.split("/", 1)
+                step = int(step_str)
+                if step <= 0:
+                    raise ValueError(f"cron 步长必须为正数: {part!r}")
+            if item == "*":
+                start, end = low, high
+            elif "-" in item:
+                start_str, end_str = item.split("-", 1)
+                start, end = int(start_str), int(end_str)
+            else:
+                start = int(item)
+                end = high if step > 1 else start
+            upper = 7 if allow_seven else high
+            if start < low or end > upper or start > end:
+                raise ValueError(f"cron 字段超出范围: {part!r}")
+            values.update(7 % 7 if v == 7 else v for v in range(start, end + 1, step))
+        return frozenset(values)
+
+    def _day_matches(self, dt: datetime) -> bool:
+        day_ok = dt.day in self.days
+        # datetime.weekday(): 周一为 0；cron: 周日为 0
+        weekday_ok = (dt.weekday() + 1) % 7 in self.weekdays
+        if self._day_restricted and self._weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, dt: datetime) -> datetime:
+        """返回严格晚于 dt 的下一个触发时间（分钟精度）."""
+        candidate = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = (candidate.year + 1, 1) if candidate.month == 12 else (candidate.year, candidate.month + 1)
+                candidate = candidate.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError(f"cron 表达式没有可触发的时间: {self.expr!r}")
+
+
+class ScheduledJob:
+    """已注册的定时任务."""
+
+    __slots__ = ("name", "cron", "func", "timeout", "jitter", "run_in_thread", "next_run_at", "task")
+
+    def __init__(self, name: str, cron: CronSpec, func: JobFunc, timeout: float, jitter: float, run_in_thread: bool):
+        """初始化任务定义."""
+        self.name = name
+        self.cron = cron
+        self.func = func
+        self.timeout = timeout
+        self.jitter = jitter
+        self.run_in_thread = run_in_thread
+        self.next_run_at: datetime | None = None
+        self.task: asyncio.Task | None = None
+
+    @property
+    def is_running(self) -> bool:
+        """任务当前是否正在执行."""
+        return self.task is not None and not self.task.done()
+
+
+def _run_in_own_loop(func: JobFunc, timeout: float) -> dict[str, Any] | None:
+    """在当前线程新建事件循环与数据库引擎执行任务（由 asyncio.to_thread 调用）."""
+    async def runner():
+        database_url = settings.DATABASE_URL
+        engine = create_async_engine(
+            database_url,
+            poolclass=NullPool,
+            connect_args={"check_same_thread": False} if database_url.startswith("sqlite") else {},
+        )
+        try:
+            session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+            return await asyncio.wait_for(func(session_factory), timeout=timeout)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(runner())
+
+
+def _truncate(text: str | None) -> str | None:
+    if text is None or len(text) <= MAX_SUMMARY_LENGTH:
+        return text
+    return text[:MAX_SUMMARY_LENGTH] + "..."
+
+
+class JobScheduler:
+    """带领导者租约的 cron 任务调度器."""
+
+    def __init__(
+        self,
+        lease_name: str = "default",
+        lease_seconds: int | None = None,
+        history_days: int | None = None,
+    ):
+        """初始化调度器；未指定的参数取自配置."""
+        self.lease_name = lease_name
+        self.lease_seconds = lease_seconds or settings.SCHEDULER_LEASE_SECONDS
+        self.history_days = history_days or settings.SCHEDULER_HISTORY_DAYS
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.is_leader = False
+        self._jobs: dict[str, ScheduledJob] = {}
+        self._task: asyncio.Task | None = None
+        self._last_prune = 0.0
+
+    def register(
+        self,
+        name: str,
+        cron: str,
+        func: JobFunc,
+        timeout: float = 600,
+        jitter: float = 0,
+        run_in_thread: bool = False,
+    ) -> ScheduledJob:
+        """注册定时任务；同名任务会被替换."""
+        job = ScheduledJob(name, CronSpec(cron), func, timeout, jitter, run_in_thread)
+        self._jobs[name] = job
+        return job
+
+    @property
+    def jobs(self) -> list[ScheduledJob]:
+        """已注册的全部任务."""
+        return list(self._jobs.values())
+
+    async def start(self) -> None:
+        """计算各任务的下次执行时间并启动调度循环."""
+        if self._task is not None:
+            return
+        now = datetime.utcnow()
+        for job in self._jobs.values():
+            job.next_run_at = job.cron.next_after(now)
+        self._task = asyncio.create_task(self._run(), name="job-scheduler")
+        logger.info(f"[调度器] 已启动，任务数: {len(self._jobs)}，标识: {self.owner}")
+
+    async def stop(self) -> None:
+        """停止调度循环并取消执行中的任务，持有租约时释放租约."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        running = [job.task for job in self._jobs.values() if job.is_running]
+        for task in running:
+            task.cancel()
+        await asyncio.gather(self._task, *running, return_exceptions=True)
+        self._task = None
+        if self.is_leader:
+            await self._release_lease()
+        logger.info("[调度器] 已停止")
+
+    async def _run(self) -> None:
+        renew_interval = max(1.0, self.lease_seconds / 3)
+        while True:
+            try:
+                self.is_leader = await self._acquire_lease()
+            except SQLAlchemyError as e:
+                logger.warning(f"[调度器] 续租失败: {e}")
+                self.is_leader = False
+
+            now = datetime.utcnow()
+            for job in self._jobs.values():
+                if job.next_run_at is None or now < job.next_run_at:
+                    continue
+                scheduled_at = job.next_run_at
+                # 从当前时间推算下一次触发，停机期间错过的多次触发只执行一次
+                job.next_run_at = job.cron.next_after(now)
+                if self.is_leader:
+                    await self._launch(job, scheduled_at)
+
+            next_due = min((job.next_run_at for job in self._jobs.values() if job.next_run_at), default=None)
+            sleep_for = renew_interval
+            if next_due is not None:
+                sleep_for = min(sleep_for, max(0.0, (next_due - datetime.utcnow()).total_seconds()))
+            await asyncio.sleep(sleep_for)
+
+    async def _acquire_lease(self) -> bool:
+        """获取或续期领导者租约."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(SchedulerLease)
+                .where(
+                    SchedulerLease.name == self.lease_name,
+                    or_(SchedulerLease.owner == self.owner, SchedulerLease.expires_at < now),
+                )
+                .values(owner=self.owner, expires_at=expires_at)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 1:
+                await db.commit()
+                if not self.is_leader:
+                    logger.info(f"[调度器] 成为领导者: {self.owner}")
+                return True
+
+            exists = await db.scalar(select(func.count()).where(SchedulerLease.name == self.lease_name))
+            if exists:
+                return False
+            db.add(SchedulerLease(name=self.lease_name, owner=self.owner, expires_at=expires_at, acquired_at=now))
+            try:
+                await db.commit()
+            except IntegrityError:
+                # 其他 worker 同时创建了租约
+                await db.rollback()
+                return False
+            logger.info(f"[调度器] 成为领导者: {self.owner}")
+            return True
+
+    async def _release_lease(self) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(SchedulerLease)
+                    .where(SchedulerLease.name == self.lease_name, SchedulerLease.owner == self.owner)
+                    .values(expires_at=datetime.utcnow())
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+        except SQLAlchemyError as e:
+            logger.warning(f"[调度器] 释放租约失败: {e}")
+        self.is_leader = False
+
+    async def _launch(self, job: ScheduledJob, scheduled_at: datetime) -> None:
+        if job.is_running:
+            logger.warning(f"[调度器] 任务 {job.name} 上一次执行尚未结束，跳过本次触发")
+            await self._record_skipped(job, scheduled_at)
+            return
+        job.task = asyncio.create_task(self._execute(job, scheduled_at), name=f"job-{job.name}")
+
+    async def run_now(self, name: str) -> asyncio.Task:
+        """立即触发一次任务（不受领导者租约限制）."""
+        job = self._jobs.get(name)
+        if job is None:
+            raise KeyError(name)
+        if job.is_running:
+            raise RuntimeError(f"任务 {name} 正在执行")
+        job.task = asyncio.create_task(self._execute(job, datetime.utcnow(), use_jitter=False), name=f"job-{name}")
+        return job.task
+
+    async def _execute(self, job: ScheduledJob, scheduled_at: datetime, use_jitter: bool = True) -> None:
+        if use_jitter and job.jitter:
+            # 随机延迟，避免多个任务/多个部署在整点同时启动
+            await asyncio.sleep(random.uniform(0, job.jitter))
+
+        run_id = await self._record_start(job, scheduled_at)
+        start = time.perf_counter()
+        status, error, summary = SchedulerRunStatus.SUCCESS, None, None
+        try:
+            if job.run_in_thread:
+                result = await asyncio.to_thread(_run_in_own_loop, job.func, job.timeout)
+            else:
+                result = await asyncio.wait_for(job.func(AsyncSessionLocal), timeout=job.timeout)
+            if result is not None:
+                summary = json.dumps(result, ensure_ascii=False, default=str)
+        except TimeoutError:
+            status, error = SchedulerRunStatus.TIMEOUT, f"超过 {job.timeout}s 未完成"
+            logger.error(f"[调度器] 任务 {job.name} 超时（{job.timeout}s）")
+        except asyncio.CancelledError:
+            await self._record_finish(run_id, SchedulerRunStatus.FAILED, start, "调度器停止，任务被取消", None)
+            raise
+        except Exception as e:
+            status, error = SchedulerRunStatus.FAILED, f"{type(e).__name__}: {e}"
+            logger.error(f"[调度器] 任务 {job.name} 执行失败: {e}")
+
+        await self._record_finish(run_id, status, start, error, summary)
+        logger.info(f"[调度器] 任务 {job.name} 结束: {status.value}，耗时 {time.perf_counter() - start:.2f}s")
+
+    async def _record_start(self, job: ScheduledJob, scheduled_at: datetime) -> int | None:
+        try:
+            async with AsyncSessionLocal() as db:
+                run = SchedulerRun(
+                    job_name=job.name,
+                    owner=self.owner,
+                    status=SchedulerRunStatus.RUNNING.value,
+                    scheduled_at=scheduled_at,
+                    started_at=datetime.utcnow().replace(microsecond=0),
+                )
+                db.add(run)
+                await self._prune_history(db)
+                await db.commit()
+                return run.id
+        except SQLAlchemyError as e:
+            logger.warning(f"[调度器] 记录任务 {job.name} 执行历史失败: {e}")
+            return None
+
+    async def _record_finish(
+        self,
+        run_id: int | None,
+        status: SchedulerRunStatus,
+        start: float,
+        error: str | None,
+        summary: str | None,
+    ) -> None:
+        if run_id is None:
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(SchedulerRun)
+                    .where(SchedulerRun.id == run_id)
+                    .values(
+                        status=status.value,
+                        finished_at=datetime.utcnow().replace(microsecond=0),
+                        duration_ms=int((time.perf_counter() - start) * 1000),
+                        error=_truncate(error),
+                        summary=_truncate(summary),
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+        except SQLAlchemyError as e:
+            logger.warning(f"[调度器] 更新执行历史 {run_id} 失败: {e}")
+
+    async def _record_skipped(self, job: ScheduledJob, scheduled_at: datetime) -> None:
+        now = datetime.utcnow().replace(microsecond=0)
+        try:
+            async with AsyncSessionLocal() as db:
+                db.add(SchedulerRun(
+                    job_name=job.name,
+                    owner=self.owner,
+                    status=SchedulerRunStatus.SKIPPED.value,
+                    scheduled_at=scheduled_at,
+                    started_at=now,
+                    finished_at=now,
+                    duration_ms=0,
+                    error="上一次执行尚未结束",
+                ))
+                await db.commit()
+        except SQLAlchemyError as e:
+            logger.warning(f"[调度器] 记录任务 {job.name} 跳过失败: {e}")
+
+    async def _prune_history(self, db: AsyncSession) -> None:
+        now = time.monotonic()
+        if now - self._last_prune < 3600:
+            return
+        self._last_prune = now
+        cutoff = datetime.utcnow() - timedelta(days=self.history_days)
+        await db.execute(delete(SchedulerRun).where(SchedulerRun.started_at < cutoff))
+
+    async def describe(self, db: AsyncSession) -> dict[str, Any]:
+        """任务列表及各任务最近一次执行情况."""
+        latest_ids = (
+            select(func.max(SchedulerRun.id))
+            .where(SchedulerRun.status != SchedulerRunStatus.SKIPPED.value)
+            .group_by(SchedulerRun.job_name)
+        )
+        latest = {
+            run.job_name: run
+            for run in (await db.execute(select(SchedulerRun).where(SchedulerRun.id.in_(latest_ids)))).scalars()
+        }
+        lease = await db.get(SchedulerLease, self.lease_name)
+
+        jobs = []
+        for job in self._jobs.values():
+            last_run = latest.get(job.name)
+            jobs.append({
+                "name": job.name,
+                "cron": job.cron.expr,
+                "timeoutSeconds": job.timeout,
+                "jitterSeconds": job.jitter,
+                "runInThread": job.run_in_thread,
+                "running": job.is_running,
+                "nextRunAt": job.next_run_at.isoformat() if job.next_run_at else None,
+                "lastRun": last_run.to_dict() if last_run else None,
+            })
+        return {
+            "owner": self.owner,
+            "isLeader": self.is_leader,
+            "started": self._task is not None,
+            "lease": {
+                "owner": lease.owner,
+                "expiresAt": lease.expires_at.isoformat(),
+            } if lease else None,
+            "jobs": jobs,
+        }
+
+
+# 全局调度器实例
+job_scheduler = JobScheduler()
@@ -0,0 +1,205 @@
+"""LLM 结果缓存.
+
+以 (agent, 模型, 提示词版本, 压缩后 diff 的哈希, PR 信息子集) 作为内容寻址的键，
+缓存 pr_score_agent / pr_suggestion_agent 的结果。diff 未变化的重新分析
+（手动触发、reopened、无实质变更的 synchronize）直接复用结果，不再调用 LLM。
+
+结果持久化在独立的 SQLite 文件中，多进程共享；支持 TTL、条目上限（按最近使用淘汰）、
+命中统计，以及管理员强制重新分析时的 bypass。
+"""
+import asyncio
+import hashlib
+import json
+import sqlite3
+import time
+from collections.abc import Callable
+from functools import wraps
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+from app.core.logging_config import logger
+
+# 参与缓存键计算的 PR 信息字段；pr_number、diff_url 等标识字段不影响分析结果
+PR_INFO_KEY_FIELDS = ("title", "description", "repository", "additions", "deletions")
+
+
+class LLMResultCache:
+    """基于 SQLite 文件的 LLM 结果缓存."""
+
+    def __init__(
+        self,
+        path: str | None = None,
+        ttl_seconds: int | None = None,
+        max_entries: int | None = None,
+        enabled: bool | None = None,
+    ):
+        """初始化缓存；未指定的参数取自配置."""
+        self.path = Path(path or settings.LLM_CACHE_PATH)
+        self.ttl_seconds = settings.LLM_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = settings.LLM_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.enabled = settings.LLM_CACHE_ENABLED if enabled is None else enabled
+        self._initialized = False
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+        self.bypasses: dict[str, int] = {}
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(agent: str, model: str, prompt_version: str, structured_diff: Any, pr_info: dict) -> str:
+        """根据 agent、模型、提示词版本与输入内容生成缓存键."""
+        diff_hash = hashlib.sha256(
+            json.dumps(structured_diff, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        info = {k: pr_info.get(k) for k in PR_INFO_KEY_FIELDS}
+        raw = json.dumps([agent, model, prompt_version, diff_hash, info], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_results ("
+                " key TEXT PRIMARY KEY, agent TEXT NOT NULL, value TEXT NOT NULL,"
+                " created_at REAL NOT NULL, last_used_at REAL NOT NULL, hit_count INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_results_last_used ON llm_results (last_used_at)")
+            self._initialized = True
+        return conn
+
+    def _get(self, key: str) -> str | None:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, created_at FROM llm_results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl_seconds and created_at + self.ttl_seconds < now:
+                conn.execute("DELETE FROM llm_results WHERE key = ?", (key,))
+                return None
+            conn.execute(
+                "UPDATE llm_results SET last_used_at = ?, hit_count = hit_count + 1 WHERE key = ?",
+                (now, key),
+            )
+            return value
+
+    def _put(self, key: str, agent: str, value: str) -> int:
+        now = time.time()
+        evicted = 0
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_results (key, agent, value, created_at, last_used_at, hit_count)"
+                " VALUES (?, ?, ?, ?, ?, 0)",
+                (key, agent, value, now, now),
+            )
+            if self.ttl_seconds:
+                evicted += conn.execute(
+                    "DELETE FROM llm_results WHERE created_at < ?", (now - self.ttl_seconds,)
+                ).rowcount
+            if self.max_entries:
+                (count,) = conn.execute("SELECT COUNT(*) FROM llm_results").fetchone()
+                if count > self.max_entries:
+                    evicted += conn.execute(
+                        "DELETE FROM llm_results WHERE key IN ("
+                        " SELECT key FROM llm_results ORDER BY last_used_at ASC LIMIT ?)",
+                        (count - self.max_entries,),
+                    ).rowcount
+        return evicted
+
+    def _clear(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM llm_results").rowcount
+
+    def _size(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM llm_results").fetchone()[0]
+
+    async def get(self, key: str) -> Any | None:
+        """读取缓存结果，未命中或读取失败时返回 None."""
+        try:
+            value = await asyncio.to_thread(self._get, key)
+        except sqlite3.Error as e:
+            logger.warning(f"[LLM缓存] 读取失败: {e}")
+            return None
+        return json.loads(value) if value is not None else None
+
+    async def put(self, key: str, agent: str, value: Any) -> None:
+        """写入缓存结果；写入失败只记录日志."""
+        try:
+            self.evictions += await asyncio.to_thread(
+                self._put, key, agent, json.dumps(value, ensure_ascii=False)
+            )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"[LLM缓存] 写入失败: {e}")
+
+    async def clear(self) -> int:
+        """清空缓存，返回删除的条目数."""
+        return await asyncio.to_thread(self._clear)
+
+    async def stats(self) -> dict[str, Any]:
+        """返回缓存条目数与各 agent 的命中统计."""
+        try:
+            size = await asyncio.to_thread(self._size)
+        except sqlite3.Error:
+            size = None
+        agents = sorted(set(self.hits) | set(self.misses) | set(self.bypasses))
+        per_agent = {}
+        for agent in agents:
+            hits, misses = self.hits.get(agent, 0), self.misses.get(agent, 0)
+            per_agent[agent] = {
+                "hits": hits,
+                "misses": misses,
+                "bypasses": self.bypasses.get(agent, 0),
+                "hitRate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            }
+        return {
+            "enabled": self.enabled,
+            "size": size,
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "evictions": self.evictions,
+            "agents": per_agent,
+        }
+
+    def cached_agent(
+        self,
+        agent: str,
+        model: str,
+        prompt_version: str,
+        should_cache: Callable[[Any], bool] = bool,
+    ):
+        """为 agent(structured_diff, pr_info) 协程加上结果缓存.
+
+        被装饰的函数额外接受 bypass_cache 关键字参数：为 True 时跳过读取，
+        但仍会用新结果刷新缓存。should_cache 返回 False 的结果（如解析失败）不缓存。
+        """
+        def decorator(func):
+            @wraps(func)
+            async def wrapper(structured_diff, pr_info, *, bypass_cache: bool = False):
+                if not self.enabled:
+                    return await func(structured_diff, pr_info)
+
+                key = self.make_key(agent, model, prompt_version, structured_diff, pr_info)
+                if bypass_cache:
+                    self.bypasses[agent] = self.bypasses.get(agent, 0) + 1
+                else:
+                    cached = await self.get(key)
+                    if cached is not None:
+                        self.hits[agent] = self.hits.get(agent, 0) + 1
+                        logger.info(f"[LLM缓存] {agent} 命中缓存 key={key[:12]}")
+                        return cached
+                    self.misses[agent] = self.misses.get(agent, 0) + 1
+
+                result = await func(structured_diff, pr_info)
+                if should_cache(result):
+                    await self.put(key, agent, result)
+                return result
+            return wrapper
+        return decorator
+
+
+# 全局 LLM 结果缓存实例
+llm_result_cache = LLMResultCache()
@@ -0,0 +1,191 @@
+"""跨进程发布/订阅.
+
+SSE 连接只存在于接受该连接的 uvicorn worker 内，事件需要广播到所有 worker 才能送达。
+
+- InProcessPubSub: 默认实现，只在当前进程内分发（单 worker 部署）
+- SQLitePubSub: 多 worker 部署的本地实现。发布时立即分发给本进程订阅者，并写入共享的
+  SQLite 文件；每个 worker 只有一个后台任务按 poll_interval 拉取其他 worker 发布的消息，
+  与 SSE 连接数无关
+
+通过 PUBSUB_BACKEND=memory|sqlite 选择实现。
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import uuid
+from collections.abc import Callable
+from pathlib import Path
+from typing import Protocol
+
+from app.core.config import settings
+from app.core.logging_config import logger
+
+Handler = Callable[[dict], None]
+
+
+class PubSubBackend(Protocol):
+    """发布/订阅后端接口，可替换为 Redis 等实现."""
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        """订阅频道."""
+
+    def publish(self, channel: str, message: dict) -> None:
+        """向频道发布消息."""
+
+    async def start(self) -> None:
+        """启动后端."""
+
+    async def stop(self) -> None:
+        """停止后端."""
+
+
+class InProcessPubSub:
+    """进程内发布/订阅."""
+
+    def __init__(self):
+        """初始化订阅表."""
+        self._handlers: dict[str, list[Handler]] = {}
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        """订阅频道，同一频道可注册多个处理函数."""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def _dispatch(self, channel: str, message: dict) -> None:
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(message)
+            except Exception as e:
+                logger.error(f"[PubSub] 处理频道 {channel} 的消息失败: {e}")
+
+    def publish(self, channel: str, message: dict) -> None:
+        """向本进程的订阅者分发消息."""
+        self._dispatch(channel, message)
+
+    async def start(self) -> None:
+        """进程内实现无需启动."""
+        return None
+
+    async def stop(self) -> None:
+        """进程内实现无需停止."""
+        return None
+
+
+class SQLitePubSub(InProcessPubSub):
+    """基于共享 SQLite 文件的多进程发布/订阅."""
+
+    def __init__(self, path: str | None = None, poll_interval: float | None = None, retention_seconds: int = 300):
+        """初始化后端；未指定的参数取自配置."""
+        super().__init__()
+        self.path = Path(path or settings.PUBSUB_PATH)
+        self.poll_interval = poll_interval or settings.PUBSUB_POLL_INTERVAL
+        self.retention_seconds = retention_seconds
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._outbox: list[tuple[str, str]] = []
+        self._last_id: int | None = None
+        self._last_prune = 0.0
+        self._task: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pubsub_messages ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, origin TEXT NOT NULL,"
+                " payload TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._initialized = True
+        return conn
+
+    def publish(self, channel: str, message: dict) -> None:
+        """发布消息：本进程订阅者立即收到，其他进程由后台任务同步."""
+        # 本进程的订阅者立即收到，其他进程经由后台任务写入后拉取
+        self._dispatch(channel, message)
+        self._outbox.append((channel, json.dumps(message, ensure_ascii=False)))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _sync(self, outbox: list[tuple[str, str]]) -> list[tuple[int, str, str]]:
+        """写出待发布消息并拉取其他进程的新消息（在线程中执行）."""
+        now = time.time()
+        with self._connect() as conn:
+            if self._last_id is None:
+                # 首次同步只记录水位，启动前的消息无需补发
+                self._last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM pubsub_messages").fetchone()[0]
+            if outbox:
+                conn.executemany(
+                    "INSERT INTO pubsub_messages (channel, origin, payload, created_at) VALUES (?, ?, ?, ?)",
+                    [(channel, self.origin, payload, now) for channel, payload in outbox],
+                )
+            rows = conn.execute(
+                "SELECT id, channel, origin, payload FROM pubsub_messages WHERE id > ? ORDER BY id",
+                (self._last_id,),
+            ).fetchall()
+            if now - self._last_prune > self.retention_seconds:
+                self._last_prune = now
+                conn.execute("DELETE FROM pubsub_messages WHERE created_at < ?", (now - self.retention_seconds,))
+        if rows:
+            self._last_id = rows[-1][0]
+        return [(row_id, channel, payload) for row_id, channel, origin, payload in rows if origin != self.origin]
+
+    async def _run(self) -> None:
+        while True:
+            outbox, self._outbox = self._outbox, []
+            try:
+                rows = await asyncio.to_thread(self._sync, outbox)
+            except sqlite3.Error as e:
+                logger.warning(f"[PubSub] 同步消息失败: {e}")
+                self._outbox[:0] = outbox
+                rows = []
+            for _, channel, payload in rows:
+                self._dispatch(channel, json.loads(payload))
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except TimeoutError:
+                pass
+
+    async def start(self) -> None:
+        """启动后台同步任务."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"[PubSub] SQLite 发布/订阅已启动: {self.path}")
+
+    async def stop(self) -> None:
+        """停止后台同步任务，并尽量写出尚未发送的消息."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            # 尽量送出尚未写入的消息
+            if self._outbox:
+                outbox, self._outbox = self._outbox, []
+                try:
+                    await asyncio.to_thread(self._sync, outbox)
+                except sqlite3.Error as e:
+                    logger.warning(f"[PubSub] 关闭时写出消息失败: {e}")
+
+
+def create_pubsub(backend: str | None = None) -> PubSubBackend:
+    """根据配置创建发布/订阅后端."""
+    backend = (backend or settings.PUBSUB_BACKEND).lower()
+    if backend == "sqlite":
+        return SQLitePubSub()
+    if backend != "memory":
+        logger.warning(f"[PubSub] 未知的 PUBSUB_BACKEND={backend}，使用进程内实现")
+    return InProcessPubSub()
+
+
+# 全局发布/订阅实例
+pubsub: PubSubBackend = create_pubsub()
@@ -1,105 +1,457 @@
-from datetime import datetime
+"""AI 分析任务队列与工作池.
+
+Webhook 只负责把「PR + head SHA」写入 analysis_jobs 表（同一 SHA 去重），
+由固定数量的 worker 通过条件 UPDATE 抢占任务（pending → running），
+执行期间定期续租；进程崩溃后租约过期，任务会被其他 worker 回收。
+吞吐量与 LLM 调用量只取决于 worker 数量，而不是 webhook 数量。
+"""
+import asyncio
+import os
+import socket
+import time
+from datetime import datetime, timedelta
 from uuid import uuid4
 
 from app.core.ai_service import perform_pr_analysis
+from app.core.config import settings
 from app.core.database import AsyncSessionLocal
 from app.core.logging_config import logger
 from app.models.activity import Activity
+from app.models.analysis_job import AnalysisJob, AnalysisJobStatus
 from app.models.pull_request import PullRequest
 from app.models.pull_request_event import PullRequestEvent
 from app.models.pull_request_result import PullRequestResult
 from app.models.scoring import ScoreEntry
-from sqlalchemy import select
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
+# 失败重试的退避基数（秒），第 n 次失败后等待 base * 2^(n-1)
+RETRY_BACKOFF_BASE = 30
 
-async def process_pending_tasks():
-    """处理所有 pending 状态的 Activity，一次性拉取 diff 并进行 AI 分析评分."""
-    async with AsyncSessionLocal() as db:
-        try:
-            pending_result = await db.execute(select(Activity).filter(Activity.status == 'pending'))
-            pending = pending_result.scalars().all()
-            for act in pending:
+
+async def enqueue_analysis(
+    db: AsyncSession,
+    pr_node_id: str,
+    repository: str,
+    head_sha: str | None,
+    retry_failed: bool = True,
+) -> tuple[AnalysisJob, bool]:
+    """为 PR 的当前 head SHA 登记分析任务（不提交事务）.
+
+    同一 (pr_node_id, head_sha) 只会存在一个任务；新 SHA 入队时，
+    该 PR 尚未开始的旧任务会被标记为 superseded。
+    已有任务处于 superseded（如强制推送回到旧 SHA）时重置为 pending；
+    处于 failed 时仅在 retry_failed 为真（如 PR 重新打开）时重置。
+
+    Returns:
+        (任务, 是否新建或重新入队)
+
+    """
+    head_sha = head_sha or ''
+    existing_result = await db.execute(
+        select(AnalysisJob).filter(
+            AnalysisJob.pr_node_id == pr_node_id,
+            AnalysisJob.head_sha == head_sha,
+        )
+    )
+    existing = existing_result.scalars().first()
+    requeue_statuses = {AnalysisJobStatus.SUPERSEDED.value}
+    if retry_failed:
+        requeue_statuses.add(AnalysisJobStatus.FAILED.value)
+    if existing and existing.status not in requeue_statuses:
+        return existing, False
+
+    await db.execute(
+        update(AnalysisJob)
+        .where(
+            AnalysisJob.pr_node_id == pr_node_id,
+            AnalysisJob.status == AnalysisJobStatus.PENDING.value,
+        )
+        .values(status=AnalysisJobStatus.SUPERSEDED.value, finished_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+    if existing:
+        existing.status = AnalysisJobStatus.PENDING.value
+        existing.repository = repository
+        existing.attempts = 0
+        existing.last_error = None
+        existing.lease_owner = None
+        existing.lease_expires_at = None
+        existing.heartbeat_at = None
+        existing.available_at = datetime.utcnow().replace(microsecond=0)
+        existing.started_at = None
+        existing.finished_at = None
+        return existing, True
+
+    job = AnalysisJob(
+        pr_node_id=pr_node_id,
+        repository=repository,
+        head_sha=head_sha,
+        status=AnalysisJobStatus.PENDING.value,
+    )
+    db.add(job)
+    return job, True
+
+
+def _claimable(now: datetime):
+    """可被抢占的任务：到期的 pending，或租约已过期的 running."""
+    return or_(
+        and_(AnalysisJob.status == AnalysisJobStatus.PENDING.value, AnalysisJob.available_at <= now),
+        and_(AnalysisJob.status == AnalysisJobStatus.RUNNING.value, AnalysisJob.lease_expires_at < now),
+    )
+
+
+class AnalysisWorkerPool:
+    """固定大小的 AI 分析工作池.
+
+    - 抢占：条件 UPDATE + rowcount 校验，多进程/多 worker 安全
+    - 公平：优先选择当前运行中任务最少、最久未被服务的仓库
+    - 租约：执行期间每 lease/3 秒续租一次，完成/失败时校验 lease_owner
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        lease_seconds: int | None = None,
+        max_attempts: int | None = None,
+        poll_interval: float | None = None,
+    ):
+        """初始化工作池；未指定的参数取自配置."""
+        self.workers = max(1, workers or settings.ANALYSIS_WORKERS)
+        self.lease_seconds = lease_seconds or settings.ANALYSIS_LEASE_SECONDS
+        self.max_attempts = max_attempts or settings.ANALYSIS_MAX_ATTEMPTS
+        self.poll_interval = poll_interval or settings.ANALYSIS_POLL_INTERVAL
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: asyncio.Event | None = None
+        self._running = False
+        # 仓库 -> 最近一次被本进程服务的时间（monotonic），用于仓库间轮转
+        self._last_served: dict[str, float] = {}
+
+    @property
+    def is_running(self) -> bool:
+        """工作池是否已启动."""
+        return self._running
+
+    def start(self):
+        """启动 worker 协程（需在事件循环中调用）."""
+        if self._running:
+            return
+        self._running = True
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker_loop(i), name=f"analysis-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"[分析队列] 工作池已启动，worker 数量: {self.workers}，标识: {self.worker_id}")
+
+    async def stop(self):
+        """停止所有 worker；执行中的任务租约到期后会被其他进程回收."""
+        if not self._running:
+            return
+        self._running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("[分析队列] 工作池已停止")
+
+    def notify(self):
+        """唤醒空闲 worker，立即尝试抢占新任务."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _worker_loop(self, index: int):
+        while self._running:
+            try:
+                job = await self.claim_next()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[分析队列] worker-{index} 抢占任务失败: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
                 try:
-                    if not act.diff_url:
-                        continue
-
-                    # 根据 activity.id (即 pr_node_id) 查询 PullRequest 对象
-                    pr_obj_result = await db.execute(select(PullRequest).filter(PullRequest.pr_node_id == act.id))
-                    pr_obj = pr_obj_result.scalars().first()
-
-                    if not pr_obj:
-                        logger.warning(f"PullRequest object not found for activity ID {act.id}. Skipping analysis.")
-                        continue
-
-                    # 现在将 PullRequest 对象传递给 perform_pr_analysis
-                    result = await perform_pr_analysis(pr_obj)
-
-                    # 从 AI 分析结果中提取总分和建议
-                    total_points_from_ai = result.get("points", {}).get("total_points", 0)
-                    suggestions_text = " ".join([s.get("content", "") for s in result.get("suggestions", [])])
-
-                    # 更新 Activity
-                    act.description = suggestions_text
-                    act.points = total_points_from_ai
-                    act.status = 'completed'
-                    db.add(act)
-
-                    # 更新 PullRequest 表
-                    pr_result = await db.execute(select(PullRequest).filter(PullRequest.pr_node_id == act.id))
-                    pr = pr_result.scalars().first()
-                    if pr:
-                        pr.score = total_points_from_ai
-                        pr.analysis = suggestions_text
-                        db.add(pr)
-
-                        # 保存完整的 AI 分析结果到 PullRequestResult 表
-                        existing_pr_analysis_result = await db.execute(
-                            select(PullRequestResult).filter(PullRequestResult.pr_node_id == act.id)
-                        )
-                        pr_analysis_entry = existing_pr_analysis_result.scalars().first()
-
-                        if not pr_analysis_entry:
-                            # 如果不存在，则创建新记录
-                            pr_analysis_entry = PullRequestResult(
-                                pr_node_id=act.id,
-                                pr_number=pr.pr_number,
-                                repository=pr.repository,
-                                action="ai_analyzed", # 表示由 AI 分析
-                                ai_analysis_result=result, # 存储完整的 JSON 结果
-                                created_at=datetime.utcnow()
-                            )
-                            db.add(pr_analysis_entry)
-                        else:
-                            # 如果已存在，则更新记录
-                            pr_analysis_entry.ai_analysis_result = result
-                            pr_analysis_entry.created_at = datetime.utcnow()
-                            db.add(pr_analysis_entry)
-                    else:
-                        logger.warning(f"PullRequest with node_id {act.id} not found when processing pending task.")
-
-                    # 创建时间线事件
-                    event = PullRequestEvent(
-                        pr_node_id=act.id,
-                        event_type='ai_evaluation',
-                        event_time=datetime.utcnow(),
-                        details=suggestions_text
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._run_job(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 多为结束/重试任务时写库失败（如 database is locked）；租约到期后任务会被重新抢占
+                logger.error(f"[分析队列] worker-{index} 处理任务 {job.id} 失败: {e}")
+
+    async def claim_next(self) -> AnalysisJob | None:
+        """按仓库公平策略抢占一个任务，抢占失败（被其他 worker 拿走）时尝试下一个仓库."""
+        async with AsyncSessionLocal() as db:
+            now = datetime.utcnow()
+            heads_result = await db.execute(
+                select(AnalysisJob.repository, func.min(AnalysisJob.created_at))
+                .where(_claimable(now))
+                .group_by(AnalysisJob.repository)
+            )
+            heads = heads_result.all()
+            if not heads:
+                return None
+
+            running_result = await db.execute(
+                select(AnalysisJob.repository, func.count(AnalysisJob.id))
+                .where(
+                    AnalysisJob.status == AnalysisJobStatus.RUNNING.value,
+                    AnalysisJob.lease_expires_at >= now,
+                )
+                .group_by(AnalysisJob.repository)
+            )
+            running = dict(running_result.all())
+
+            heads.sort(key=lambda h: (running.get(h[0], 0), self._last_served.get(h[0], 0.0), h[1]))
+
+            for repository, _ in heads:
+                candidate_result = await db.execute(
+                    select(AnalysisJob.id)
+                    .where(_claimable(now), AnalysisJob.repository == repository)
+                    .order_by(AnalysisJob.created_at)
+                    .limit(1)
+                )
+                job_id = candidate_result.scalar()
+                if job_id is None:
+                    continue
+
+                claimed = await db.execute(
+                    update(AnalysisJob)
+                    .where(AnalysisJob.id == job_id, _claimable(now))
+                    .values(
+                        status=AnalysisJobStatus.RUNNING.value,
+                        lease_owner=self.worker_id,
+                        lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                        heartbeat_at=now,
+                        started_at=now,
+                        attempts=AnalysisJob.attempts + 1,
                     )
-                    db.add(event)
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+                if claimed.rowcount != 1:
+                    continue
+
+                self._last_served[repository] = time.monotonic()
+                job_result = await db.execute(select(AnalysisJob).filter(AnalysisJob.id == job_id))
+                return job_result.scalars().first()
+
+        return None
 
-                    entry = ScoreEntry(
-                        id=str(uuid4()), user_id=act.user_id, activity_id=act.id,
-                        criteria_id=None, score=total_points_from_ai, factors={"analysis": suggestions_text},
-                        notes="事件触发 AI 自动评分"
+    async def _heartbeat(self, job_id: str):
+        """执行期间定期续租."""
+        interval = max(1.0, self.lease_seconds / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with AsyncSessionLocal() as db:
+                    now = datetime.utcnow()
+                    await db.execute(
+                        update(AnalysisJob)
+                        .where(
+                            AnalysisJob.id == job_id,
+                            AnalysisJob.lease_owner == self.worker_id,
+                            AnalysisJob.status == AnalysisJobStatus.RUNNING.value,
+                        )
+                        .values(heartbeat_at=now, lease_expires_at=now + timedelta(seconds=self.lease_seconds))
+                        .execution_options(synchronize_session=False)
                     )
-                    db.add(entry)
                     await db.commit()
-                    logger.info(f"[任务执行] PR {act.id} 评分完成，得分：{total_points_from_ai}")
-                except ValueError as e: # 捕获来自 perform_pr_analysis 的 ValueError
-                    await db.rollback()
-                    # 提供更友好的提示
-                    logger.error(f"[任务执行] PR {act.id} 分析失败：无法联调 GitHub。错误详情：{e}")
-                except Exception as e:
-                    await db.rollback()
-                    logger.error(f"[任务执行] PR {act.id} 分析失败：{e}")
+            except Exception as e:
+                logger.warning(f"[分析队列] 任务 {job_id} 续租失败: {e}")
+
+    async def _run_job(self, job: AnalysisJob):
+        if job.attempts > self.max_attempts:
+            await self._finish(job.id, AnalysisJobStatus.FAILED, "超过最大重试次数")
+            return
+
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            await self._analyze(job)
+        except asyncio.CancelledError:
+            raise
+        except ValueError as e:  # 捕获来自 perform_pr_analysis 的 ValueError
+            logger.error(f"[任务执行] PR {job.pr_node_id} 分析失败：无法联调 GitHub。错误详情：{e}")
+            await self._retry_or_fail(job, str(e))
+        except Exception as e:
+            logger.error(f"[任务执行] PR {job.pr_node_id} 分析失败：{e}")
+            await self._retry_or_fail(job, str(e))
+        finally:
+            heartbeat.cancel()
+
+    async def _finish(
+        self, job_id: str, status: AnalysisJobStatus, error: str | None = None, db: AsyncSession | None = None
+    ) -> bool:
+        """结束任务；仅当租约仍属于本 worker 时生效，返回是否生效。传入 db 时由调用方提交."""
+        stmt = (
+            update(AnalysisJob)
+            .where(AnalysisJob.id == job_id, AnalysisJob.lease_owner == self.worker_id)
+            .values(status=status.value, last_error=error, finished_at=datetime.utcnow(), lease_expires_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        if db is not None:
+            return (await db.execute(stmt)).rowcount > 0
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(stmt)
+            await session.commit()
+            return result.rowcount > 0
+
+    async def _retry_or_fail(self, job: AnalysisJob, error: str):
+        if job.attempts >= self.max_attempts:
+            await self._finish(job.id, AnalysisJobStatus.FAILED, error)
+            return
+        delay = RETRY_BACKOFF_BASE * (2 ** (job.attempts - 1))
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(AnalysisJob)
+                .where(AnalysisJob.id == job.id, AnalysisJob.lease_owner == self.worker_id)
+                .values(
+                    status=AnalysisJobStatus.PENDING.value,
+                    last_error=error,
+                    lease_owner=None,
+                    lease_expires_at=None,
+                    available_at=datetime.utcnow() + timedelta(seconds=delay),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+    async def _analyze(self, job: AnalysisJob):
+        """执行单个任务：拉取 diff 进行 AI 分析，结果与任务状态在同一事务中落库."""
+        async with AsyncSessionLocal() as db:
+            pr_result = await db.execute(select(PullRequest).filter(PullRequest.pr_node_id == job.pr_node_id))
+            pr = pr_result.scalars().first()
+
+        if not pr:
+            logger.warning(f"PullRequest object not found for job {job.id} (PR {job.pr_node_id}). Skipping analysis.")
+            await self._finish(job.id, AnalysisJobStatus.FAILED, "PullRequest not found")
+            return
+
+        if job.head_sha and pr.commit_sha and pr.commit_sha != job.head_sha:
+            logger.info(f"[任务执行] PR {job.pr_node_id} 已推送新提交 {pr.commit_sha}，跳过旧 SHA {job.head_sha}")
+            await self._finish(job.id, AnalysisJobStatus.SUPERSEDED)
+            return
+
+        # LLM 调用期间不持有数据库会话，避免长时间占用 SQLite 锁
+        result = await perform_pr_analysis(pr)
+
+        # 从 AI 分析结果中提取总分和建议
+        total_points_from_ai = result.get("points", {}).get("total_points", 0)
+        suggestions_text = " ".join([s.get("content", "") for s in result.get("suggestions", [])])
+
+        async with AsyncSessionLocal() as db:
+            act_result = await db.execute(select(Activity).filter(Activity.id == job.pr_node_id))
+            act = act_result.scalars().first()
+            if not act:
+                logger.warning(f"Activity not found for PR {job.pr_node_id} when saving analysis result.")
+                await self._finish(job.id, AnalysisJobStatus.FAILED, "Activity not found", db=db)
+                await db.commit()
+                return
+
+            # 先按租约条件结束任务：本 worker 执行超时、任务已被其他 worker 接管时放弃写入，
+            # 避免重复写入分析结果与重复计分
+            if not await self._finish(job.id, AnalysisJobStatus.COMPLETED, db=db):
+                await db.rollback()
+                logger.warning(f"[任务执行] 任务 {job.id} 的租约已被接管，放弃写入 PR {job.pr_node_id} 的分析结果")
+                return
+
+            # 更新 Activity
+            act.description = suggestions_text
+            act.points = total_points_from_ai
+            act.status = 'completed'
+
+            # 更新 PullRequest 表
+            pr_result = await db.execute(select(PullRequest).filter(PullRequest.pr_node_id == act.id))
+            pr = pr_result.scalars().first()
+            if pr:
+                pr.score = total_points_from_ai
+                pr.analysis = suggestions_text
+
+                # 保存完整的 AI 分析结果到 PullRequestResult 表
+                existing_pr_analysis_result = await db.execute(
+                    select(PullRequestResult).filter(PullRequestResult.pr_node_id == act.id)
+                )
+                pr_analysis_entry = existing_pr_analysis_result.scalars().first()
+
+                if not pr_analysis_entry:
+                    pr_analysis_entry = PullRequestResult(
+                        pr_node_id=act.id,
+                        pr_number=pr.pr_number,
+                        repository=pr.repository,
+                        action="ai_analyzed", # 表示由 AI 分析
+                        ai_analysis_result=result, # 存储完整的 JSON 结果
+                        created_at=datetime.utcnow()
+                    )
+                    db.add(pr_analysis_entry)
+                else:
+                    pr_analysis_entry.ai_analysis_result = result
+                    pr_analysis_entry.created_at = datetime.utcnow()
+            else:
+                logger.warning(f"PullRequest with node_id {act.id} not found when processing pending task.")
+
+            # 创建时间线事件
+            db.add(PullRequestEvent(
+                pr_node_id=act.id,
+                event_type='ai_evaluation',
+                event_time=datetime.utcnow(),
+                details=suggestions_text
+            ))
+
+            db.add(ScoreEntry(
+                id=str(uuid4()), user_id=act.user_id, activity_id=act.id,
+                score=total_points_from_ai, factors={"analysis": suggestions_text},
+                notes="事件触发 AI 自动评分"
+            ))
+
+            await db.commit()
+            logger.info(f"[任务执行] PR {act.id} 评分完成，得分：{total_points_from_ai}")
+
+
+# 全局工作池实例
+analysis_worker_pool = AnalysisWorkerPool()
+
+_sweep_task: asyncio.Task | None = None
+
+
+async def process_pending_tasks():
+    """补偿扫描：为所有 pending 且尚未登记任务的 Activity 入队，并唤醒工作池.
+
+    分析本身由工作池执行；本函数可重复调用，不会产生重复分析。
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            pending_result = await db.execute(
+                select(Activity.id, PullRequest.repository, PullRequest.commit_sha)
+                .join(PullRequest, PullRequest.pr_node_id == Activity.id)
+                .filter(Activity.status == 'pending', Activity.diff_url.isnot(None))
+            )
+            created = 0
+            for pr_node_id, repository, head_sha in pending_result.all():
+                _, is_new = await enqueue_analysis(db, pr_node_id, repository, head_sha, retry_failed=False)
+                created += int(is_new)
+            await db.commit()
+            if created:
+                logger.info(f"[任务调度器] 补偿扫描新增 {created} 个分析任务")
         except Exception as e:
+            await db.rollback()
             logger.error(f"[任务调度器] 处理待处理任务时发生异步操作错误，请检查数据库连接和事件循环配置: {e}")
+    analysis_worker_pool.notify()
+
+
+def schedule_pending_tasks():
+    """在当前事件循环中触发一次补偿扫描；已有扫描在执行时直接复用."""
+    global _sweep_task
+    if _sweep_task is not None and not _sweep_task.done():
+        return _sweep_task
+    _sweep_task = asyncio.create_task(process_pending_tasks())
+    return _sweep_task
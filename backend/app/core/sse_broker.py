@@ -0,0 +1,191 @@
+"""SSE 扇出广播器.
+
+- 每个连接使用有界队列：队列满时丢弃最旧事件；带 coalesce_key 的事件
+  （如未读数更新）会替换队列中尚未发送的同类事件，只保留最新值
+- 事件只序列化一次，预编码为 bytes 后分发给该用户的所有连接
+- 最近事件保存在环形缓冲区中，客户端重连时按 Last-Event-ID 补发；
+  缓冲区已覆盖不到时下发 resync 事件，提示前端重新拉取
+- 事件 ID 形如 "<实例标识>-<序号>"，序号只在本进程内递增。多 worker 部署时重连可能落到
+  另一个 worker（或进程已重启），此时实例标识不匹配，同样下发 resync 而不是按错误的区间补发
+- 提供每个用户的连接数与队列深度等指标
+"""
+import asyncio
+import itertools
+import json
+import uuid
+from collections import deque
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+from typing import Any
+
+from app.core.config import settings
+from app.core.logging_config import logger
+
+
+def encode_sse(data: dict, event_id: str | None = None) -> bytes:
+    """将事件编码为 SSE 帧."""
+    payload = json.dumps(data, ensure_ascii=False)
+    if event_id is None:
+        return f"data: {payload}\n\n".encode()
+    return f"id: {event_id}\ndata: {payload}\n\n".encode()
+
+
+class SSEClient:
+    """单个 SSE 连接的有界发送队列."""
+
+    __slots__ = ("user_id", "maxsize", "queue", "_wakeup", "dropped", "coalesced")
+
+    def __init__(self, user_id: int, maxsize: int):
+        """初始化客户端队列."""
+        self.user_id = user_id
+        self.maxsize = maxsize
+        self.queue: deque[tuple[int, str | None, bytes]] = deque()
+        self._wakeup = asyncio.Event()
+        self.dropped = 0
+        self.coalesced = 0
+
+    def push(self, event_id: int, frame: bytes, coalesce_key: str | None = None) -> None:
+        """入队一帧；coalesce_key 相同的未发送事件会被替换，队列满时丢弃最旧的帧."""
+        if coalesce_key is not None:
+            for idx, (_, key, _) in enumerate(self.queue):
+                if key == coalesce_key:
+                    del self.queue[idx]
+                    self.coalesced += 1
+                    break
+        if len(self.queue) >= self.maxsize:
+            self.queue.popleft()
+            self.dropped += 1
+        self.queue.append((event_id, coalesce_key, frame))
+        self._wakeup.set()
+
+    async def next_frame(self, timeout: float) -> bytes | None:
+        """等待下一帧；超时返回 None."""
+        if not self.queue:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except TimeoutError:
+                return None
+        return self.queue.popleft()[2]
+
+
+class SSEBroker:
+    """按用户分组的 SSE 广播器."""
+
+    def __init__(
+        self,
+        queue_size: int | None = None,
+        replay_size: int | None = None,
+        heartbeat_seconds: float | None = None,
+    ):
+        """初始化广播器；未指定的参数取自配置."""
+        self.queue_size = queue_size or settings.SSE_QUEUE_SIZE
+        self.heartbeat_seconds = heartbeat_seconds or settings.SSE_HEARTBEAT_SECONDS
+        self._clients: dict[int, list[SSEClient]] = {}
+        self._replay: deque[tuple[int, int, bytes]] = deque(maxlen=replay_size or settings.SSE_REPLAY_SIZE)
+        self._ids = itertools.count(1)
+        self.instance = uuid.uuid4().hex[:8]
+        self.published = 0
+
+    def publish(self, user_id: int, data: dict, coalesce_key: str | None = None) -> str:
+        """向用户的所有连接推送事件，返回事件 ID."""
+        seq = next(self._ids)
+        event_id = f"{self.instance}-{seq}"
+        frame = encode_sse(data, event_id)
+        self._replay.append((seq, user_id, frame))
+        self.published += 1
+        for client in self._clients.get(user_id, ()):
+            client.push(seq, frame, coalesce_key)
+        return event_id
+
+    def _replay_frames(self, user_id: int, last_event_id: str) -> list[bytes] | None:
+        """返回 last_event_id 之后该用户的事件；ID 来自其他实例或缓冲区无法覆盖时返回 None."""
+        instance, _, seq = last_event_id.partition("-")
+        if instance != self.instance or not seq.isdigit():
+            return None
+        last_seq = int(seq)
+        if self._replay and self._replay[0][0] > last_seq + 1:
+            return None
+        return [frame for event_seq, uid, frame in self._replay if uid == user_id and event_seq > last_seq]
+
+    def connect(self, user_id: int) -> SSEClient:
+        """为用户注册一个连接."""
+        client = SSEClient(user_id, self.queue_size)
+        self._clients.setdefault(user_id, []).append(client)
+        return client
+
+    def disconnect(self, client: SSEClient) -> None:
+        """注销连接."""
+        clients = self._clients.get(client.user_id)
+        if not clients:
+            return
+        try:
+            clients.remove(client)
+        except ValueError:
+            pass
+        if not clients:
+            del self._clients[client.user_id]
+
+    async def stream(self, user_id: int, last_event_id: str | None = None) -> AsyncIterator[bytes]:
+        """为用户生成 SSE 字节流."""
+        client = self.connect(user_id)
+        try:
+            # 注册连接后立即（中间没有 yield）取重放快照：之前的事件只在快照中，之后的事件只进入队列，
+            # 避免同一事件既被重放又从队列发送
+            frames = self._replay_frames(user_id, last_event_id) if last_event_id is not None else []
+
+            yield encode_sse({
+                'type': 'connected',
+                'message': 'SSE连接已建立',
+                'timestamp': datetime.now(UTC).isoformat()
+            })
+
+            if frames is None:
+                yield encode_sse({'type': 'resync', 'timestamp': datetime.now(UTC).isoformat()})
+            else:
+                for frame in frames:
+                    yield frame
+
+            while True:
+                frame = await client.next_frame(self.heartbeat_seconds)
+                if frame is None:
+                    # 发送心跳保持连接
+                    yield encode_sse({'type': 'heartbeat', 'timestamp': datetime.now(UTC).isoformat()})
+                else:
+                    yield frame
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"SSE 连接错误: {e}")
+        finally:
+            self.disconnect(client)
+
+    def stats(self) -> dict[str, Any]:
+        """连接数与队列深度指标."""
+        users = {}
+        total_connections = 0
+        max_depth = 0
+        dropped = coalesced = 0
+        for user_id, clients in self._clients.items():
+            depths = [len(c.queue) for c in clients]
+            users[user_id] = {"connections": len(clients), "queueDepths": depths}
+            total_connections += len(clients)
+            max_depth = max([max_depth, *depths])
+            dropped += sum(c.dropped for c in clients)
+            coalesced += sum(c.coalesced for c in clients)
+        return {
+            "totalConnections": total_connections,
+            "connectedUsers": len(users),
+            "maxQueueDepth": max_depth,
+            "queueSize": self.queue_size,
+            "dropped": dropped,
+            "coalesced": coalesced,
+            "instance": self.instance,
+            "published": self.published,
+            "replayBuffered": len(self._replay),
+            "users": users,
+        }
+
+
+# 通知 SSE 广播器
+notification_broker = SSEBroker()
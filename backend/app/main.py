@@ -2,6 +2,18 @@ import importlib
 import pkgutil # 自动批量注册 api 路由
 
 from app.api import __path__ as api_path
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.github_client import close_github_client
+from app.core.job_scheduler import job_scheduler
+from app.core.pubsub import pubsub
+from app.core.scheduler import analysis_worker_pool, schedule_pending_tasks
+from app.services.mall_search import mall_search_index
+from app.services.mall_service import view_count_buffer
+from app.services.notification_service import wait_deferred_notifications
+from app.tasks.consistency_tasks import start_consistency_tasks, stop_consistency_tasks
+from app.tasks.notification_tasks import register_jobs as register_notification_jobs
+from app.tasks.recommendation_tasks import register_jobs as register_recommendation_jobs
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
@@ -23,6 +35,32 @@ for _, module_name, _ in pkgutil.iter_modules(api_path):
         app.include_router(module.router)
 
 
+@app.on_event("startup")
+async def start_analysis_workers():
+    """启动跨 worker 发布/订阅、AI 分析工作池与定时任务调度器，并补偿扫描重启前遗留的 pending 活动."""
+    await pubsub.start()
+    async with AsyncSessionLocal() as db:
+        await mall_search_index.ensure(db)
+    await view_count_buffer.start()
+    analysis_worker_pool.start()
+    schedule_pending_tasks()
+    if settings.SCHEDULER_ENABLED:
+        register_recommendation_jobs(job_scheduler)
+        register_notification_jobs(job_scheduler)
+        await start_consistency_tasks()
+
+
+@app.on_event("shutdown")
+async def stop_analysis_workers():
+    """停止后台任务并关闭外部连接，等待延迟发送的通知完成."""
+    await stop_consistency_tasks()
+    await view_count_buffer.stop()
+    await wait_deferred_notifications()
+    await analysis_worker_pool.stop()
+    await close_github_client()
+    await pubsub.stop()
+
+
 @app.get("/health")
 @app.get("/api/health")
 @app.options("/health")
@@ -1,7 +1,9 @@
 from .activity import Activity
+from .analysis_job import AnalysisJob, AnalysisJobStatus
+from .cache_invalidation import CacheInvalidation
 from .company import Company
 from .department import Department
-from .notification import Notification
+from .notification import Notification, NotificationArchive, NotificationUnreadCounter
 from .pr_lifecycle_event import PrEventType, PrLifecycleEvent
 
 # 新的PR表结构 - 基于编码共识的领域驱动设计
@@ -9,8 +11,10 @@ from .pr_metadata import PrMetadata, PrMetrics, PrQualityLevel, PrStatus
 from .pull_request import PullRequest
 from .pull_request_event import PullRequestEvent
 from .pull_request_result import PullRequestResult
+from .recommendation import MallItemPopularity, UserCategoryAffinity
 from .reward import MallCategory, MallItem
 from .role import Role
+from .scheduler_run import SchedulerLease, SchedulerRun, SchedulerRunStatus
 from .scoring import ScoringFactor
 from .user import User
 
@@ -19,17 +23,27 @@ from .user_identity import IdentityPlatform, IdentityStatus, UserIdentity
 
 __all__ = [
     'Activity',
+    'AnalysisJob',
+    'AnalysisJobStatus',
     'MallItem',
     'MallCategory',
+    'MallItemPopularity',
+    'UserCategoryAffinity',
     'ScoringFactor',
     'User',
     'Company',
+    'CacheInvalidation',
     'Department',
     'Role',
+    'SchedulerLease',
+    'SchedulerRun',
+    'SchedulerRunStatus',
     'PullRequest',
     'PullRequestEvent',
     'PullRequestResult',
     'Notification',
+    'NotificationArchive',
+    'NotificationUnreadCounter',
     # 新的PR表结构
     'PrMetadata',
     'PrLifecycleEvent',
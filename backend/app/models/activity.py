@@ -5,7 +5,7 @@ import uuid
 from datetime import datetime, timezone
 
 from app.core.database import Base
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 
@@ -13,6 +13,11 @@ class Activity(Base):
     """Activity model representing an activity in the system."""
 
     __tablename__ = 'activities'
+    __table_args__ = (
+        # 活动列表按 (created_at, id) 倒序游标分页
+        Index('idx_activities_created_id', 'created_at', 'id'),
+        Index('idx_activities_user_created_id', 'user_id', 'created_at', 'id'),
+    )
 
     id = Column(String(200), primary_key=True)
     show_id = Column(String(36), unique=True, index=True, nullable=False, default=lambda: str(uuid.uuid4()))
@@ -0,0 +1,78 @@
+"""AI 分析任务队列模型.
+
+每条记录代表一次「PR + head SHA」的 AI 分析任务，由工作池通过
+条件 UPDATE 抢占（pending → running），并通过租约/心跳保证崩溃后可被回收。
+"""
+import uuid
+from datetime import datetime
+from enum import Enum as PyEnum
+
+from app.core.database import Base
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
+
+
+class AnalysisJobStatus(PyEnum):
+    """分析任务状态枚举."""
+
+    PENDING = "pending"          # 等待被抢占
+    RUNNING = "running"          # 已被某个 worker 抢占，租约有效期内执行中
+    COMPLETED = "completed"      # 分析完成
+    FAILED = "failed"            # 超过最大重试次数
+    SUPERSEDED = "superseded"    # PR 已有更新的 head SHA，本任务作废
+
+
+class AnalysisJob(Base):
+    """AI 分析任务表."""
+
+    __tablename__ = 'analysis_jobs'
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    pr_node_id = Column(String(100), nullable=False)
+    repository = Column(String(100), nullable=False)
+    head_sha = Column(String(100), nullable=False, default='')
+    status = Column(String(20), nullable=False, default=AnalysisJobStatus.PENDING.value)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+
+    # 租约信息：lease_owner 为抢占该任务的 worker 标识
+    lease_owner = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    available_at = Column(DateTime, nullable=False, default=lambda: datetime.utcnow().replace(microsecond=0))
+    created_at = Column(DateTime, nullable=False, default=lambda: datetime.utcnow().replace(microsecond=0))
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # 同一 PR 的同一 head SHA 只分析一次
+        UniqueConstraint('pr_node_id', 'head_sha', name='uq_analysis_jobs_pr_sha'),
+        # 抢占查询：按状态、仓库、可执行时间
+        Index('idx_analysis_jobs_status_repo', 'status', 'repository', 'available_at'),
+    )
+
+    def to_dict(self):
+        """转换为字典."""
+        return {
+            "id": self.id,
+            "prNodeId": self.pr_node_id,
+            "repository": self.repository,
+            "headSha": self.head_sha,
+            "status": self.status,
+            "attempts": self.attempts,
+            "lastError": self.last_error,
+            "leaseOwner": self.lease_owner,
+            "leaseExpiresAt": self.lease_expires_at.isoformat() if self.lease_expires_at else None,
+            "heartbeatAt": self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            "createdAt": self.created_at.isoformat() if self.created_at else None,
+            "startedAt": self.started_at.isoformat() if self.started_at else None,
+            "finishedAt": self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -0,0 +1,20 @@
+"""缓存失效广播模型.
+
+各进程在写操作的事务内登记失效记录，其他进程按自增 id 增量拉取，
+作为多 worker 部署下的本地 pub/sub 替代。
+"""
+from datetime import datetime
+
+from app.core.database import Base
+from sqlalchemy import Column, DateTime, Integer, String
+
+
+class CacheInvalidation(Base):
+    """缓存失效记录表."""
+
+    __tablename__ = 'cache_invalidations'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    cache_name = Column(String(50), nullable=False)
+    cache_key = Column(String(200), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
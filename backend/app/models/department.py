@@ -2,7 +2,7 @@ import json
 from datetime import datetime
 
 from app.core.database import Base
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 
@@ -19,6 +19,10 @@ class Department(Base):
     # 关联关系
     company = relationship('Company', back_populates='departments')
 
+    __table_args__ = (
+        Index('idx_departments_company_id', 'company_id'),
+    )
+
     def __init__(self, name: str, company_id: int):
         self.name = name
         self.company_id = company_id
@@ -9,7 +9,7 @@
 5. 支持国际化、个性化和未来扩展
 """
 import uuid
-from datetime import datetime, timezone
+from datetime import UTC, datetime, timezone
 from enum import Enum as PyEnum
 from typing import Any, Dict, Optional
 
@@ -261,3 +261,68 @@ class Notification(Base):
             action_label=action_label,
             source="transaction_system"
         )
+
+
+class NotificationUnreadCounter(Base):
+    """用户未读通知计数 - 与通知的创建、已读、删除在同一事务内维护.
+
+    读取未读数量只需按主键取一行，无需对通知表执行 COUNT。
+    """
+
+    __tablename__ = 'notification_unread_counters'
+
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    unread_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=lambda: datetime.now(UTC))
+
+    def to_dict(self) -> dict[str, Any]:
+        """转换为字典."""
+        return {
+            "userId": self.user_id,
+            "unreadCount": self.unread_count,
+            "updatedAt": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+class NotificationArchive(Base):
+    """通知归档表 - 保留期内已处理的旧通知.
+
+    只保留展示与追溯所需的列，不建通知表上的组合索引；超过保留期限后由保留任务物理删除。
+    """
+
+    __tablename__ = 'notification_archives'
+
+    id = Column(String(36), primary_key=True)  # 原通知ID
+    user_id = Column(Integer, nullable=False)
+    category = Column(Enum(NotificationCategory), nullable=False)
+    status = Column(Enum(NotificationStatus), nullable=False)
+    title = Column(String(200), nullable=False)
+    summary = Column(String(500), nullable=True)
+    payload = Column(JSON, nullable=False)
+    source = Column(String(100), nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    read_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, nullable=False, default=lambda: datetime.now(UTC))
+
+    __table_args__ = (
+        # 按用户查看历史通知
+        Index('idx_notification_archives_user_created', 'user_id', 'created_at'),
+        # 超过保留期限的归档清理
+        Index('idx_notification_archives_created', 'created_at'),
+    )
+
+    def to_dict(self) -> dict[str, Any]:
+        """转换为字典."""
+        return {
+            "id": self.id,
+            "userId": self.user_id,
+            "category": self.category.value,
+            "status": self.status.value,
+            "title": self.title,
+            "summary": self.summary,
+            "data": self.payload,
+            "source": self.source,
+            "createdAt": self.created_at.isoformat() if self.created_at else None,
+            "readAt": self.read_at.isoformat() if self.read_at else None,
+            "archivedAt": self.archived_at.isoformat() if self.archived_at else None,
+        }
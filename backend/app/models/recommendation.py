@@ -0,0 +1,68 @@
+"""商城推荐模型.
+
+- UserCategoryAffinity: 用户分类偏好，随购买/取消购买增量维护
+- MallItemPopularity: 按公司物化的热门商品候选列表，由定时任务整体刷新
+"""
+from datetime import datetime
+
+from app.core.database import Base
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+
+
+class UserCategoryAffinity(Base):
+    """用户分类偏好表 - score 为该分类下未取消的购买次数."""
+
+    __tablename__ = 'user_category_affinities'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    category = Column(String(50), nullable=False)
+    score = Column(Integer, nullable=False, default=0)
+    last_purchased_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=lambda: datetime.utcnow().replace(microsecond=0))
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'category', name='uq_user_category_affinities_user_category'),
+    )
+
+    def to_dict(self):
+        """转换为字典."""
+        return {
+            "userId": self.user_id,
+            "category": self.category,
+            "score": self.score,
+            "lastPurchasedAt": self.last_purchased_at.isoformat() if self.last_purchased_at else None,
+        }
+
+
+class MallItemPopularity(Base):
+    """商品热门度物化表 - 每个公司（company_id 为空表示无公司用户）一组候选商品.
+
+    保留全站排名前 RECOMMENDATION_TOP_N 以及每个分类排名前 RECOMMENDATION_CATEGORY_TOP_N 的商品。
+    """
+
+    __tablename__ = 'mall_item_popularity'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    company_id = Column(Integer, ForeignKey('companies.id'), nullable=True)
+    item_id = Column(String(36), ForeignKey('mall_items.id', ondelete='CASCADE'), nullable=False)
+    category = Column(String(50), nullable=False)
+    is_featured = Column(Boolean, nullable=False, default=False)
+    purchase_count = Column(Integer, nullable=False, default=0)  # 该公司内未取消的购买次数
+    rank = Column(Integer, nullable=False)  # 公司内排名，从 1 开始
+    category_rank = Column(Integer, nullable=False)  # 分类内排名，从 1 开始
+    refreshed_at = Column(DateTime, nullable=False, default=lambda: datetime.utcnow().replace(microsecond=0))
+
+    __table_args__ = (
+        # 按公司读取候选列表
+        Index('idx_mall_item_popularity_company_rank', 'company_id', 'rank'),
+    )
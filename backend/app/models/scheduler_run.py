@@ -0,0 +1,68 @@
+"""定时任务调度模型.
+
+- SchedulerLease: 调度器领导者租约，多个 uvicorn worker 中只有持有租约的进程执行定时任务
+- SchedulerRun: 定时任务执行历史
+"""
+from datetime import datetime
+from enum import Enum as PyEnum
+
+from app.core.database import Base
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+
+
+class SchedulerRunStatus(PyEnum):
+    """定时任务执行状态枚举."""
+
+    RUNNING = "running"      # 执行中
+    SUCCESS = "success"      # 执行成功
+    FAILED = "failed"        # 执行抛出异常
+    TIMEOUT = "timeout"      # 超过任务超时时间被取消
+    SKIPPED = "skipped"      # 上一次执行尚未结束，本次跳过
+
+
+class SchedulerLease(Base):
+    """调度器领导者租约表."""
+
+    __tablename__ = 'scheduler_leases'
+
+    name = Column(String(50), primary_key=True)
+    owner = Column(String(100), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    acquired_at = Column(DateTime, nullable=False, default=lambda: datetime.utcnow().replace(microsecond=0))
+
+
+class SchedulerRun(Base):
+    """定时任务执行历史表."""
+
+    __tablename__ = 'scheduler_runs'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_name = Column(String(100), nullable=False)
+    owner = Column(String(100), nullable=False)
+    status = Column(String(20), nullable=False, default=SchedulerRunStatus.RUNNING.value)
+    scheduled_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=False, default=lambda: datetime.utcnow().replace(microsecond=0))
+    finished_at = Column(DateTime, nullable=True)
+    duration_ms = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    summary = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # 按任务查询最近的执行记录
+        Index('idx_scheduler_runs_job_started', 'job_name', 'started_at'),
+    )
+
+    def to_dict(self):
+        """转换为字典."""
+        return {
+            "id": self.id,
+            "jobName": self.job_name,
+            "owner": self.owner,
+            "status": self.status,
+            "scheduledAt": self.scheduled_at.isoformat() if self.scheduled_at else None,
+            "startedAt": self.started_at.isoformat() if self.started_at else None,
+            "finishedAt": self.finished_at.isoformat() if self.finished_at else None,
+            "durationMs": self.duration_ms,
+            "error": self.error,
+            "summary": self.summary,
+        }
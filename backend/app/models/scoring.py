@@ -5,15 +5,19 @@ from enum import Enum as PyEnum
 from app.core.database import Base
 from sqlalchemy import (
     JSON,
+    Boolean,
     Column,
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import backref, relationship
+from sqlalchemy.sql import false
 
 
 class ScoringFactor(Base):
@@ -112,6 +116,10 @@ class PointTransaction(Base):
     """积分交易记录表"""
 
     __tablename__ = 'point_transactions'
+    __table_args__ = (
+        # 账本按 (用户, 公司) 分区、按 (created_at, id) 顺序回放余额
+        Index('idx_point_transactions_ledger', 'user_id', 'company_id', 'created_at', 'id'),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
@@ -165,6 +173,38 @@ class PointTransaction(Base):
         return max(0, delta.days)
 
 
+class PointBalance(Base):
+    """积分余额表 - 按 (用户, 公司) 维护的实时余额.
+
+    与每条 PointTransaction 在同一事务中更新，version 用于乐观并发控制。
+    """
+
+    __tablename__ = 'point_balances'
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    company_id = Column(Integer, ForeignKey('companies.id'), nullable=True)
+    balance = Column(Integer, nullable=False, default=0)  # 后端存储格式
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=lambda: datetime.utcnow().replace(microsecond=0))
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'company_id', name='uq_point_balances_user_company'),
+    )
+
+    def to_dict(self):
+        """转换为字典，余额以前端展示格式返回."""
+        from app.services.point_service import PointConverter
+
+        return {
+            "userId": self.user_id,
+            "companyId": self.company_id,
+            "balance": PointConverter.format_for_api(self.balance),
+            "version": self.version,
+            "updatedAt": self.updated_at.isoformat() if isinstance(self.updated_at, datetime) else self.updated_at,
+        }
+
+
 class PointDispute(Base):
     """积分争议表"""
 
@@ -282,6 +322,8 @@ class PointPurchase(Base):
     redemption_code = Column(String(20), nullable=True)  # 兑换码
     delivery_info = Column(JSON, nullable=True)  # 配送信息
     notes = Column(Text, nullable=True)  # 备注
+    # 购买时是否扣减了库存；早期的购买记录未扣减库存，取消时不应归还
+    stock_reserved = Column(Boolean, nullable=False, default=False, server_default=false())
     created_at = Column(DateTime, default=lambda: datetime.utcnow().replace(microsecond=0))
     completed_at = Column(DateTime, nullable=True)
 
@@ -4,7 +4,16 @@ from datetime import datetime
 
 from app.core.database import Base
 from passlib.context import CryptContext
-from sqlalchemy import Boolean, Column, Date, DateTime, ForeignKey, Integer, String
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
 from sqlalchemy.orm import relationship
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
@@ -35,6 +44,13 @@ class User(Base):
     # 超级管理员标识
     is_super_admin = Column(Boolean, default=False, nullable=False)
 
+    __table_args__ = (
+        # 组织成员数/活跃成员数聚合可仅扫描索引
+        Index('idx_users_department_completed', 'department_id', 'completed_tasks'),
+        # 公司成员数统计
+        Index('idx_users_company_id', 'company_id'),
+    )
+
     # 关联关系
     company = relationship('Company', back_populates='users', foreign_keys=[company_id])
     user_level = relationship('UserLevel', foreign_keys=[level_id])
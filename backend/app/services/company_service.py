@@ -0,0 +1,165 @@
+"""公司服务层 - 公司列表摘要与缓存."""
+import logging
+from typing import Any
+
+from app.core.cache import LRUCache, invalidation_bus
+from app.core.config import settings
+from app.models.cache_invalidation import CacheInvalidation
+from app.models.company import Company
+from app.models.department import Department
+from app.models.user import User
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+
+logger = logging.getLogger(__name__)
+
+COMPANY_LIST_CACHE_NAME = "company_list"
+
+# 公司列表摘要缓存：短 TTL，公司/用户/组织变更时整体失效
+_company_list_cache = LRUCache(maxsize=1000, ttl=settings.COMPANY_LIST_CACHE_TTL)
+invalidation_bus.subscribe(COMPANY_LIST_CACHE_NAME, lambda key: _company_list_cache.clear())
+
+_DIRTY_FLAG = "company_list_dirty"
+
+
+def _affects_company_list(obj: Any, is_dirty: bool) -> bool:
+    if isinstance(obj, Company):
+        return True
+    if isinstance(obj, (User, Department)):
+        if not is_dirty:
+            return True
+        state = inspect(obj)
+        if state.attrs.company_id.history.has_changes():
+            return True
+        # 创建人姓名出现在摘要中
+        return isinstance(obj, User) and state.attrs.name.history.has_changes()
+    return False
+
+
+@event.listens_for(Session, "before_flush")
+def _track_company_list_mutations(session: Session, flush_context, instances):
+    """在写事务中登记公司列表缓存失效（跨进程），提交后清理本进程缓存."""
+    if session.info.get(_DIRTY_FLAG):
+        return
+    changed = any(_affects_company_list(obj, False) for obj in session.new) \
+        or any(_affects_company_list(obj, False) for obj in session.deleted) \
+        or any(_affects_company_list(obj, True) for obj in session.dirty)
+    if changed:
+        session.info[_DIRTY_FLAG] = True
+        session.add(CacheInvalidation(cache_name=COMPANY_LIST_CACHE_NAME, cache_key="*"))
+
+
+@event.listens_for(Session, "after_commit")
+def _clear_company_list_cache_on_commit(session: Session):
+    if session.info.pop(_DIRTY_FLAG, False):
+        _company_list_cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_company_list_flag(session: Session):
+    session.info.pop(_DIRTY_FLAG, None)
+
+
+def get_company_list_cache_stats() -> dict[str, Any]:
+    """返回公司列表缓存的统计信息."""
+    return _company_list_cache.stats()
+
+
+class CompanyService:
+    """公司服务类."""
+
+    def __init__(self, db: AsyncSession):
+        """初始化服务."""
+        self.db = db
+
+    @staticmethod
+    def _summary_query():
+        """公司摘要投影：成员数、组织数、创建人姓名在同一条 SQL 中获取."""
+        creator = aliased(User)
+        user_count = (
+            select(func.count(User.id))
+            .where(User.company_id == Company.id)
+            .correlate(Company)
+            .scalar_subquery()
+        )
+        dept_count = (
+            select(func.count(Department.id))
+            .where(Department.company_id == Company.id)
+            .correlate(Company)
+            .scalar_subquery()
+        )
+        return (
+            select(Company, creator.name, user_count, dept_count)
+            .outerjoin(creator, creator.id == Company.creator_user_id)
+        )
+
+    @staticmethod
+    def _summary_dict(company: Company, creator_name: str | None, user_count: int, dept_count: int) -> dict:
+        return {
+            "id": company.id,
+            "name": company.name,
+            "description": company.description,
+            "domain": company.domain,
+            "inviteCode": company.invite_code,
+            "isActive": company.is_active,
+            "createdAt": company.created_at.isoformat() if company.created_at else None,
+            "updatedAt": company.updated_at.isoformat() if company.updated_at else None,
+            "creatorUserId": company.creator_user_id,
+            "creatorName": creator_name,
+            "userCount": user_count or 0,
+            "departmentCount": dept_count or 0,
+            "organizationCount": 0  # 暂时设为0，如果需要可以后续添加查询
+        }
+
+    async def list_company_summaries(
+        self,
+        creator_user_id: int | None = None,
+        active_only: bool = False,
+        search: str | None = None,
+        page: int | None = None,
+        per_page: int = 20,
+        use_cache: bool = True,
+    ) -> tuple[list[dict], int]:
+        """获取公司摘要列表，返回 (当前页数据, 总数)；page 为 None 时返回全部."""
+        search = search.strip() if search else None
+        cache_key = (creator_user_id, active_only, search, page, per_page if page else None)
+        if use_cache:
+            await invalidation_bus.poll(self.db)
+            cached = _company_list_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        filters = []
+        if creator_user_id is not None:
+            filters.append(Company.creator_user_id == creator_user_id)
+        if active_only:
+            filters.append(Company.is_active)
+        if search:
+            search_term = f"%{search}%"
+            filters.append(
+                Company.name.ilike(search_term) |
+                Company.description.ilike(search_term) |
+                Company.domain.ilike(search_term)
+            )
+
+        query = self._summary_query().where(*filters).order_by(Company.created_at.desc(), Company.id.desc())
+        if page is not None:
+            query = query.offset((page - 1) * per_page).limit(per_page)
+        rows = (await self.db.execute(query)).all()
+        items = [self._summary_dict(*row) for row in rows]
+
+        if page is None or (page == 1 and len(items) < per_page):
+            total = len(items)
+        else:
+            total = await self.db.scalar(select(func.count(Company.id)).where(*filters)) or 0
+
+        result = (items, total)
+        if use_cache:
+            _company_list_cache.set(cache_key, result)
+        return result
+
+    async def get_company_summary(self, company_id: int) -> dict | None:
+        """获取单个公司的摘要."""
+        row = (await self.db.execute(self._summary_query().where(Company.id == company_id))).first()
+        return self._summary_dict(*row) if row else None
@@ -1,12 +1,24 @@
 """积分系统一致性检查服务."""
 import logging
+import uuid
 from datetime import datetime, timedelta
 from typing import Any, Optional
 
-from app.models.scoring import PointDispute, PointPurchase, PointTransaction
+from app.core.cache import invalidation_bus
+from app.models.scoring import (
+    PointBalance,
+    PointDispute,
+    PointPurchase,
+    PointTransaction,
+)
 from app.models.user import User
-from app.services.point_service import PointService
-from sqlalchemy import func, select
+from app.services.point_service import (
+    BALANCE_CACHE_NAME,
+    PointService,
+    invalidate_user_balance_cache,
+    mark_balance_dirty,
+)
+from sqlalchemy import and_, func, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
@@ -20,72 +32,80 @@ class ConsistencyService:
         self.point_service = PointService(db)
 
     async def check_user_balance_consistency(self, user_id: Optional[int] = None) -> list[dict[str, Any]]:
-        """检查用户积分余额一致性."""
-        inconsistencies = []
-
-        # 构建查询条件
+        """检查用户积分余额一致性.
+
+        一条聚合查询：users 左连接按用户汇总的流水金额，只返回不一致的用户.
+        """
+        ledger = (
+            select(PointTransaction.user_id, func.sum(PointTransaction.amount).label("total"))
+            .group_by(PointTransaction.user_id)
+            .subquery()
+        )
+        calculated = func.coalesce(ledger.c.total, 0)
+        query = (
+            select(User.id, User.name, User.points, calculated.label("calculated"))
+            .outerjoin(ledger, ledger.c.user_id == User.id)
+            .where(User.points.is_(None) | (User.points != calculated))
+            .order_by(User.id)
+        )
         if user_id:
-            user_filter = User.id == user_id
-        else:
-            user_filter = True
+            query = query.where(User.id == user_id)
 
-        # 获取所有用户的积分信息
-        result = await self.db.execute(
-            select(User.id, User.name, User.points)
-            .filter(user_filter)
-        )
-        users = result.fetchall()
-
-        for user_id, user_name, user_points in users:
-            # 计算实际积分余额
-            calculated_balance = await self.point_service.calculate_user_balance(user_id)
-
-            if user_points != calculated_balance:
-                inconsistencies.append({
-                    "userId": user_id,
-                    "userName": user_name,
-                    "userTablePoints": user_points or 0,
-                    "calculatedPoints": calculated_balance,
-                    "difference": (user_points or 0) - calculated_balance,
-                    "type": "balance_mismatch"
-                })
+        inconsistencies = []
+        for uid, user_name, user_points, calculated_balance in (await self.db.execute(query)).all():
+            calculated_balance = int(calculated_balance)
+            inconsistencies.append({
+                "userId": uid,
+                "userName": user_name,
+                "userTablePoints": user_points or 0,
+                "calculatedPoints": calculated_balance,
+                "difference": (user_points or 0) - calculated_balance,
+                "type": "balance_mismatch"
+            })
 
         return inconsistencies
 
-    async def check_transaction_sequence_consistency(self) -> list[dict[str, Any]]:
-        """检查交易序列一致性."""
-        inconsistencies = []
+    async def check_transaction_sequence_consistency(
+        self,
+        limit: int | None = None,
+        chunk_size: int = 5000,
+    ) -> list[dict[str, Any]]:
+        """检查交易序列一致性.
+
+        账本按 (user_id, company_id) 分区、按 (created_at, id) 排序，由窗口函数在数据库中
+        累计余额，只把 balance_after 与累计值不符的交易分批流式读回，内存占用与流水规模无关。
+        limit 限制返回的问题条数.
+        """
+        partition = (PointTransaction.user_id, PointTransaction.company_id)
+        ordering = (PointTransaction.created_at, PointTransaction.id)
+        replay = select(
+            PointTransaction.id,
+            PointTransaction.user_id,
+            PointTransaction.company_id,
+            PointTransaction.balance_after,
+            PointTransaction.created_at,
+            func.sum(PointTransaction.amount).over(partition_by=partition, order_by=ordering).label("expected_balance"),
+            (func.row_number().over(partition_by=partition, order_by=ordering) - 1).label("transaction_index"),
+        ).subquery()
+
+        stmt = select(replay).where(replay.c.balance_after != replay.c.expected_balance)
+        if limit is not None:
+            stmt = stmt.limit(limit)
 
-        # 获取所有用户的交易记录，按时间排序
-        result = await self.db.execute(
-            select(PointTransaction)
-            .order_by(PointTransaction.user_id, PointTransaction.created_at)
-        )
-        transactions = result.scalars().all()
-
-        # 按用户分组检查
-        user_transactions = {}
-        for transaction in transactions:
-            if transaction.user_id not in user_transactions:
-                user_transactions[transaction.user_id] = []
-            user_transactions[transaction.user_id].append(transaction)
-
-        for user_id, user_txns in user_transactions.items():
-            running_balance = 0
-            for i, txn in enumerate(user_txns):
-                running_balance += txn.amount
-
-                if txn.balance_after != running_balance:
-                    inconsistencies.append({
-                        "userId": user_id,
-                        "transactionId": txn.id,
-                        "transactionIndex": i,
-                        "expectedBalance": running_balance,
-                        "recordedBalance": txn.balance_after,
-                        "difference": txn.balance_after - running_balance,
-                        "type": "sequence_mismatch",
-                        "createdAt": txn.created_at.isoformat()
-                    })
+        inconsistencies = []
+        result = await self.db.stream(stmt.execution_options(yield_per=chunk_size))
+        async for row in result:
+            inconsistencies.append({
+                "userId": row.user_id,
+                "companyId": row.company_id,
+                "transactionId": row.id,
+                "transactionIndex": row.transaction_index,
+                "expectedBalance": row.expected_balance,
+                "recordedBalance": row.balance_after,
+                "difference": row.balance_after - row.expected_balance,
+                "type": "sequence_mismatch",
+                "createdAt": row.created_at.isoformat() if row.created_at else None
+            })
 
         return inconsistencies
 
@@ -224,8 +244,9 @@ class ConsistencyService:
         old_balance = user.points or 0
 
         if old_balance != correct_balance:
-            # 更新用户余额
+            # 更新用户余额，并以流水为准重建各公司余额行
             user.points = correct_balance
+            await self.point_service.rebuild_balance_ledger(user_id)
             await self.db.commit()
 
             logger.info(f"修复用户 {user_id} 积分余额: {old_balance} -> {correct_balance}")
@@ -245,25 +266,103 @@ class ConsistencyService:
                 "message": "余额已一致，无需修复"
             }
 
-    async def fix_all_balance_inconsistencies(self) -> list[dict[str, Any]]:
-        """修复所有用户积分余额不一致问题."""
-        inconsistencies = await self.check_user_balance_consistency()
+    async def fix_all_balance_inconsistencies(
+        self,
+        inconsistencies: list[dict[str, Any]] | None = None,
+        batch_size: int = 500,
+    ) -> list[dict[str, Any]]:
+        """修复所有用户积分余额不一致问题.
+
+        以流水为准分批批量更新：每批用两条 UPDATE 分别重算 users.points 与
+        point_balances，补齐缺失的余额行，每批提交一次。
+        已执行过检查的调用方可传入 inconsistencies，避免重复聚合.
+        """
+        if inconsistencies is None:
+            inconsistencies = await self.check_user_balance_consistency()
         fixed_results = []
 
-        for issue in inconsistencies:
+        for start in range(0, len(inconsistencies), batch_size):
+            batch = inconsistencies[start:start + batch_size]
+            user_ids = [issue["userId"] for issue in batch]
             try:
-                result = await self.fix_user_balance_inconsistency(issue["userId"])
-                fixed_results.append(result)
+                await self._rebuild_balances_bulk(user_ids)
+                await self.db.commit()
             except Exception as e:
-                logger.error(f"修复用户 {issue['userId']} 积分余额失败: {e}")
+                await self.db.rollback()
+                logger.error(f"批量修复用户积分余额失败 ({len(user_ids)} 个用户): {e}")
+                fixed_results.extend({"userId": uid, "fixed": False, "error": str(e)} for uid in user_ids)
+                continue
+
+            for issue in batch:
                 fixed_results.append({
                     "userId": issue["userId"],
-                    "fixed": False,
-                    "error": str(e)
+                    "oldBalance": issue["userTablePoints"],
+                    "newBalance": issue["calculatedPoints"],
+                    "difference": issue["calculatedPoints"] - issue["userTablePoints"],
+                    "fixed": True
                 })
 
+        fixed_count = sum(1 for r in fixed_results if r["fixed"])
+        if fixed_count:
+            logger.info(f"批量修复积分余额完成: {fixed_count}/{len(inconsistencies)} 个用户")
+
         return fixed_results
 
+    async def _rebuild_balances_bulk(self, user_ids: list[int]) -> None:
+        """以流水为准重算一批用户的 users.points 与各公司余额行（不提交）."""
+        for uid in user_ids:
+            mark_balance_dirty(self.db, uid)
+        now = datetime.utcnow().replace(microsecond=0)
+
+        user_total = (
+            select(func.coalesce(func.sum(PointTransaction.amount), 0))
+            .where(PointTransaction.user_id == User.id)
+            .scalar_subquery()
+        )
+        await self.db.execute(
+            update(User)
+            .where(User.id.in_(user_ids))
+            .values(points=user_total)
+            .execution_options(synchronize_session=False)
+        )
+
+        company_total = (
+            select(func.coalesce(func.sum(PointTransaction.amount), 0))
+            .where(
+                PointTransaction.user_id == PointBalance.user_id,
+                PointTransaction.company_id.is_not_distinct_from(PointBalance.company_id),
+            )
+            .scalar_subquery()
+        )
+        await self.db.execute(
+            update(PointBalance)
+            .where(PointBalance.user_id.in_(user_ids))
+            .values(balance=company_total, version=PointBalance.version + 1, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+        # 有流水但尚未建立余额行的 (用户, 公司)
+        missing = await self.db.execute(
+            select(PointTransaction.user_id, PointTransaction.company_id, func.sum(PointTransaction.amount))
+            .outerjoin(PointBalance, and_(
+                PointBalance.user_id == PointTransaction.user_id,
+                PointBalance.company_id.is_not_distinct_from(PointTransaction.company_id),
+            ))
+            .where(PointTransaction.user_id.in_(user_ids), PointBalance.id.is_(None))
+            .group_by(PointTransaction.user_id, PointTransaction.company_id)
+        )
+        rows = [
+            {"id": str(uuid.uuid4()), "user_id": uid, "company_id": company_id,
+             "balance": int(total or 0), "version": 0, "updated_at": now}
+            for uid, company_id, total in missing.all()
+        ]
+        if rows:
+            await self.db.execute(insert(PointBalance), rows)
+
+        for uid in user_ids:
+            invalidate_user_balance_cache(uid)
+        await invalidation_bus.publish_many(self.db, BALANCE_CACHE_NAME, [str(uid) for uid in user_ids])
+
     async def get_system_health_metrics(self) -> dict[str, Any]:
         """获取系统健康指标."""
         # 总用户数
@@ -1,17 +1,110 @@
 """等级服务层 - 处理用户等级相关的业务逻辑."""
 import logging
+import time
 import uuid
+from bisect import bisect_right
+from collections.abc import Sequence
 from datetime import datetime
 from typing import Any, Optional
 
+from app.core.cache import invalidation_bus
+from app.models.cache_invalidation import CacheInvalidation
 from app.models.scoring import UserLevel
 from app.models.user import User
-from sqlalchemy import asc, desc, func, select
+from sqlalchemy import asc, case, event, func, literal, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import Session, joinedload
 
 logger = logging.getLogger(__name__)
 
+USER_LEVELS_CACHE_NAME = "user_levels"
+
+# 等级ID与数字等级的对应关系（用于兼容 users.level 字段）
+NUMERIC_LEVELS = {
+    'level_1': 1,
+    'level_2': 2,
+    'level_3': 3,
+    'level_4': 4,
+    'level_5': 5
+}
+
+
+class LevelIndex:
+    """不可变的等级索引：按 min_points 排序，用 bisect 查找积分对应的等级.
+
+    保存的是脱离会话的 UserLevel 快照，只读使用；比较等级时应比较 id。
+    """
+
+    __slots__ = ("version", "levels", "_min_points", "_by_id")
+
+    def __init__(self, levels: Sequence[UserLevel], version: int):
+        """按 min_points 排序等级并建立索引."""
+        self.version = version
+        self.levels = tuple(sorted(levels, key=lambda level: level.min_points))
+        self._min_points = [level.min_points for level in self.levels]
+        self._by_id = {level.id: level for level in self.levels}
+
+    def __len__(self) -> int:
+        """返回等级数量."""
+        return len(self.levels)
+
+    def get(self, level_id: str | None) -> UserLevel | None:
+        """按 id 获取等级，不存在时返回 None."""
+        return self._by_id.get(level_id) if level_id is not None else None
+
+    def level_for_points(self, points: int) -> UserLevel | None:
+        """min_points <= points <= max_points 中 min_points 最大的等级."""
+        idx = bisect_right(self._min_points, points)
+        while idx > 0:
+            idx -= 1
+            level = self.levels[idx]
+            if level.max_points is None or level.max_points >= points:
+                return level
+        return None
+
+    def next_level(self, points: int) -> UserLevel | None:
+        """min_points 大于 points 的第一个等级."""
+        idx = bisect_right(self._min_points, points)
+        return self.levels[idx] if idx < len(self.levels) else None
+
+
+# 进程内等级索引；等级表变更提交后失效，下次访问时重新加载
+_level_index: LevelIndex | None = None
+_level_index_version = 0
+
+
+def invalidate_level_index() -> None:
+    """使进程内等级索引失效，下次访问时重新加载."""
+    global _level_index, _level_index_version
+    _level_index = None
+    _level_index_version += 1
+
+
+invalidation_bus.subscribe(USER_LEVELS_CACHE_NAME, lambda key: invalidate_level_index())
+
+_LEVELS_DIRTY_FLAG = "user_levels_dirty"
+
+
+@event.listens_for(Session, "before_flush")
+def _track_level_mutations(session: Session, flush_context, instances):
+    """等级表发生增删改时登记跨进程失效，提交后清理本进程索引."""
+    if session.info.get(_LEVELS_DIRTY_FLAG):
+        return
+    if any(isinstance(obj, UserLevel) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_LEVELS_DIRTY_FLAG] = True
+        session.add(CacheInvalidation(cache_name=USER_LEVELS_CACHE_NAME, cache_key="*"))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_level_index_on_commit(session: Session):
+    if session.info.pop(_LEVELS_DIRTY_FLAG, False):
+        invalidate_level_index()
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_level_flag(session: Session):
+    session.info.pop(_LEVELS_DIRTY_FLAG, None)
+
 
 class LevelRuleEngine:
     """等级规则引擎."""
@@ -69,6 +162,34 @@ class LevelService:
         self.db = db
         self.rule_engine = LevelRuleEngine()
 
+    async def get_level_index(self) -> LevelIndex:
+        """获取进程内等级索引，必要时从数据库加载."""
+        global _level_index
+        await invalidation_bus.poll(self.db)
+        index = _level_index
+        if index is not None:
+            return index
+
+        version = _level_index_version
+        result = await self.db.execute(
+            select(
+                UserLevel.id,
+                UserLevel.name,
+                UserLevel.min_points,
+                UserLevel.max_points,
+                UserLevel.benefits,
+                UserLevel.icon,
+                UserLevel.color,
+                UserLevel.created_at,
+            )
+        )
+        # 构造不属于任何会话的快照，避免与调用方会话中的实例相互影响
+        levels = [UserLevel(**row._asdict()) for row in result.all()]
+        index = LevelIndex(levels, version)
+        if version == _level_index_version:
+            _level_index = index
+        return index
+
     async def get_all_levels(self) -> list[UserLevel]:
         """获取所有等级."""
         result = await self.db.execute(
@@ -181,26 +302,11 @@ class LevelService:
 
     async def get_level_by_points(self, points: int) -> Optional[UserLevel]:
         """根据积分获取对应等级."""
-        result = await self.db.execute(
-            select(UserLevel)
-            .filter(
-                UserLevel.min_points <= points,
-                (UserLevel.max_points.is_(None)) | (UserLevel.max_points >= points)
-            )
-            .order_by(desc(UserLevel.min_points))
-            .limit(1)
-        )
-        return result.scalar()
+        return (await self.get_level_index()).level_for_points(points)
 
     async def get_next_level(self, current_points: int) -> Optional[UserLevel]:
         """获取下一个等级."""
-        result = await self.db.execute(
-            select(UserLevel)
-            .filter(UserLevel.min_points > current_points)
-            .order_by(asc(UserLevel.min_points))
-            .limit(1)
-        )
-        return result.scalar()
+        return (await self.get_level_index()).next_level(current_points)
 
     async def get_user_level_info(self, user_id: int) -> dict[str, Any]:
         """获取用户等级详细信息（返回前端展示格式）."""
@@ -277,53 +383,198 @@ class LevelService:
 
     async def auto_upgrade_all_users(self) -> dict[str, Any]:
         """自动为所有用户检查并升级等级."""
-        # 获取所有用户
-        result = await self.db.execute(select(User))
-        users = result.scalars().all()
-
-        upgrade_results = []
-        for user in users:
-            try:
-                level_changed, old_level, new_level = await self.check_level_upgrade(user.id, user.points or 0)
-                if level_changed:
-                    upgrade_results.append({
-                        "userId": user.id,
-                        "userName": user.name,
-                        "oldLevel": old_level.name if old_level else "无",
-                        "newLevel": new_level.name if new_level else "无",
-                        "points": user.points or 0
-                    })
-            except Exception as e:
-                logger.error(f"用户 {user.id} 等级升级检查失败: {e}")
+        summary = await self.recompute_all_levels()
+        return {
+            "totalUsers": summary["totalUsers"],
+            "upgradedUsers": summary["changedUsers"],
+            "upgrades": summary.pop("changes"),
+            "summary": summary
+        }
+
+    def _target_level_case(self, index: LevelIndex, value: str = "id"):
+        """按积分区间计算目标等级的 CASE 表达式，匹配规则与 LevelIndex.level_for_points 一致."""
+        points = func.coalesce(User.points, 0)
+        whens = []
+        # min_points 从大到小，第一个满足区间的等级即为目标
+        for level in reversed(index.levels):
+            condition = points >= level.min_points
+            if level.max_points is not None:
+                condition = condition & (points <= level.max_points)
+            whens.append((condition, level.id if value == "id" else self._calculate_numeric_level(level)))
+        default = None if value == "id" else 1
+        if not whens:
+            return literal(default)
+        return case(*whens, else_=default)
+
+    async def recompute_all_levels(
+        self,
+        notify: bool = True,
+        notification_batch_size: int = 1000,
+        max_changes_listed: int = 1000,
+    ) -> dict[str, Any]:
+        """集合式重算全部用户等级.
+
+        目标等级由 CASE 表达式在 SQL 中按积分区间计算：差异汇总按 (原等级, 目标等级) 聚合，
+        只读回前 max_changes_listed 条明细；全部变化用一条 UPDATE 写入，
+        需要通知时再分批写入并推送等级变化通知。
+        """
+        start = time.perf_counter()
+        index = await self.get_level_index()
+        target_id = self._target_level_case(index)
+        is_changed = User.level_id.is_distinct_from(target_id)
+
+        total_users = await self.db.scalar(select(func.count(User.id))) or 0
+        # 差异汇总只按 (原等级, 目标等级) 聚合，不把全部用户读回 Python
+        transition_rows = (await self.db.execute(
+            select(User.level_id, target_id.label("target_id"), func.count(User.id))
+            .where(is_changed)
+            .group_by(User.level_id, target_id)
+        )).all()
+        changed_count = sum(count for _, _, count in transition_rows)
+
+        changes = []
+        notify_rows = []
+        if changed_count:
+            sample = (await self.db.execute(
+                select(User.id, User.name, User.points, User.level_id, target_id)
+                .where(is_changed)
+                .order_by(User.id)
+                .limit(max_changes_listed)
+            )).all()
+            changes = [
+                {
+                    "userId": user_id,
+                    "userName": user_name,
+                    "oldLevel": index.get(old_id).name if index.get(old_id) else "无",
+                    "newLevel": index.get(new_id).name if index.get(new_id) else "无",
+                    "points": points or 0
+                }
+                for user_id, user_name, points, old_id, new_id in sample
+            ]
+            if notify:
+                notify_rows = (await self.db.execute(
+                    select(User.id, User.level_id, target_id).where(is_changed, target_id.is_not(None))
+                )).all()
+
+            await self.db.execute(
+                update(User)
+                .where(is_changed)
+                .values(level_id=target_id, level=self._target_level_case(index, value="numeric"))
+                .execution_options(synchronize_session=False)
+            )
+        await self.db.commit()
+
+        def is_upgrade(old_id: str | None, new_id: str | None) -> bool:
+            old_level, new_level = index.get(old_id), index.get(new_id)
+            return new_level is not None and (old_level is None or new_level.min_points > old_level.min_points)
+
+        upgraded = sum(count for old_id, new_id, count in transition_rows if is_upgrade(old_id, new_id))
+
+        notified = 0
+        if notify_rows:
+            from app.services.notification_service import NotificationService
+            notifications = [
+                self._level_change_notification(user_id, index.get(old_id), index.get(new_id), is_upgrade(old_id, new_id))
+                for user_id, old_id, new_id in notify_rows
+            ]
+            notified = await NotificationService(self.db).create_notifications_bulk(
+                notifications, batch_size=notification_batch_size
+            )
+
+        duration_ms = round((time.perf_counter() - start) * 1000, 1)
+        logger.info(f"批量重算用户等级完成: {changed_count}/{total_users} 个用户等级变化，耗时 {duration_ms}ms")
 
         return {
-            "totalUsers": len(users),
-            "upgradedUsers": len(upgrade_results),
-            "upgrades": upgrade_results
+            "totalUsers": total_users,
+            "changedUsers": changed_count,
+            "upgraded": upgraded,
+            "downgraded": changed_count - upgraded,
+            "notified": notified,
+            "transitions": [
+                {
+                    "from": index.get(old_id).name if index.get(old_id) else "无",
+                    "to": index.get(new_id).name if index.get(new_id) else "无",
+                    "count": count
+                }
+                for old_id, new_id, count in sorted(transition_rows, key=lambda row: -row[2])
+            ],
+            "changes": changes,
+            "changesTruncated": changed_count > len(changes),
+            "durationMs": duration_ms
         }
 
-    async def check_level_upgrade(self, user_id: int, new_points: int) -> tuple[bool, Optional[UserLevel], Optional[UserLevel]]:
-        """检查用户是否升级."""
-        # 获取用户当前等级
-        user_result = await self.db.execute(
-            select(User).options(joinedload(User.user_level)).filter(User.id == user_id)
+    @staticmethod
+    def _level_change_notification(
+        user_id: int,
+        old_level: UserLevel | None,
+        new_level: UserLevel,
+        is_upgrade: bool,
+    ) -> dict[str, Any]:
+        from app.models.notification import NotificationCategory
+
+        return {
+            "user_id": user_id,
+            "category": NotificationCategory.ACHIEVEMENT if is_upgrade else NotificationCategory.SYSTEM,
+            "title": "等级提升" if is_upgrade else "等级调整",
+            "summary": f"您的等级已{'提升' if is_upgrade else '调整'}为「{new_level.name}」",
+            "payload": {
+                "oldLevel": old_level.name if old_level else None,
+                "newLevel": new_level.name,
+                "newLevelId": new_level.id,
+            },
+            "action_url": "/profile",
+            "action_label": "查看等级",
+            "source": "level_system",
+            "tags": ["level", "upgrade" if is_upgrade else "downgrade"],
+        }
+
+    async def _apply_level_changes(self, changes: list[tuple[int, UserLevel | None]]) -> None:
+        """按主键批量更新用户等级（不提交）."""
+        if not changes:
+            return
+        await self.db.execute(
+            update(User),
+            [
+                {
+                    "id": user_id,
+                    "level_id": level.id if level else None,
+                    "level": self._calculate_numeric_level(level) if level else 1,
+                }
+                for user_id, level in changes
+            ],
         )
-        user = user_result.scalar()
 
-        if not user:
+    async def check_level_upgrade(
+        self, user_id: int, new_points: int, commit: bool = True
+    ) -> tuple[bool, UserLevel | None, UserLevel | None]:
+        """检查用户是否升级；commit=False 时等级更新随调用方事务提交."""
+        # 获取用户当前等级
+        user_result = await self.db.execute(select(User.level_id).filter(User.id == user_id))
+        row = user_result.first()
+
+        if row is None:
             raise ValueError(f"用户 {user_id} 不存在")
 
-        old_level = user.user_level
-        new_level = await self.get_level_by_points(new_points)
+        index = await self.get_level_index()
+        old_level = index.get(row.level_id)
+        new_level = index.level_for_points(new_points)
+        new_level_id = new_level.id if new_level else None
 
         # 检查是否需要更新等级
         level_changed = False
-        if old_level != new_level:
+        if row.level_id != new_level_id:
             level_changed = True
             # 更新用户等级
-            user.level_id = new_level.id if new_level else None
-            user.level = self._calculate_numeric_level(new_level) if new_level else 1
-            await self.db.commit()
+            await self.db.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(
+                    level_id=new_level_id,
+                    level=self._calculate_numeric_level(new_level) if new_level else 1,
+                )
+            )
+            if commit:
+                await self.db.commit()
 
             logger.info(f"用户 {user_id} 等级变化: {old_level.name if old_level else '无'} -> {new_level.name if new_level else '无'}")
 
@@ -334,16 +585,8 @@ class LevelService:
         if not level:
             return 1
 
-        # 根据等级ID或最小积分计算数字等级
-        level_mapping = {
-            'level_1': 1,
-            'level_2': 2,
-            'level_3': 3,
-            'level_4': 4,
-            'level_5': 5
-        }
-
-        return level_mapping.get(level.id, 1)
+        # 根据等级ID计算数字等级
+        return NUMERIC_LEVELS.get(level.id, 1)
 
     async def get_level_statistics(self) -> dict[str, Any]:
         """获取等级统计信息."""
@@ -424,22 +667,20 @@ class LevelService:
 
     async def update_all_user_levels(self) -> int:
         """批量更新所有用户的等级."""
-        # 获取所有用户
+        index = await self.get_level_index()
         users_result = await self.db.execute(
-            select(User).filter(User.points > 0)
+            select(User.id, User.points, User.level_id).filter(User.points > 0)
         )
-        users = users_result.scalars().all()
-
-        updated_count = 0
 
-        for user in users:
-            correct_level = await self.get_level_by_points(user.points)
-            if user.level_id != (correct_level.id if correct_level else None):
-                user.level_id = correct_level.id if correct_level else None
-                user.level = self._calculate_numeric_level(correct_level) if correct_level else 1
-                updated_count += 1
+        changes = []
+        for user_id, points, level_id in users_result.all():
+            correct_level = index.level_for_points(points)
+            if level_id != (correct_level.id if correct_level else None):
+                changes.append((user_id, correct_level))
 
+        await self._apply_level_changes(changes)
         await self.db.commit()
+        updated_count = len(changes)
         logger.info(f"批量更新用户等级完成，共更新 {updated_count} 个用户")
 
         return updated_count
@@ -0,0 +1,233 @@
+"""商城商品全文检索 - 基于 SQLite FTS5 的倒排索引.
+
+- 分词：英文/数字按单词小写切分；中文等 CJK 文本同时索引单字与相邻二字（bigram），
+  查询时多字词用 bigram 匹配，单字用单字匹配，无需外部分词库
+- 排序：FTS5 内置 bm25()，名称、简介、标签、描述按不同权重计分
+- 总数：与分页查询使用同一组条件单独 COUNT，返回真实命中数
+- 高亮：在原文上定位查询词，返回 [start, end) 偏移
+- 同步：商品创建/更新/删除时由 MallService 在同一事务内更新索引行；
+  索引表为空而商品表不为空时自动全量重建
+
+数据库不是 SQLite 或不支持 FTS5 时 is_available 为 False，调用方回退到 LIKE 查询。
+"""
+import re
+from collections.abc import Iterable
+from typing import Any
+
+from app.core.logging_config import logger
+from app.models.reward import MallItem
+from sqlalchemy import column, func, literal_column, select, table, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+FTS_TABLE = "mall_items_fts"
+fts_table = table(FTS_TABLE, column("item_id"))
+
+# bm25 列权重：item_id(不参与), name, short_description, tags, description
+BM25_WEIGHTS = (0.0, 10.0, 4.0, 3.0, 1.0)
+
+REBUILD_BATCH_SIZE = 2000
+
+_CJK = "㐀-䶿一-鿿豈-﫿"
+_TOKEN_RE = re.compile(f"[{_CJK}]+|[a-z0-9]+")
+_CJK_RE = re.compile(f"[{_CJK}]")
+
+
+def _is_cjk(token: str) -> bool:
+    return _CJK_RE.match(token) is not None
+
+
+def tokenize(text_value: str | None) -> list[str]:
+    """索引分词：单词、CJK 单字与 bigram."""
+    if not text_value:
+        return []
+    tokens = []
+    for match in _TOKEN_RE.finditer(text_value.lower()):
+        run = match.group()
+        if not _is_cjk(run):
+            tokens.append(run)
+            continue
+        tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def query_terms(query: str) -> list[str]:
+    """查询分词：多字 CJK 片段只取 bigram，单字保留单字."""
+    terms = []
+    for match in _TOKEN_RE.finditer(query.lower()):
+        run = match.group()
+        if _is_cjk(run) and len(run) > 1:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            terms.append(run)
+    return list(dict.fromkeys(terms))
+
+
+def build_match_expression(query: str) -> str | None:
+    """构造 FTS5 MATCH 表达式：所有词须同时命中，末尾的英文词按前缀匹配."""
+    terms = query_terms(query)
+    if not terms:
+        return None
+    parts = [f'"{term}"' for term in terms]
+    if not _is_cjk(terms[-1]) and query.rstrip()[-1:].isalnum():
+        parts[-1] += "*"
+    return " AND ".join(parts)
+
+
+def highlight_offsets(text_value: str | None, query: str) -> list[list[int]]:
+    """在原文中定位查询片段（忽略大小写），返回合并后的 [start, end) 区间."""
+    if not text_value:
+        return []
+    lowered = text_value.lower()
+    spans = []
+    for match in _TOKEN_RE.finditer(query.lower()):
+        needle = match.group()
+        start = lowered.find(needle)
+        while start != -1:
+            spans.append([start, start + len(needle)])
+            start = lowered.find(needle, start + len(needle))
+    spans.sort()
+    merged: list[list[int]] = []
+    for span in spans:
+        if merged and span[0] <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], span[1])
+        else:
+            merged.append(span)
+    return merged
+
+
+def _document(item_id: str, name: str | None, short_description: str | None,
+              tags: Any, description: str | None) -> dict[str, str]:
+    tag_text = " ".join(str(tag) for tag in tags) if isinstance(tags, list) else (tags or "")
+    return {
+        "item_id": item_id,
+        "name": " ".join(tokenize(name)),
+        "short_description": " ".join(tokenize(short_description)),
+        "tags": " ".join(tokenize(tag_text)),
+        "description": " ".join(tokenize(description)),
+    }
+
+
+_INSERT_SQL = text(
+    f"INSERT INTO {FTS_TABLE} (item_id, name, short_description, tags, description)"
+    " VALUES (:item_id, :name, :short_description, :tags, :description)"
+)
+_DELETE_SQL = text(f"DELETE FROM {FTS_TABLE} WHERE item_id = :item_id")
+
+
+class MallSearchIndex:
+    """商品全文检索索引."""
+
+    def __init__(self):
+        """初始化索引状态；可用性在首次调用 ensure 时确定."""
+        self._available: bool | None = None
+
+    @property
+    def is_available(self) -> bool:
+        """索引是否可用."""
+        return bool(self._available)
+
+    async def ensure(self, db: AsyncSession) -> bool:
+        """确保索引表存在（首次调用时创建并按需重建），返回索引是否可用."""
+        if self._available is not None:
+            return self._available
+        engine = db.bind
+        if engine is None or engine.dialect.name != "sqlite":
+            self._available = False
+            return False
+        try:
+            # 使用独立连接建表，避免把 DDL 混入调用方事务
+            async with engine.begin() as conn:
+                await conn.execute(text(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                    "item_id UNINDEXED, name, short_description, tags, description,"
+                    " tokenize='unicode61 remove_diacritics 2')"
+                ))
+                indexed = (await conn.execute(text(f"SELECT count(*) FROM {FTS_TABLE}"))).scalar()
+                if not indexed and (await conn.execute(select(func.count(MallItem.id)))).scalar():
+                    await self.rebuild(conn)
+        except OperationalError as e:
+            logger.warning(f"[商城搜索] 索引不可用，回退到 LIKE 查询: {e}")
+            # 仅在确认不支持 FTS5 时停止重试，锁等待等临时错误下次调用再试
+            if "fts5" in str(e):
+                self._available = False
+            return False
+        self._available = True
+        return True
+
+    async def rebuild(self, conn: AsyncConnection) -> int:
+        """全量重建索引，返回索引的商品数."""
+        await conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        result = await conn.stream(
+            select(MallItem.id, MallItem.name, MallItem.short_description, MallItem.tags, MallItem.description)
+            .where(MallItem.deleted_at.is_(None))
+        )
+        total = 0
+        async for rows in result.partitions(REBUILD_BATCH_SIZE):
+            await conn.execute(_INSERT_SQL, [_document(*row) for row in rows])
+            total += len(rows)
+        logger.info(f"[商城搜索] 已重建索引，共 {total} 个商品")
+        return total
+
+    async def index_items(self, db: AsyncSession, items: Iterable[MallItem]) -> None:
+        """在调用方事务内写入/更新商品的索引行."""
+        if not await self.ensure(db):
+            return
+        docs = [
+            _document(item.id, item.name, item.short_description, item.tags, item.description)
+            for item in items
+        ]
+        if not docs:
+            return
+        await db.execute(_DELETE_SQL, [{"item_id": doc["item_id"]} for doc in docs])
+        await db.execute(_INSERT_SQL, docs)
+
+    async def remove_item(self, db: AsyncSession, item_id: str) -> None:
+        """在调用方事务内删除商品的索引行."""
+        if not await self.ensure(db):
+            return
+        await db.execute(_DELETE_SQL, {"item_id": item_id})
+
+    async def search(
+        self,
+        db: AsyncSession,
+        query: str,
+        filters: list,
+        order_by: list | None = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> tuple[list[tuple[MallItem, float]], int]:
+        """全文检索，返回 ([(商品, bm25 分数)], 命中总数)；bm25 分数越小越相关."""
+        match = build_match_expression(query)
+        if match is None:
+            return [], 0
+
+        fts = literal_column(FTS_TABLE)
+        rank = func.bm25(fts, *BM25_WEIGHTS).label("rank")
+        conditions = [fts.op("MATCH")(match), *filters]
+
+        total = await db.scalar(
+            select(func.count())
+            .select_from(fts_table)
+            .join(MallItem, MallItem.id == fts_table.c.item_id)
+            .where(*conditions)
+        ) or 0
+        if total == 0:
+            return [], 0
+
+        stmt = (
+            select(MallItem, rank)
+            .select_from(fts_table)
+            .join(MallItem, MallItem.id == fts_table.c.item_id)
+            .where(*conditions)
+            .order_by(*(order_by or [rank]))
+            .limit(limit)
+            .offset(offset)
+        )
+        rows = (await db.execute(stmt)).all()
+        return [(item, score) for item, score in rows], total
+
+
+# 全局商品检索索引
+mall_search_index = MallSearchIndex()
@@ -2,19 +2,42 @@
 import logging
 import random
 import string
-from datetime import datetime, timedelta, timezone
+import uuid
+from datetime import UTC, datetime, timedelta, timezone
 from typing import Any, Optional
 
+from app.core.config import settings
+from app.core.counter_buffer import CounterBuffer
 from app.models.reward import MallCategory, MallItem
 from app.models.scoring import PointPurchase, PurchaseStatus
-from app.services.notification_service import NotificationService
-from app.services.point_service import PointConverter, PointService
+from app.services.mall_search import mall_search_index
+from app.services.notification_service import (
+    NotificationService,
+    defer_redemption_notification,
+)
+from app.services.point_service import (
+    PointConverter,
+    PointService,
+    invalidate_user_balance_cache,
+)
+from app.services.recommendation_service import RecommendationService
 from sqlalchemy import and_, desc, func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, sessionmaker
 
 logger = logging.getLogger(__name__)
 
+# 商品浏览量写回缓冲，随应用启动/关闭
+view_count_buffer = CounterBuffer(
+    MallItem.view_count,
+    MallItem.id,
+    flush_interval=settings.VIEW_COUNT_FLUSH_INTERVAL,
+    flush_threshold=settings.VIEW_COUNT_FLUSH_THRESHOLD,
+)
+
+# 参与全文检索的商品字段
+SEARCHABLE_FIELDS = frozenset({'name', 'description', 'short_description', 'tags'})
+
 
 class MallService:
     """积分商城服务类 - 按照编码共识标准重构.
@@ -31,6 +54,7 @@ class MallService:
         self.db = db
         self.point_service = PointService(db)
         self.notification_service = NotificationService(db)
+        self.recommendation_service = RecommendationService(db)
 
     # ==================== 商品查询相关 ====================
 
@@ -145,17 +169,8 @@ class MallService:
         return None
 
     async def _increment_view_count(self, item_id: str):
-        """增加商品浏览次数."""
-        try:
-            await self.db.execute(
-                update(MallItem)
-                .where(MallItem.id == item_id)
-                .values(view_count=MallItem.view_count + 1)
-            )
-            await self.db.commit()
-        except Exception as e:
-            logger.warning(f"Failed to increment view count for item {item_id}: {e}")
-            await self.db.rollback()
+        """增加商品浏览次数（写入内存缓冲，定期批量写回，不在读请求中提交事务）."""
+        view_count_buffer.increment(item_id)
 
     def generate_redemption_code(self, item_name: str) -> str:
         """生成兑换码."""
@@ -226,41 +241,106 @@ class MallService:
         delivery_info: Optional[dict[str, Any]] = None,
         company_id: Optional[int] = None
     ) -> PointPurchase:
-        """购买商品."""
-        # 检查是否可以购买
-        can_purchase, message = await self.can_purchase_item(user_id, item_id, company_id)
-        if not can_purchase:
-            raise ValueError(message)
+        """购买商品.
 
-        # 获取商品信息
-        item = await self.get_item_by_id(item_id)
+        在单个事务内完成：条件扣减库存 -> 条件扣减余额 -> 写入消费流水与购买记录 -> 更新分类偏好，
+        任一步失败整体回滚；兑换成功通知在提交后由后台任务发送。
+        """
+        try:
+            item = await self._reserve_stock(item_id, company_id)
+
+            # 生成兑换码
+            redemption_code = self.generate_redemption_code(item.name)
+
+            transaction = None
+            # 只有当积分成本大于0时才扣除积分
+            if item.points_cost > 0:
+                transaction = await self.point_service.record_spend(
+                    user_id=user_id,
+                    amount=item.points_cost,
+                    reference_id=item_id,
+                    reference_type='purchase',
+                    description=f"购买商品: {item.name}",
+                    company_id=company_id,
+                    is_display_amount=False
+                )
 
-        # 生成兑换码
-        redemption_code = self.generate_redemption_code(item["name"])
+            purchase = PointPurchase(
+                id=str(uuid.uuid4()),
+                user_id=user_id,
+                company_id=company_id,
+                item_id=item_id,
+                item_name=item.name,
+                item_description=item.description,
+                points_cost=item.points_cost,
+                transaction_id=transaction.id if transaction else None,  # 免费商品没有交易记录
+                status=PurchaseStatus.PENDING,  # 初始状态为待核销
+                redemption_code=redemption_code,
+                delivery_info=delivery_info,
+                stock_reserved=True,
+                created_at=datetime.now(UTC).replace(microsecond=0),
+                completed_at=None  # 核销后才设置完成时间
+            )
+            self.db.add(purchase)
 
-        # 使用积分服务创建购买记录
-        purchase = await self.point_service.create_purchase_record(
-            user_id=user_id,
-            item_id=item_id,
-            item_name=item["name"],
-            item_description=item["description"],
-            points_cost=item["pointsCost"],
-            delivery_info=delivery_info,
-            redemption_code=redemption_code,
-            company_id=company_id
-        )
+            # 更新分类偏好，随购买记录一起提交
+            await self.recommendation_service.record_purchase(user_id, item.category)
+
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
 
-        # 发送兑换成功通知
-        await self.notification_service.create_redemption_notification(
+        invalidate_user_balance_cache(user_id)
+
+        points_cost_display = PointConverter.to_display(item.points_cost)
+        # 发送兑换成功通知（提交后在后台发送）
+        defer_redemption_notification(
+            sessionmaker(self.db.bind, class_=AsyncSession, expire_on_commit=False),
             user_id=user_id,
-            item_name=item["name"],
+            item_name=item.name,
             redemption_code=redemption_code,
-            points_cost=item["pointsCost"]
+            points_cost=points_cost_display
         )
 
-        logger.info(f"用户 {user_id} 购买商品 {item_id}，消费 {item['pointsCost']} 积分，兑换码: {redemption_code}")
+        logger.info(f"用户 {user_id} 购买商品 {item_id}，消费 {points_cost_display} 积分，兑换码: {redemption_code}")
         return purchase
 
+    async def _reserve_stock(self, item_id: str, company_id: int | None = None):
+        """条件扣减库存：UPDATE ... SET stock = stock - 1 WHERE stock > 0 ... RETURNING.
+
+        扣减成功返回商品的名称、描述、分类与积分成本；失败时再查询一次商品以给出具体原因。
+        """
+        conditions = [
+            MallItem.id == item_id,
+            MallItem.deleted_at.is_(None),
+            MallItem.is_available,
+            MallItem.stock > 0,
+        ]
+        # 公司权限检查
+        if company_id is not None:
+            conditions.append(or_(MallItem.company_id.is_(None), MallItem.company_id == company_id))
+
+        result = await self.db.execute(
+            update(MallItem)
+            .where(*conditions)
+            .values(stock=MallItem.stock - 1, purchase_count=MallItem.purchase_count + 1)
+            .returning(MallItem.name, MallItem.description, MallItem.category, MallItem.points_cost)
+            .execution_options(synchronize_session=False)
+        )
+        item = result.first()
+        if item is not None:
+            return item
+
+        status = (await self.db.execute(
+            select(MallItem.is_available).where(*conditions[:2], *conditions[4:])
+        )).first()
+        if status is None:
+            raise ValueError("商品不存在或无权限访问")
+        if not status.is_available:
+            raise ValueError("商品暂不可用")
+        raise ValueError("商品库存不足")
+
     async def get_user_purchases(
         self,
         user_id: int,
@@ -356,6 +436,23 @@ class MallService:
             is_display_amount=False   # 注意：这里传入的是存储格式，避免重复放大
         )
 
+        # 归还库存并回退分类偏好；早期未扣减库存的购买记录不归还库存
+        if purchase.stock_reserved:
+            result = await self.db.execute(
+                update(MallItem)
+                .where(MallItem.id == purchase.item_id)
+                .values(stock=MallItem.stock + 1, purchase_count=MallItem.purchase_count - 1)
+                .returning(MallItem.category)
+                .execution_options(synchronize_session=False)
+            )
+            category = result.scalar()
+        else:
+            category = (await self.db.execute(
+                select(MallItem.category).where(MallItem.id == purchase.item_id)
+            )).scalar()
+        if category:
+            await self.recommendation_service.record_purchase(purchase.user_id, category, delta=-1)
+
         # 更新购买状态
         purchase.cancel(reason)
         await self.db.commit()
@@ -750,7 +847,11 @@ class MallService:
             sort_order=kwargs.get('sort_order', 0)
         )
 
+        # 索引表需在本事务写入前就绪（建表/重建使用独立连接）
+        await mall_search_index.ensure(self.db)
         self.db.add(item)
+        await self.db.flush()
+        await mall_search_index.index_items(self.db, [item])
         await self.db.commit()
         await self.db.refresh(item)
 
@@ -800,6 +901,10 @@ class MallService:
 
         item.updated_at = datetime.now(timezone.utc).replace(microsecond=0)
 
+        # 检索字段变化时同步更新搜索索引
+        if SEARCHABLE_FIELDS.intersection(updates):
+            await mall_search_index.index_items(self.db, [item])
+
         await self.db.commit()
         await self.db.refresh(item)
 
@@ -840,6 +945,7 @@ class MallService:
             item.deleted_at = datetime.now(timezone.utc).replace(microsecond=0)
             item.is_available = False
 
+        await mall_search_index.remove_item(self.db, item.id)
         await self.db.commit()
 
         logger.info(f"Deleted mall item: {item.id} - {item.name} (hard_delete={hard_delete})")
@@ -1,21 +1,86 @@
 """通知服务层 - 处理通知相关的业务逻辑."""
+import asyncio
 import logging
-from datetime import datetime, timedelta
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
 from typing import Any, Optional
 
+from app.core.config import settings
 from app.models.department import Department
 from app.models.notification import (
     Notification,
+    NotificationArchive,
     NotificationCategory,
     NotificationPriority,
     NotificationStatus,
+    NotificationUnreadCounter,
 )
 from app.models.user import User
-from sqlalchemy import and_, desc, func, or_, select
+from sqlalchemy import (
+    DateTime,
+    and_,
+    delete,
+    desc,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
 
 logger = logging.getLogger(__name__)
 
+# 批量操作中单条语句 IN 列表的最大长度
+BULK_BATCH_SIZE = 500
+
+# 保留任务两批之间的让出时间（秒），让其他请求有机会获取写锁
+RETENTION_BATCH_PAUSE = 0.01
+# 保留任务自适应批大小的下限
+RETENTION_MIN_BATCH_SIZE = 10
+
+# 不再参与过期判定的通知状态
+_FINAL_STATUSES = [NotificationStatus.ACTED, NotificationStatus.DISMISSED, NotificationStatus.EXPIRED]
+
+# 延迟发送的通知任务，保留引用避免任务被回收
+_deferred_tasks: set[asyncio.Task] = set()
+
+
+def defer_redemption_notification(
+    session_factory: sessionmaker,
+    user_id: int,
+    item_name: str,
+    redemption_code: str,
+    points_cost: float
+) -> asyncio.Task:
+    """在后台用独立会话发送兑换成功通知，不占用购买事务与请求耗时."""
+    async def send():
+        try:
+            async with session_factory() as db:
+                await NotificationService(db).create_redemption_notification(
+                    user_id=user_id,
+                    item_name=item_name,
+                    redemption_code=redemption_code,
+                    points_cost=points_cost
+                )
+        except Exception as e:
+            logger.error(f"发送兑换通知失败，用户: {user_id}，兑换码: {redemption_code}，错误: {e}")
+
+    task = asyncio.get_running_loop().create_task(send())
+    _deferred_tasks.add(task)
+    task.add_done_callback(_deferred_tasks.discard)
+    return task
+
+
+async def wait_deferred_notifications() -> None:
+    """等待所有延迟通知发送完成（应用关闭时调用）."""
+    if _deferred_tasks:
+        await asyncio.gather(*list(_deferred_tasks), return_exceptions=True)
+
 
 class NotificationService:
     """通知服务类."""
@@ -53,17 +118,50 @@ class NotificationService:
         )
 
         self.db.add(notification)
+        await self.db.flush()
+        unread_count = await self._adjust_unread_count(user_id, 1)
         await self.db.commit()
         await self.db.refresh(notification)
 
         # 触发 SSE 广播
         try:
             await self._broadcast_new_notification(notification)
+            self._broadcast_unread_count(user_id, unread_count)
         except Exception as e:
             logger.error(f"广播通知失败，用户: {user_id}，错误: {e}")
 
         return notification
 
+    async def create_notifications_bulk(self, notifications: list[dict[str, Any]], batch_size: int = 1000) -> int:
+        """批量创建通知：每批一条多行 INSERT、一次提交，提交后逐条推送 SSE.
+
+        notifications 中每项为 Notification 的列值（user_id、category、title、payload 等）。
+        """
+        created = 0
+        for start in range(0, len(notifications), batch_size):
+            now = datetime.utcnow()
+            rows = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "priority": NotificationPriority.NORMAL,
+                    "status": NotificationStatus.PENDING,
+                    "created_at": now,
+                    **item,
+                }
+                for item in notifications[start:start + batch_size]
+            ]
+            await self.db.execute(insert(Notification), rows)
+            unread_counts = await self._recount_unread([row["user_id"] for row in rows])
+            await self.db.commit()
+            created += len(rows)
+
+            for row in rows:
+                await self._broadcast_new_notification(Notification(**row))
+            for user_id, unread_count in unread_counts.items():
+                self._broadcast_unread_count(user_id, unread_count)
+
+        return created
+
     async def _broadcast_new_notification(self, notification: Notification):
         """广播新通知到 SSE 连接."""
         try:
@@ -98,6 +196,88 @@ class NotificationService:
             logger.error(f"广播通知失败: {e}")
             # 不抛出异常，避免影响通知创建
 
+    # ==================== 未读计数 ====================
+
+    async def _adjust_unread_count(self, user_id: int, delta: int) -> int:
+        """在当前事务内调整用户未读计数，返回调整后的数量（不提交）.
+
+        需在通知的变更写入（flush）之后调用：计数行不存在时按通知表重新统计，统计结果已包含本次变更。
+        """
+        result = await self.db.execute(
+            update(NotificationUnreadCounter)
+            .where(NotificationUnreadCounter.user_id == user_id)
+            .values(
+                unread_count=NotificationUnreadCounter.unread_count + delta,
+                updated_at=datetime.now(UTC)
+            )
+            .returning(NotificationUnreadCounter.unread_count)
+        )
+        unread_count = result.scalar_one_or_none()
+        if unread_count is None:
+            unread_count = (await self._recount_unread([user_id]))[user_id]
+        return unread_count
+
+    async def _recount_unread(self, user_ids: list[int]) -> dict[int, int]:
+        """按通知表重新统计一批用户的未读数量并写入计数表（不提交），返回 {用户ID: 未读数量}.
+
+        用于批量创建、批量删除等一次影响多条通知的操作，每批用户一条 INSERT ... SELECT。
+        """
+        ids = list(dict.fromkeys(user_ids))
+        counts: dict[int, int] = {}
+        for start in range(0, len(ids), BULK_BATCH_SIZE):
+            batch = ids[start:start + BULK_BATCH_SIZE]
+            source = (
+                select(
+                    User.id,
+                    func.count(Notification.id),
+                    literal(datetime.now(UTC), DateTime),
+                )
+                .outerjoin(Notification, and_(
+                    Notification.user_id == User.id,
+                    Notification.status == NotificationStatus.PENDING
+                ))
+                .where(User.id.in_(batch))
+                .group_by(User.id)
+            )
+            columns = ["user_id", "unread_count", "updated_at"]
+
+            dialect = self.db.get_bind().dialect.name
+            if dialect in ("sqlite", "postgresql"):
+                if dialect == "sqlite":
+                    from sqlalchemy.dialects.sqlite import insert as dialect_insert
+                else:
+                    from sqlalchemy.dialects.postgresql import insert as dialect_insert
+                stmt = dialect_insert(NotificationUnreadCounter).from_select(columns, source)
+                await self.db.execute(stmt.on_conflict_do_update(
+                    index_elements=["user_id"],
+                    set_={
+                        "unread_count": stmt.excluded.unread_count,
+                        "updated_at": stmt.excluded.updated_at,
+                    },
+                ))
+            else:
+                await self.db.execute(
+                    delete(NotificationUnreadCounter).where(NotificationUnreadCounter.user_id.in_(batch))
+                )
+                await self.db.execute(insert(NotificationUnreadCounter).from_select(columns, source))
+
+            result = await self.db.execute(
+                select(NotificationUnreadCounter.user_id, NotificationUnreadCounter.unread_count)
+                .where(NotificationUnreadCounter.user_id.in_(batch))
+            )
+            counts.update({user_id: unread_count for user_id, unread_count in result.all()})
+        return counts
+
+    def _broadcast_unread_count(self, user_id: int, unread_count: int) -> None:
+        """推送最新未读数量；同一连接上尚未发出的旧计数会被新值合并替换."""
+        from app.api.notifications import broadcast_notification_to_user
+
+        broadcast_notification_to_user(
+            user_id,
+            {"type": "unread_count", "unreadCount": unread_count},
+            coalesce_key="unread_count"
+        )
+
     async def _find_hr_contact(self, company_id: int) -> tuple[Optional[str], Optional[str]]:
         """查找人力资源部的第一个在职人员，返回(联系人姓名, 部门名称)."""
         try:
@@ -252,7 +432,15 @@ class NotificationService:
         return result.scalars().all()
 
     async def get_unread_count(self, user_id: int) -> int:
-        """获取用户未读通知数量."""
+        """获取用户未读通知数量：读取计数表中的一行."""
+        unread_count = await self.db.scalar(
+            select(NotificationUnreadCounter.unread_count)
+            .where(NotificationUnreadCounter.user_id == user_id)
+        )
+        if unread_count is not None:
+            return unread_count
+
+        # 尚无计数行（从未收到过通知）时回退到统计，不在读请求中写库
         query = select(func.count(Notification.id)).where(
             and_(
                 Notification.user_id == user_id,
@@ -274,32 +462,126 @@ class NotificationService:
         notification = result.scalar_one_or_none()
 
         if notification:
+            was_unread = notification.status == NotificationStatus.PENDING
             notification.mark_as_read()
+            unread_count = None
+            if was_unread:
+                await self.db.flush()
+                unread_count = await self._adjust_unread_count(user_id, -1)
             await self.db.commit()
             logger.info(f"用户 {user_id} 标记通知 {notification_id} 为已读")
+            if unread_count is not None:
+                self._broadcast_unread_count(user_id, unread_count)
             return True
 
         return False
 
     async def mark_all_as_read(self, user_id: int) -> int:
-        """标记用户所有通知为已读."""
-        query = select(Notification).where(
-            and_(
+        """标记用户所有通知为已读：一条集合式 UPDATE，不加载通知对象."""
+        result = await self.db.execute(
+            update(Notification)
+            .where(
                 Notification.user_id == user_id,
                 Notification.status == NotificationStatus.PENDING
             )
+            .values(status=NotificationStatus.READ, read_at=datetime.now(UTC))
+            .execution_options(synchronize_session=False)
         )
-        result = await self.db.execute(query)
-        notifications = result.scalars().all()
+        count = result.rowcount
+
+        if count > 0:
+            unread_counts = await self._recount_unread([user_id])
+            await self.db.commit()
+            logger.info(f"用户 {user_id} 标记 {count} 条通知为已读")
+            self._broadcast_unread_count(user_id, unread_counts[user_id])
 
+        return count
+
+    async def mark_as_read_bulk(
+        self, user_id: int, notification_ids: list[str], batch_size: int = BULK_BATCH_SIZE
+    ) -> int:
+        """批量标记指定通知为已读，ID 按 batch_size 分批放入 IN 列表，返回实际标记的数量."""
+        ids = list(dict.fromkeys(notification_ids))
+        read_at = datetime.now(UTC)
         count = 0
-        for notification in notifications:
-            notification.mark_as_read()
-            count += 1
+        for start in range(0, len(ids), batch_size):
+            result = await self.db.execute(
+                update(Notification)
+                .where(
+                    Notification.user_id == user_id,
+                    Notification.id.in_(ids[start:start + batch_size]),
+                    Notification.status == NotificationStatus.PENDING
+                )
+                .values(status=NotificationStatus.READ, read_at=read_at)
+                .execution_options(synchronize_session=False)
+            )
+            count += result.rowcount
 
         if count > 0:
+            unread_count = await self._adjust_unread_count(user_id, -count)
             await self.db.commit()
-            logger.info(f"用户 {user_id} 标记 {count} 条通知为已读")
+            logger.info(f"用户 {user_id} 批量标记 {count} 条通知为已读")
+            self._broadcast_unread_count(user_id, unread_count)
+
+        return count
+
+    async def delete_notifications_bulk(
+        self,
+        user_id: int,
+        notification_ids: list[str] | None = None,
+        category: NotificationCategory | None = None,
+        older_than: datetime | None = None,
+        batch_size: int = BULK_BATCH_SIZE
+    ) -> int:
+        """批量删除用户通知，返回删除的数量.
+
+        指定 notification_ids 时按 ID 分批删除（可再叠加分类/时间条件）；
+        否则按分类和/或创建时间早于 older_than 的条件，每批先取出 batch_size 个 ID 再按 IN 列表删除，
+        每批单独提交，避免长时间持有写锁。至少需要一个条件。
+        """
+        if not notification_ids and category is None and older_than is None:
+            raise ValueError("至少需要指定通知ID、分类或时间条件之一")
+
+        conditions = [Notification.user_id == user_id]
+        if category is not None:
+            conditions.append(Notification.category == category)
+        if older_than is not None:
+            conditions.append(Notification.created_at < older_than)
+
+        count = 0
+        if notification_ids:
+            ids = list(dict.fromkeys(notification_ids))
+            for start in range(0, len(ids), batch_size):
+                result = await self.db.execute(
+                    delete(Notification)
+                    .where(*conditions, Notification.id.in_(ids[start:start + batch_size]))
+                    .execution_options(synchronize_session=False)
+                )
+                count += result.rowcount
+            if count > 0:
+                await self._recount_unread([user_id])
+            await self.db.commit()
+        else:
+            while True:
+                batch = (await self.db.execute(
+                    select(Notification.id).where(*conditions).limit(batch_size)
+                )).scalars().all()
+                if not batch:
+                    break
+                result = await self.db.execute(
+                    delete(Notification)
+                    .where(Notification.id.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+                await self._recount_unread([user_id])
+                await self.db.commit()
+                count += result.rowcount
+                if len(batch) < batch_size:
+                    break
+
+        if count > 0:
+            logger.info(f"用户 {user_id} 批量删除 {count} 条通知")
+            self._broadcast_unread_count(user_id, await self.get_unread_count(user_id))
 
         return count
 
@@ -315,13 +597,183 @@ class NotificationService:
         notification = result.scalar_one_or_none()
 
         if notification:
+            was_unread = notification.status == NotificationStatus.PENDING
             await self.db.delete(notification)
+            unread_count = None
+            if was_unread:
+                await self.db.flush()
+                unread_count = await self._adjust_unread_count(user_id, -1)
             await self.db.commit()
             logger.info(f"用户 {user_id} 删除通知 {notification_id}")
+            if unread_count is not None:
+                self._broadcast_unread_count(user_id, unread_count)
             return True
 
         return False
 
+    # ==================== 保留策略 ====================
+
+    async def apply_retention(
+        self,
+        now: datetime | None = None,
+        batch_size: int | None = None
+    ) -> dict[str, int]:
+        """执行一轮通知保留策略，返回各阶段处理的行数.
+
+        1. 到期未处理的通知标记为过期
+        2. 创建超过 NOTIFICATION_ARCHIVE_AFTER_DAYS 天的已处理通知移入归档表
+        3. 创建超过 NOTIFICATION_RETENTION_DAYS 天的通知与归档物理删除
+
+        每批单独一个短事务，批间让出写锁；批大小按上一批的写事务耗时在
+        RETENTION_MIN_BATCH_SIZE 与 batch_size 之间调整，使每个写事务不超过 NOTIFICATION_RETENTION_LOCK_BUDGET_MS。
+        """
+        now = now or datetime.now(UTC)
+        batch_size = batch_size or settings.NOTIFICATION_RETENTION_BATCH_SIZE
+        horizon = now - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+
+        stats = {
+            "expired": await self.expire_due_notifications(now, batch_size),
+            "archived": await self.archive_settled_notifications(
+                now - timedelta(days=settings.NOTIFICATION_ARCHIVE_AFTER_DAYS), batch_size
+            ),
+            "deleted": await self.purge_notifications(horizon, batch_size),
+            "archivesDeleted": await self.purge_archives(horizon, batch_size),
+        }
+        if any(stats.values()):
+            logger.info(f"通知保留任务完成: {stats}")
+        return stats
+
+    async def expire_due_notifications(self, now: datetime, batch_size: int = BULK_BATCH_SIZE) -> int:
+        """把 expires_at 已过的待处理/已读通知标记为过期，返回处理的数量."""
+        query = (
+            select(Notification.id, Notification.user_id, Notification.status)
+            # 状态条件写成 NOT IN，让查询走 idx_expires_at 而不是 status 索引加排序
+            .where(Notification.expires_at <= now, Notification.status.notin_(_FINAL_STATUSES))
+        )
+
+        async def expire(rows) -> dict[int, int]:
+            await self.db.execute(
+                update(Notification)
+                .where(Notification.id.in_([row.id for row in rows]))
+                .values(status=NotificationStatus.EXPIRED)
+                .execution_options(synchronize_session=False)
+            )
+            return await self._recount_unread(
+                [row.user_id for row in rows if row.status == NotificationStatus.PENDING]
+            )
+
+        return await self._run_retention_batches(query, Notification.expires_at, batch_size, expire)
+
+    async def archive_settled_notifications(self, cutoff: datetime, batch_size: int = BULK_BATCH_SIZE) -> int:
+        """把创建时间早于 cutoff 的已处理通知移入归档表，返回归档的数量."""
+        query = (
+            select(Notification.id)
+            # 状态条件写成 !=，让查询走 created_at 索引而不是 status 索引加排序
+            .where(Notification.created_at < cutoff, Notification.status != NotificationStatus.PENDING)
+        )
+        columns = ["id", "user_id", "category", "status", "title", "summary", "payload", "source",
+                   "created_at", "read_at", "archived_at"]
+
+        async def archive(rows) -> None:
+            ids = [row.id for row in rows]
+            source = select(
+                Notification.id,
+                Notification.user_id,
+                Notification.category,
+                Notification.status,
+                Notification.title,
+                Notification.summary,
+                Notification.payload,
+                Notification.source,
+                Notification.created_at,
+                Notification.read_at,
+                literal(datetime.now(UTC), DateTime),
+            ).where(Notification.id.in_(ids))
+            await self.db.execute(insert(NotificationArchive).from_select(columns, source))
+            await self.db.execute(
+                delete(Notification)
+                .where(Notification.id.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+
+        return await self._run_retention_batches(query, Notification.created_at, batch_size, archive)
+
+    async def purge_notifications(self, horizon: datetime, batch_size: int = BULK_BATCH_SIZE) -> int:
+        """物理删除创建时间早于 horizon 的通知（含未读），返回删除的数量."""
+        query = (
+            select(Notification.id, Notification.user_id, Notification.status)
+            .where(Notification.created_at < horizon)
+        )
+
+        async def purge(rows) -> dict[int, int]:
+            await self.db.execute(
+                delete(Notification)
+                .where(Notification.id.in_([row.id for row in rows]))
+                .execution_options(synchronize_session=False)
+            )
+            return await self._recount_unread(
+                [row.user_id for row in rows if row.status == NotificationStatus.PENDING]
+            )
+
+        return await self._run_retention_batches(query, Notification.created_at, batch_size, purge)
+
+    async def purge_archives(self, horizon: datetime, batch_size: int = BULK_BATCH_SIZE) -> int:
+        """物理删除原通知创建时间早于 horizon 的归档，返回删除的数量."""
+        query = (
+            select(NotificationArchive.id)
+            .where(NotificationArchive.created_at < horizon)
+        )
+
+        async def purge(rows) -> None:
+            await self.db.execute(
+                delete(NotificationArchive)
+                .where(NotificationArchive.id.in_([row.id for row in rows]))
+                .execution_options(synchronize_session=False)
+            )
+
+        return await self._run_retention_batches(query, NotificationArchive.created_at, batch_size, purge)
+
+    async def _run_retention_batches(
+        self,
+        query,
+        position_column,
+        batch_size: int,
+        apply: Callable[[list], Awaitable[dict[int, int] | None]]
+    ) -> int:
+        """按 position_column 顺序分批取出待处理行并逐批执行 apply，每批一次提交，提交后推送变化的未读数量.
+
+        下一批从上一批的最大位置继续扫描，跳过的行（如未读的旧通知）不会被反复读取；
+        批大小按写事务（apply 到提交完成）的耗时与写锁预算的比例调整，不超过 batch_size。
+        """
+        query = query.add_columns(position_column.label("position")).order_by(position_column)
+        budget = settings.NOTIFICATION_RETENTION_LOCK_BUDGET_MS / 1000
+        max_batch_size = max(batch_size, RETENTION_MIN_BATCH_SIZE)
+        # 从下限开始，按实测耗时逐步放大
+        batch_size = RETENTION_MIN_BATCH_SIZE
+        total = 0
+        position = None
+        while True:
+            batch_query = query if position is None else query.where(position_column >= position)
+            rows = (await self.db.execute(batch_query.limit(batch_size))).all()
+            if not rows:
+                break
+            position = rows[-1].position
+
+            started = time.perf_counter()
+            unread_counts = await apply(rows)
+            await self.db.commit()
+            elapsed = time.perf_counter() - started
+            total += len(rows)
+
+            for user_id, unread_count in (unread_counts or {}).items():
+                self._broadcast_unread_count(user_id, unread_count)
+            if len(rows) < batch_size:
+                break
+            scaled = int(batch_size * budget / max(elapsed, 1e-4))
+            batch_size = min(max(scaled, RETENTION_MIN_BATCH_SIZE), max_batch_size)
+            await asyncio.sleep(RETENTION_BATCH_PAUSE)
+        return total
+
     async def create_achievement_notification(
         self,
         user_id: int,
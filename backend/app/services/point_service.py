@@ -1,11 +1,14 @@
 """积分服务层 - 处理所有积分相关的业务逻辑."""
 import logging
 import uuid
+from collections.abc import Callable
 from datetime import datetime, timedelta, timezone
 from functools import wraps
 from typing import Any, Optional, Union
 
+from app.core.cache import CacheBackend, LRUCache, invalidation_bus
 from app.models.scoring import (
+    PointBalance,
     PointPurchase,
     PointTransaction,
     PurchaseStatus,
@@ -13,9 +16,9 @@ from app.models.scoring import (
     UserLevel,
 )
 from app.models.user import User
-from sqlalchemy import and_, case, delete, desc, func, select
+from sqlalchemy import and_, case, delete, desc, event, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import Session, joinedload
 
 
 class PointConverter:
@@ -47,41 +50,83 @@ class PointConverter:
 
 logger = logging.getLogger(__name__)
 
-# 简单的内存缓存
-_balance_cache = {}
-_cache_ttl = {}
+# 积分余额缓存：键为 (user_id, company_id)，company_id 为 None 表示全公司合计
 CACHE_EXPIRE_SECONDS = 300  # 5分钟缓存过期
+BALANCE_CACHE_MAXSIZE = 10000
+BALANCE_CACHE_NAME = "point_balance"
+
+# 余额行乐观锁冲突时的最大重试次数
+BALANCE_UPDATE_RETRIES = 5
+
+_balance_cache: CacheBackend = LRUCache(maxsize=BALANCE_CACHE_MAXSIZE, ttl=CACHE_EXPIRE_SECONDS)
+# user_id -> 该用户在缓存中的全部键，用于按用户整体失效
+_balance_cache_keys: dict[int, set[tuple[int, int | None]]] = {}
+# session.info 中记录本事务内有未提交余额变更的用户
+_BALANCE_DIRTY_KEY = "point_balance_dirty_users"
+
+
+def configure_balance_cache(backend: CacheBackend) -> None:
+    """替换积分余额缓存后端."""
+    global _balance_cache
+    _balance_cache = backend
+    _balance_cache_keys.clear()
+
+
+def get_balance_cache_stats() -> dict[str, Any]:
+    """积分余额缓存命中统计."""
+    return _balance_cache.stats()
+
+
+def mark_balance_dirty(session: AsyncSession | Session, user_id: int) -> None:
+    """登记当前事务中该用户有未提交的余额变更；事务结束前读取的余额不写入缓存."""
+    session.info.setdefault(_BALANCE_DIRTY_KEY, set()).add(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _reset_balance_dirty_users(session: Session):
+    session.info.pop(_BALANCE_DIRTY_KEY, None)
 
 
 def cache_user_balance(func):
-    """用户积分余额缓存装饰器."""
+    """用户积分余额缓存装饰器（被装饰函数签名为 (self, user_id, company_id=None)）.
+
+    会话中该用户有未提交的余额变更时直接读取、不写入缓存，避免事务回滚后缓存脏数据。
+    """
     @wraps(func)
     async def wrapper(self, user_id: int, *args, **kwargs):
-        cache_key = f"balance_{user_id}"
-        current_time = datetime.utcnow().timestamp()
+        if user_id in self.db.info.get(_BALANCE_DIRTY_KEY, ()):
+            return await func(self, user_id, *args, **kwargs)
 
-        # 检查缓存是否有效
-        if (cache_key in _balance_cache and
-            cache_key in _cache_ttl and
-            current_time - _cache_ttl[cache_key] < CACHE_EXPIRE_SECONDS):
-            return _balance_cache[cache_key]
+        company_id = args[0] if args else kwargs.get("company_id")
+        cache_key = (user_id, company_id)
 
-        # 缓存未命中或已过期，重新获取
-        result = await func(self, user_id, *args, **kwargs)
+        # 先应用其他进程登记的失效记录
+        await invalidation_bus.poll(self.db)
+
+        cached = _balance_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
-        # 更新缓存
-        _balance_cache[cache_key] = result
-        _cache_ttl[cache_key] = current_time
+        result = await func(self, user_id, *args, **kwargs)
 
+        if len(_balance_cache_keys) > BALANCE_CACHE_MAXSIZE:
+            # 键索引中可能残留已被 LRU 淘汰的键，超过上限时整体重建
+            _balance_cache.clear()
+            _balance_cache_keys.clear()
+        _balance_cache.set(cache_key, result)
+        _balance_cache_keys.setdefault(user_id, set()).add(cache_key)
         return result
     return wrapper
 
 
 def invalidate_user_balance_cache(user_id: int):
-    """清除用户积分余额缓存."""
-    cache_key = f"balance_{user_id}"
-    _balance_cache.pop(cache_key, None)
-    _cache_ttl.pop(cache_key, None)
+    """清除本进程内该用户所有公司维度的积分余额缓存."""
+    for cache_key in _balance_cache_keys.pop(user_id, ()):
+        _balance_cache.delete(cache_key)
+
+
+invalidation_bus.subscribe(BALANCE_CACHE_NAME, lambda key: invalidate_user_balance_cache(int(key)))
 
 
 class PointService:
@@ -109,19 +154,29 @@ class PointService:
         """获取用户当前积分余额（前端展示格式，缩小10倍）."""
         storage_balance = await self.get_user_balance(user_id)
         return PointConverter.format_for_api(storage_balance)
+    @cache_user_balance
     async def get_user_balance_by_company(self, user_id: int, company_id: int) -> int:
-        """按公司维度获取用户积分余额（后端存储格式），不使用全局缓存。."""
+        """按公司维度获取用户积分余额（后端存储格式）.
+
+        结果缓存在进程内 LRU 中（键为 (user_id, company_id)），未命中时读取余额表。
+        余额变更提交后通过 invalidation_bus 登记失效，读取前先应用其他 worker 登记的失效记录.
+        """
+        row = await self._get_balance_row(user_id, company_id, create=False)
+        if row is not None:
+            return int(row.balance)
+        # 余额行尚未建立（该用户在此公司从未发生过交易），回退到流水汇总
         return await self.calculate_user_balance(user_id, company_id)
 
     async def get_user_balance_for_display_by_company(self, user_id: int, company_id: int) -> float:
-        """按公司维度获取用户积分余额（前端展示格式），不使用全局缓存。."""
-        storage = await self.calculate_user_balance(user_id, company_id)
+        """按公司维度获取用户积分余额（前端展示格式），经由 get_user_balance_by_company 的 LRU 缓存读取."""
+        storage = await self.get_user_balance_by_company(user_id, company_id)
         return PointConverter.format_for_api(storage)
 
 
     async def calculate_user_balance(self, user_id: int, company_id: Optional[int] = None) -> int:
         """通过交易记录计算用户积分余额（后端存储格式）
-        当提供 company_id 时，按公司维度计算余额；否则为全量。.
+        当提供 company_id 时，按公司维度计算余额；否则为全量。
+        代价随流水条数线性增长，仅用于余额表初始化与对账.
         """
         query = select(func.sum(PointTransaction.amount)).filter(PointTransaction.user_id == user_id)
         if company_id is not None:
@@ -176,9 +231,8 @@ class PointService:
                 logger.warning(f"重复的积分交易: user_id={user_id}, reference_id={reference_id}, company_id={company_id}")
                 return existing
 
-        # 获取当前余额（后端存储格式，强制公司维度）
-        current_balance = await self.calculate_user_balance(user_id, company_id)
-        new_balance = current_balance + storage_amount
+        # 在余额表上原子累加（后端存储格式，强制公司维度）
+        new_balance = await self._apply_balance_delta(user_id, company_id, storage_amount)
 
         # 创建交易记录
         transaction = PointTransaction(
@@ -199,12 +253,14 @@ class PointService:
         self.db.add(transaction)
 
         # 更新用户积分（仍维护全局缓存字段）
-        await self._update_user_points(user_id, (await self.calculate_user_balance(user_id)))
+        total_points = await self._increment_user_points(user_id, storage_amount)
 
         # 等级变化（基于全量）
-        await self._check_level_upgrade(user_id, await self.calculate_user_balance(user_id))
+        await self._check_level_upgrade(user_id, total_points)
 
         await self.db.commit()
+        # 提交后再次清除本进程缓存，避免提交前的并发读取写回旧值
+        invalidate_user_balance_cache(user_id)
         await self.db.refresh(transaction)
 
         logger.info(f"用户 {user_id} 获得 {display_amount} 积分（存储: {storage_amount}），当前余额: {PointConverter.to_display(new_balance)}")
@@ -229,6 +285,41 @@ class PointService:
             is_display_amount: 如果为True，表示amount是前端展示格式（需要放大10倍存储）
                               如果为False，表示amount已经是后端存储格式（不需要转换）
 
+        """
+        transaction = await self.record_spend(
+            user_id=user_id,
+            amount=amount,
+            reference_id=reference_id,
+            reference_type=reference_type,
+            description=description,
+            extra_data=extra_data,
+            company_id=company_id,
+            is_display_amount=is_display_amount
+        )
+
+        await self.db.commit()
+        # 提交后再次清除本进程缓存，避免提交前的并发读取写回旧值
+        invalidate_user_balance_cache(user_id)
+        await self.db.refresh(transaction)
+
+        storage_amount = -transaction.amount
+        logger.info(f"用户 {user_id} 消费 {PointConverter.to_display(storage_amount)} 积分（存储: {storage_amount}），当前余额: {PointConverter.to_display(transaction.balance_after)}")
+        return transaction
+
+    async def record_spend(
+        self,
+        user_id: int,
+        amount: int | float,
+        reference_id: str | None = None,
+        reference_type: str | None = None,
+        description: str | None = None,
+        extra_data: dict[str, Any] | None = None,
+        company_id: int = None,
+        is_display_amount: bool = True
+    ) -> PointTransaction:
+        """在当前事务内扣减积分并写入消费流水，不提交.
+
+        调用方负责提交，并在提交后调用 invalidate_user_balance_cache(user_id)。
         """
         if amount <= 0:
             raise ValueError("积分数量必须大于0")
@@ -237,15 +328,9 @@ class PointService:
 
         # 转换积分格式：如果是展示格式，需要放大10倍存储
         storage_amount = PointConverter.to_storage(amount) if is_display_amount else int(amount)
-        display_amount = PointConverter.to_display(storage_amount)
-
-        # 获取当前余额并验证（强制公司维度）
-        current_balance = await self.calculate_user_balance(user_id, company_id)
-        if current_balance < storage_amount:
-            current_display = PointConverter.to_display(current_balance)
-            raise ValueError(f"积分余额不足，当前余额: {current_display}，需要: {display_amount}")
 
-        new_balance = current_balance - storage_amount
+        # 验证余额并原子扣减（强制公司维度）
+        new_balance = await self._debit_balance(user_id, company_id, storage_amount)
 
         # 创建交易记录
         transaction = PointTransaction(
@@ -265,15 +350,11 @@ class PointService:
         self.db.add(transaction)
 
         # 更新用户积分（维护全局缓存字段）
-        await self._update_user_points(user_id, (await self.calculate_user_balance(user_id)))
+        total_points = await self._increment_user_points(user_id, -storage_amount)
 
         # 等级变化（基于全量）
-        await self._check_level_upgrade(user_id, await self.calculate_user_balance(user_id))
-
-        await self.db.commit()
-        await self.db.refresh(transaction)
+        await self._check_level_upgrade(user_id, total_points)
 
-        logger.info(f"用户 {user_id} 消费 {display_amount} 积分（存储: {storage_amount}），当前余额: {PointConverter.to_display(new_balance)}")
         return transaction
 
     async def adjust_points(
@@ -304,14 +385,13 @@ class PointService:
         storage_amount = PointConverter.to_storage(amount) if is_display_amount else int(amount)
         display_amount = PointConverter.to_display(storage_amount)
 
-        # 获取当前余额（后端存储格式，强制公司维度）
-        current_balance = await self.calculate_user_balance(user_id, company_id)
-        new_balance = current_balance + storage_amount
+        # 确保余额不会变为负数，并原子调整（后端存储格式，强制公司维度）
+        def ensure_non_negative(current_balance: int):
+            if current_balance + storage_amount < 0:
+                current_display = PointConverter.to_display(current_balance)
+                raise ValueError(f"积分调整后余额不能为负数，当前余额: {current_display}，调整数量: {display_amount}")
 
-        # 确保余额不会变为负数
-        if new_balance < 0:
-            current_display = PointConverter.to_display(current_balance)
-            raise ValueError(f"积分调整后余额不能为负数，当前余额: {current_display}，调整数量: {display_amount}")
+        new_balance = await self._apply_balance_delta(user_id, company_id, storage_amount, ensure_non_negative)
 
         # 创建交易记录
         transaction = PointTransaction(
@@ -331,12 +411,14 @@ class PointService:
         self.db.add(transaction)
 
         # 更新用户积分（维护全局缓存字段）
-        await self._update_user_points(user_id, (await self.calculate_user_balance(user_id)))
+        total_points = await self._increment_user_points(user_id, storage_amount)
 
         # 等级变化（基于全量）
-        await self._check_level_upgrade(user_id, await self.calculate_user_balance(user_id))
+        await self._check_level_upgrade(user_id, total_points)
 
         await self.db.commit()
+        # 提交后再次清除本进程缓存，避免提交前的并发读取写回旧值
+        invalidate_user_balance_cache(user_id)
         await self.db.refresh(transaction)
 
         logger.info(f"调整用户 {user_id} 积分 {display_amount}（存储: {storage_amount}），当前余额: {PointConverter.to_display(new_balance)}")
@@ -509,7 +591,7 @@ class PointService:
         """获取用户积分统计信息（返回前端展示格式）."""
         try:
             # 获取当前余额（后端存储格式）——公司维度强制
-            current_balance_storage = await self.calculate_user_balance(user_id, company_id)
+            current_balance_storage = await self.get_user_balance_by_company(user_id, company_id)
 
             # 获取详细的交易统计 - 按交易类型分别统计
             txn_query = select(
@@ -575,7 +657,160 @@ class PointService:
         if user:
             user.points = new_balance
             # 清除缓存
-            invalidate_user_balance_cache(user_id)
+            await self._invalidate_balance_cache(user_id)
+
+    async def _invalidate_balance_cache(self, user_id: int):
+        """清除本进程缓存，并在当前事务内登记跨进程失效记录."""
+        mark_balance_dirty(self.db, user_id)
+        invalidate_user_balance_cache(user_id)
+        await invalidation_bus.publish(self.db, BALANCE_CACHE_NAME, str(user_id))
+
+    async def _increment_user_points(self, user_id: int, delta: int) -> int:
+        """在用户表上原子累加积分（全公司合计），返回累加后的积分."""
+        result = await self.db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(points=func.coalesce(User.points, 0) + delta)
+            .returning(User.points)
+            .execution_options(synchronize_session="fetch")
+        )
+        points = result.scalar()
+        await self._invalidate_balance_cache(user_id)
+        return int(points or 0)
+
+    async def _get_balance_row(self, user_id: int, company_id: int, create: bool = True) -> PointBalance | None:
+        """获取 (用户, 公司) 余额行；create=True 时不存在则用流水汇总初始化."""
+        query = select(PointBalance).filter(
+            PointBalance.user_id == user_id,
+            PointBalance.company_id == company_id,
+        ).execution_options(populate_existing=True)
+        row = (await self.db.execute(query)).scalars().first()
+        if row is not None or not create:
+            return row
+
+        seed_balance = await self.calculate_user_balance(user_id, company_id)
+        values = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "company_id": company_id,
+            "balance": seed_balance,
+            "version": 0,
+            "updated_at": datetime.utcnow().replace(microsecond=0),
+        }
+        dialect = self.db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            # 并发初始化时以先写入者为准
+            await self.db.execute(
+                insert(PointBalance).values(**values).on_conflict_do_nothing(
+                    index_elements=["user_id", "company_id"]
+                )
+            )
+        else:
+            self.db.add(PointBalance(**values))
+            await self.db.flush()
+        return (await self.db.execute(query)).scalars().first()
+
+    async def _apply_balance_delta(
+        self,
+        user_id: int,
+        company_id: int,
+        delta: int,
+        validate: Callable[[int], None] | None = None,
+    ) -> int:
+        """在余额表上按版本号原子更新余额，返回更新后的余额（后端存储格式）.
+
+        必须在插入对应 PointTransaction 之前调用，与其处于同一事务；
+        validate 接收当前余额，不满足条件时抛出 ValueError。
+        """
+        mark_balance_dirty(self.db, user_id)
+        for _ in range(BALANCE_UPDATE_RETRIES):
+            row = await self._get_balance_row(user_id, company_id)
+            current_balance = int(row.balance)
+            if validate is not None:
+                validate(current_balance)
+
+            new_balance = current_balance + delta
+            result = await self.db.execute(
+                update(PointBalance)
+                .where(PointBalance.id == row.id, PointBalance.version == row.version)
+                .values(
+                    balance=new_balance,
+                    version=row.version + 1,
+                    updated_at=datetime.utcnow().replace(microsecond=0),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 1:
+                self.db.expire(row)
+                return new_balance
+            logger.info(f"积分余额版本冲突，重试: user_id={user_id}, company_id={company_id}")
+
+        raise ValueError("积分余额更新冲突，请稍后重试")
+
+    async def _debit_balance(self, user_id: int, company_id: int, amount: int) -> int:
+        """条件扣减余额，返回扣减后的余额（后端存储格式）.
+
+        一条 UPDATE ... WHERE balance >= amount RETURNING balance 同时完成余额校验与扣减，
+        并发扣减由数据库行锁串行化，无需先读后写；余额行不存在时先用流水汇总初始化。
+        """
+        mark_balance_dirty(self.db, user_id)
+        for _ in range(2):
+            result = await self.db.execute(
+                update(PointBalance)
+                .where(
+                    PointBalance.user_id == user_id,
+                    PointBalance.company_id == company_id,
+                    PointBalance.balance >= amount,
+                )
+                .values(
+                    balance=PointBalance.balance - amount,
+                    version=PointBalance.version + 1,
+                    updated_at=datetime.utcnow().replace(microsecond=0),
+                )
+                .returning(PointBalance.balance)
+                .execution_options(synchronize_session=False)
+            )
+            new_balance = result.scalar()
+            if new_balance is not None:
+                return int(new_balance)
+
+            row = await self._get_balance_row(user_id, company_id)
+            if row.balance < amount:
+                raise ValueError(
+                    f"积分余额不足，当前余额: {PointConverter.to_display(row.balance)}，"
+                    f"需要: {PointConverter.to_display(amount)}"
+                )
+
+        raise ValueError("积分余额更新冲突，请稍后重试")
+
+    async def _set_ledger_balance(self, user_id: int, company_id: int, balance: int) -> None:
+        """将余额表直接校准为指定值（用于回放/对账之后）."""
+        mark_balance_dirty(self.db, user_id)
+        row = await self._get_balance_row(user_id, company_id)
+        await self.db.execute(
+            update(PointBalance)
+            .where(PointBalance.id == row.id)
+            .values(balance=balance, version=PointBalance.version + 1, updated_at=datetime.utcnow().replace(microsecond=0))
+            .execution_options(synchronize_session=False)
+        )
+        self.db.expire(row)
+        await self._invalidate_balance_cache(user_id)
+
+    async def rebuild_balance_ledger(self, user_id: int) -> dict[int | None, int]:
+        """以交易流水为准重建该用户所有公司的余额行，返回 {company_id: balance}."""
+        result = await self.db.execute(
+            select(PointTransaction.company_id, func.sum(PointTransaction.amount))
+            .filter(PointTransaction.user_id == user_id)
+            .group_by(PointTransaction.company_id)
+        )
+        balances = {company_id: int(total or 0) for company_id, total in result.all()}
+        for company_id, balance in balances.items():
+            await self._set_ledger_balance(user_id, company_id, balance)
+        return balances
 
     async def _check_level_upgrade(self, user_id: int, points: int):
         """检查并更新用户等级."""
@@ -583,7 +818,8 @@ class PointService:
         from app.services.level_service import LevelService
         level_service = LevelService(self.db)
 
-        level_changed, old_level, new_level = await level_service.check_level_upgrade(user_id, points)
+        # 调用方统一提交，等级更新随积分变动在同一事务内生效
+        level_changed, old_level, new_level = await level_service.check_level_upgrade(user_id, points, commit=False)
 
         if level_changed:
             logger.info(f"用户 {user_id} 等级变化: {old_level.name if old_level else '无'} -> {new_level.name if new_level else '无'}")
@@ -649,7 +885,13 @@ class PointService:
         result = await self.db.execute(select(User.points).filter(User.id == user_id))
         user_points = result.scalar() or 0
 
-        is_consistent = (current_balance == calculated_balance == user_points)
+        # 余额表（各公司合计）与流水汇总对账
+        ledger_result = await self.db.execute(
+            select(func.sum(PointBalance.balance)).filter(PointBalance.user_id == user_id)
+        )
+        ledger_balance = int(ledger_result.scalar() or 0)
+
+        is_consistent = (current_balance == calculated_balance == user_points == ledger_balance)
 
         return {
             "user_id": user_id,
@@ -657,9 +899,11 @@ class PointService:
             "current_balance": current_balance,
             "calculated_balance": calculated_balance,
             "user_table_points": user_points,
+            "ledger_balance": ledger_balance,
             "discrepancy": {
                 "transaction_vs_calculated": current_balance - calculated_balance,
-                "user_vs_transaction": user_points - current_balance
+                "user_vs_transaction": user_points - current_balance,
+                "ledger_vs_calculated": ledger_balance - calculated_balance
             }
         }
 
@@ -686,6 +930,7 @@ class PointService:
                     # 以交易记录计算的余额为准
                     correct_balance = consistency["calculated_balance"]
                     await self._update_user_points(user_id, correct_balance)
+                    await self.rebuild_balance_ledger(user_id)
                     validation_result["fixes_applied"].append({
                         "type": "balance_fix",
                         "description": f"修复用户表积分余额: {consistency['user_table_points']} -> {correct_balance}"
@@ -761,6 +1006,9 @@ class PointService:
             running_balance += txn.amount
             txn.balance_after = running_balance
 
+        # 余额表与回放结果保持一致
+        await self._set_ledger_balance(user_id, company_id, running_balance)
+
     async def update_activity_earn_and_replay(
         self,
         user_id: int,
@@ -831,6 +1079,7 @@ class PointService:
         await self._update_user_points(user_id, (await self.calculate_user_balance(user_id)))
 
         await self.db.commit()
+        invalidate_user_balance_cache(user_id)
         await self.db.refresh(txn)
         return txn
 
@@ -1012,6 +1261,7 @@ class PointService:
                     "min_points": PointConverter.format_for_api(points_stats.min_points or 0)
                 },
                 "level_distribution": level_distribution,
+                "balance_cache": get_balance_cache_stats(),
                 "data_quality": {
                     "sample_size": sample_size,
                     "consistency_issues": consistency_issues,
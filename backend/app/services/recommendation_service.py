@@ -0,0 +1,257 @@
+"""商城推荐服务 - 基于预计算候选列表的个性化推荐.
+
+- 用户分类偏好（UserCategoryAffinity）在购买/取消购买时与购买记录同一事务内增量更新
+- 公司热门商品（MallItemPopularity）由定时任务整体刷新，公司首次请求时按需生成
+- 推荐请求只读取偏好前几名与公司候选列表，再按当前余额与库存过滤
+"""
+import logging
+from datetime import datetime
+from typing import Any
+
+from app.core.config import settings
+from app.models.company import Company
+from app.models.recommendation import MallItemPopularity, UserCategoryAffinity
+from app.models.reward import MallItem
+from app.models.scoring import PointPurchase, PurchaseStatus
+from sqlalchemy import (
+    Integer,
+    and_,
+    delete,
+    desc,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# 推荐时允许略微超出当前余额
+BUDGET_TOLERANCE = 1.2
+
+
+def _company_scope(column, company_id: int | None):
+    return column.is_(None) if company_id is None else column == company_id
+
+
+class RecommendationService:
+    """商城推荐服务类."""
+
+    def __init__(self, db: AsyncSession):
+        """初始化服务."""
+        self.db = db
+
+    # ==================== 用户分类偏好 ====================
+
+    async def record_purchase(self, user_id: int, category: str, delta: int = 1) -> None:
+        """增量更新用户分类偏好（不提交，随调用方事务提交）.
+
+        Args:
+            user_id: 用户ID
+            category: 商品分类
+            delta: 购买为 +1，取消购买为 -1
+
+        """
+        now = datetime.utcnow().replace(microsecond=0)
+        values = {"score": UserCategoryAffinity.score + delta, "updated_at": now}
+        if delta > 0:
+            values["last_purchased_at"] = now
+        result = await self.db.execute(
+            update(UserCategoryAffinity)
+            .where(
+                UserCategoryAffinity.user_id == user_id,
+                UserCategoryAffinity.category == category,
+            )
+            .values(**values)
+        )
+        if result.rowcount or delta <= 0:
+            return
+
+        row = {
+            "user_id": user_id,
+            "category": category,
+            "score": delta,
+            "last_purchased_at": now,
+            "updated_at": now,
+        }
+        dialect = self.db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            # 并发首次购买同一分类时累加到已写入的行上
+            stmt = dialect_insert(UserCategoryAffinity).values(**row)
+            await self.db.execute(stmt.on_conflict_do_update(
+                index_elements=["user_id", "category"],
+                set_={
+                    "score": UserCategoryAffinity.score + delta,
+                    "last_purchased_at": now,
+                    "updated_at": now,
+                },
+            ))
+        else:
+            self.db.add(UserCategoryAffinity(**row))
+            await self.db.flush()
+
+    async def get_preferred_categories(self, user_id: int, limit: int = 3) -> list[str]:
+        """按偏好分数获取用户最常购买的分类."""
+        result = await self.db.execute(
+            select(UserCategoryAffinity.category)
+            .where(UserCategoryAffinity.user_id == user_id, UserCategoryAffinity.score > 0)
+            .order_by(desc(UserCategoryAffinity.score), desc(UserCategoryAffinity.last_purchased_at))
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def rebuild_affinities(self) -> int:
+        """根据购买记录全量重建用户分类偏好，返回写入的行数."""
+        await self.db.execute(delete(UserCategoryAffinity))
+        source = (
+            select(
+                PointPurchase.user_id,
+                MallItem.category,
+                func.count(PointPurchase.id),
+                func.max(PointPurchase.created_at),
+                literal(datetime.utcnow().replace(microsecond=0)),
+            )
+            .join(MallItem, MallItem.id == PointPurchase.item_id)
+            .where(PointPurchase.status != PurchaseStatus.CANCELLED)
+            .group_by(PointPurchase.user_id, MallItem.category)
+        )
+        result = await self.db.execute(
+            insert(UserCategoryAffinity).from_select(
+                ["user_id", "category", "score", "last_purchased_at", "updated_at"], source
+            )
+        )
+        await self.db.commit()
+        return result.rowcount
+
+    # ==================== 公司热门商品 ====================
+
+    async def refresh_popularity(self, company_id: int | None = None, commit: bool = True) -> int:
+        """重新物化一个公司的热门商品候选列表，返回写入的候选数.
+
+        排名依次按推荐标记、公司内未取消的购买次数、浏览量；
+        保留全站前 RECOMMENDATION_TOP_N 与每个分类前 RECOMMENDATION_CATEGORY_TOP_N 的商品。
+        """
+        purchases = (
+            select(PointPurchase.item_id, func.count(PointPurchase.id).label("purchase_count"))
+            .where(
+                PointPurchase.status != PurchaseStatus.CANCELLED,
+                _company_scope(PointPurchase.company_id, company_id),
+            )
+            .group_by(PointPurchase.item_id)
+            .subquery()
+        )
+        purchase_count = func.coalesce(purchases.c.purchase_count, 0)
+        ordering = [desc(MallItem.is_featured), desc(purchase_count), desc(MallItem.view_count), MallItem.id]
+        ranked = (
+            select(
+                MallItem.id.label("item_id"),
+                MallItem.category,
+                MallItem.is_featured,
+                purchase_count.label("purchase_count"),
+                func.row_number().over(order_by=ordering).label("rank"),
+                func.row_number().over(partition_by=MallItem.category, order_by=ordering).label("category_rank"),
+            )
+            .outerjoin(purchases, purchases.c.item_id == MallItem.id)
+            .where(
+                MallItem.deleted_at.is_(None),
+                MallItem.is_available,
+                MallItem.stock > 0,
+                or_(MallItem.company_id.is_(None), MallItem.company_id == company_id)
+                if company_id is not None else MallItem.company_id.is_(None),
+            )
+            .subquery()
+        )
+        source = select(
+            literal(company_id, Integer),
+            ranked.c.item_id,
+            ranked.c.category,
+            ranked.c.is_featured,
+            ranked.c.purchase_count,
+            ranked.c.rank,
+            ranked.c.category_rank,
+            literal(datetime.utcnow().replace(microsecond=0)),
+        ).where(or_(
+            ranked.c.rank <= settings.RECOMMENDATION_TOP_N,
+            ranked.c.category_rank <= settings.RECOMMENDATION_CATEGORY_TOP_N,
+        ))
+
+        await self.db.execute(
+            delete(MallItemPopularity).where(_company_scope(MallItemPopularity.company_id, company_id))
+        )
+        result = await self.db.execute(
+            insert(MallItemPopularity).from_select(
+                ["company_id", "item_id", "category", "is_featured", "purchase_count",
+                 "rank", "category_rank", "refreshed_at"],
+                source,
+            )
+        )
+        if commit:
+            await self.db.commit()
+        return result.rowcount
+
+    async def refresh_all_popularity(self) -> dict[str, Any]:
+        """刷新所有公司（含无公司用户）的热门商品候选列表."""
+        company_ids = (await self.db.execute(select(Company.id))).scalars().all()
+        candidates = 0
+        for company_id in [None, *company_ids]:
+            candidates += await self.refresh_popularity(company_id, commit=False)
+        await self.db.commit()
+        logger.info(f"已刷新 {len(company_ids) + 1} 个公司的热门商品，候选 {candidates} 个")
+        return {"companies": len(company_ids) + 1, "candidates": candidates}
+
+    # ==================== 推荐 ====================
+
+    async def get_recommendations(
+        self,
+        user_id: int,
+        company_id: int | None,
+        balance: int,
+        limit: int = 10,
+    ) -> dict[str, Any]:
+        """从预计算候选列表中获取推荐商品.
+
+        Args:
+            user_id: 用户ID
+            company_id: 用户所属公司ID
+            balance: 用户当前余额（后端存储格式）
+            limit: 推荐数量
+
+        """
+        preferred_categories = await self.get_preferred_categories(user_id)
+
+        scope = _company_scope(MallItemPopularity.company_id, company_id)
+        has_candidates = await self.db.scalar(select(MallItemPopularity.id).where(scope).limit(1))
+        if has_candidates is None:
+            await self.refresh_popularity(company_id)
+
+        ordering = [MallItemPopularity.rank]
+        if preferred_categories:
+            # 偏好分类优先，分类内仍按公司热门排名
+            ordering.insert(0, desc(MallItemPopularity.category.in_(preferred_categories)))
+
+        result = await self.db.execute(
+            select(MallItem, MallItemPopularity.purchase_count)
+            .join(MallItemPopularity, MallItemPopularity.item_id == MallItem.id)
+            .where(
+                and_(
+                    scope,
+                    MallItem.deleted_at.is_(None),
+                    MallItem.is_available,
+                    MallItem.stock > 0,
+                    MallItem.points_cost <= int(balance * BUDGET_TOLERANCE),
+                )
+            )
+            .order_by(*ordering)
+            .limit(limit)
+        )
+        return {
+            "items": result.all(),
+            "preferredCategories": preferred_categories,
+        }
@@ -1,12 +1,15 @@
 """积分系统一致性检查定期任务
+
+任务由 app.core.job_scheduler 按 cron 调度（UTC），多 worker 部署时只有持有领导者租约的进程执行。
 """
-import asyncio
 import logging
 from datetime import datetime
 from typing import Any, Dict
 
 from app.core.database import AsyncSessionLocal
+from app.core.job_scheduler import JobScheduler, job_scheduler
 from app.services.consistency_service import ConsistencyService
+from sqlalchemy.orm import sessionmaker
 
 logger = logging.getLogger(__name__)
 
@@ -15,15 +18,14 @@ class ConsistencyTaskScheduler:
     """一致性检查任务调度器"""
 
     def __init__(self):
-        self.is_running = False
         self.last_check_time = None
         self.last_check_result = None
 
-    async def run_daily_consistency_check(self) -> Dict[str, Any]:
+    async def run_daily_consistency_check(self, session_factory: sessionmaker | None = None) -> dict[str, Any]:
         """运行每日一致性检查"""
         logger.info("开始运行每日一致性检查")
 
-        async with AsyncSessionLocal() as db:
+        async with (session_factory or AsyncSessionLocal)() as db:
             consistency_service = ConsistencyService(db)
 
             try:
@@ -57,11 +59,11 @@ class ConsistencyTaskScheduler:
                 self.last_check_result = error_report
                 return error_report
 
-    async def run_balance_fix_task(self) -> Dict[str, Any]:
+    async def run_balance_fix_task(self, session_factory: sessionmaker | None = None) -> dict[str, Any]:
         """运行积分余额修复任务"""
         logger.info("开始运行积分余额修复任务")
 
-        async with AsyncSessionLocal() as db:
+        async with (session_factory or AsyncSessionLocal)() as db:
             consistency_service = ConsistencyService(db)
 
             try:
@@ -77,7 +79,7 @@ class ConsistencyTaskScheduler:
                     }
 
                 # 自动修复余额不一致问题
-                fix_results = await consistency_service.fix_all_balance_inconsistencies()
+                fix_results = await consistency_service.fix_all_balance_inconsistencies(balance_issues)
                 fixed_count = sum(1 for r in fix_results if r.get("fixed", False))
 
                 logger.info(f"积分余额修复完成，修复了 {fixed_count} 个用户的积分余额")
@@ -98,11 +100,11 @@ class ConsistencyTaskScheduler:
                     "fixedCount": 0
                 }
 
-    async def run_health_monitoring(self) -> Dict[str, Any]:
+    async def run_health_monitoring(self, session_factory: sessionmaker | None = None) -> dict[str, Any]:
         """运行系统健康监控"""
         logger.info("开始运行系统健康监控")
 
-        async with AsyncSessionLocal() as db:
+        async with (session_factory or AsyncSessionLocal)() as db:
             consistency_service = ConsistencyService(db)
 
             try:
@@ -188,47 +190,27 @@ class ConsistencyTaskScheduler:
         # await send_email_alert(alert_message)
         # await send_dingtalk_alert(alert_message)
 
-    async def start_scheduled_tasks(self):
-        """启动定期任务"""
-        if self.is_running:
-            logger.warning("定期任务已在运行中")
-            return
-
-        self.is_running = True
-        logger.info("启动积分系统定期任务")
-
-        try:
-            while self.is_running:
-                current_time = datetime.utcnow()
-
-                # 每天凌晨2点运行一致性检查
-                if (current_time.hour == 2 and current_time.minute == 0 and
-                    (not self.last_check_time or
-                     current_time.date() > self.last_check_time.date())):
-
-                    await self.run_daily_consistency_check()
-
-                # 每小时运行健康监控
-                if current_time.minute == 0:
-                    await self.run_health_monitoring()
-
-                # 每6小时运行一次余额修复检查
-                if current_time.hour % 6 == 0 and current_time.minute == 30:
-                    await self.run_balance_fix_task()
+    def register_jobs(self, scheduler: JobScheduler) -> None:
+        """向调度器注册一致性相关的定期任务."""
+        async def daily_check(session_factory: sessionmaker) -> dict[str, Any]:
+            report = await self.run_daily_consistency_check(session_factory)
+            return {"totalIssues": report.get("totalIssues"), "isConsistent": report.get("isConsistent")}
 
-                # 等待1分钟后再次检查
-                await asyncio.sleep(60)
+        async def balance_fix(session_factory: sessionmaker) -> dict[str, Any]:
+            result = await self.run_balance_fix_task(session_factory)
+            return {"success": result.get("success"), "fixedCount": result.get("fixedCount")}
 
-        except Exception as e:
-            logger.error(f"定期任务执行出错: {e}")
-        finally:
-            self.is_running = False
-            logger.info("积分系统定期任务已停止")
+        async def health_monitoring(session_factory: sessionmaker) -> dict[str, Any]:
+            metrics = await self.run_health_monitoring(session_factory)
+            return {"alertCount": metrics.get("alertCount", 0)}
 
-    def stop_scheduled_tasks(self):
-        """停止定期任务"""
-        self.is_running = False
-        logger.info("正在停止积分系统定期任务...")
+        # 修复余额时会失效进程内的余额缓存（非线程安全），因此一致性任务在主事件循环中执行
+        # 每天凌晨2点运行一致性检查
+        scheduler.register("consistency_check", "0 2 * * *", daily_check, timeout=1800, jitter=60)
+        # 每小时运行健康监控
+        scheduler.register("health_monitoring", "0 * * * *", health_monitoring, timeout=300, jitter=30)
+        # 每6小时运行一次余额修复检查
+        scheduler.register("balance_fix", "30 */6 * * *", balance_fix, timeout=1800, jitter=60)
 
 
 # 全局任务调度器实例
@@ -236,10 +218,11 @@ consistency_scheduler = ConsistencyTaskScheduler()
 
 
 async def start_consistency_tasks():
-    """启动一致性检查任务"""
-    await consistency_scheduler.start_scheduled_tasks()
+    """注册一致性检查任务并启动调度器."""
+    consistency_scheduler.register_jobs(job_scheduler)
+    await job_scheduler.start()
 
 
-def stop_consistency_tasks():
-    """停止一致性检查任务"""
-    consistency_scheduler.stop_scheduled_tasks()
+async def stop_consistency_tasks():
+    """停止调度器."""
+    await job_scheduler.stop()
@@ -0,0 +1,21 @@
+"""通知保留定期任务.
+
+定时执行通知保留策略（过期标记、归档、超期删除），由 app.core.job_scheduler 按 cron 调度（UTC）。
+"""
+from typing import Any
+
+from app.core.job_scheduler import JobScheduler
+from app.services.notification_service import NotificationService
+from sqlalchemy.orm import sessionmaker
+
+
+async def apply_retention(session_factory: sessionmaker) -> dict[str, Any]:
+    """执行一轮通知保留策略."""
+    async with session_factory() as db:
+        return await NotificationService(db).apply_retention()
+
+
+def register_jobs(scheduler: JobScheduler) -> None:
+    """向调度器注册通知相关的定期任务."""
+    # 每小时执行一次，单批短事务，不会长时间占用写锁
+    scheduler.register("notification_retention", "20 * * * *", apply_retention, timeout=1800, jitter=60)
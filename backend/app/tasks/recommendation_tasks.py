@@ -0,0 +1,21 @@
+"""商城推荐定期任务.
+
+定时刷新各公司的热门商品候选列表（MallItemPopularity），由 app.core.job_scheduler 按 cron 调度（UTC）。
+"""
+from typing import Any
+
+from app.core.job_scheduler import JobScheduler
+from app.services.recommendation_service import RecommendationService
+from sqlalchemy.orm import sessionmaker
+
+
+async def refresh_popularity(session_factory: sessionmaker) -> dict[str, Any]:
+    """刷新全部公司的热门商品候选列表."""
+    async with session_factory() as db:
+        return await RecommendationService(db).refresh_all_popularity()
+
+
+def register_jobs(scheduler: JobScheduler) -> None:
+    """向调度器注册推荐相关的定期任务."""
+    # 每10分钟刷新一次热门商品候选列表
+    scheduler.register("recommendation_refresh", "*/10 * * * *", refresh_popularity, timeout=300, jitter=30)
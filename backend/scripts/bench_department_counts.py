@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""组织成员数统计查询基准.
+
+在临时 SQLite 库中生成 200 个组织、10000 名用户，对比逐组织加载 User 的旧实现
+与 GROUP BY 聚合实现的 SQL 语句数和耗时，并断言组织列表接口的查询数不随组织数量增长。
+
+用法: python scripts/bench_department_counts.py [--departments 200] [--users 10000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app.models  # noqa: F401  注册全部模型
+from app.api.department import get_departments
+from app.core.database import Base
+from app.models.company import Company
+from app.models.department import Department
+from app.models.user import User
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+# 列表接口允许的最大查询数：组织列表 + selectinload(company) + 成员聚合
+MAX_LIST_QUERIES = 3
+
+
+class QueryCounter:
+    """统计引擎执行的 SQL 语句数."""
+
+    def __init__(self, engine):
+        """注册语句计数监听."""
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+
+async def seed(session_factory, departments: int, users: int):
+    """生成组织与用户数据."""
+    async with session_factory() as db:
+        db.add(User(name="owner", email="owner@example.com"))
+        await db.flush()
+        db.add(Company(name="Bench", creator_user_id=1))
+        await db.flush()
+        await db.execute(insert(Department), [
+            {"name": f"dept-{i}", "company_id": 1} for i in range(departments)
+        ])
+        await db.execute(insert(User), [
+            {
+                "name": f"user-{i}",
+                "email": f"user-{i}@example.com",
+                "company_id": 1,
+                "department_id": i % departments + 1,
+                "completed_tasks": i % 3,
+                "is_super_admin": False,
+            }
+            for i in range(users)
+        ])
+        await db.commit()
+
+
+async def legacy_member_counts(db: AsyncSession) -> dict[int, tuple[int, int]]:
+    """旧实现：逐组织加载全部成员后在 Python 中计数."""
+    departments = (await db.execute(select(Department))).scalars().all()
+    stats = {}
+    for dept in departments:
+        all_users = (await db.execute(select(User).filter(User.department_id == dept.id))).scalars().all()
+        active = sum(1 for user in all_users if user.completed_tasks and user.completed_tasks > 0)
+        stats[dept.id] = (len(all_users), active)
+    return stats
+
+
+async def main():
+    """运行基准并输出对比结果."""
+    parser = argparse.ArgumentParser(description="组织成员数统计查询基准")
+    parser.add_argument("--departments", type=int, default=200)
+    parser.add_argument("--users", type=int, default=10000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await seed(session_factory, args.departments, args.users)
+    counter = QueryCounter(engine)
+
+    async with session_factory() as db:
+        counter.count = 0
+        start = time.perf_counter()
+        legacy = await legacy_member_counts(db)
+        print(f"旧实现:   {counter.count:5d} 条 SQL, {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    async with session_factory() as db:
+        current_user = await db.get(User, 1)
+        counter.count = 0
+        start = time.perf_counter()
+        response = await get_departments(company_id=1, db=db, current_user=current_user)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"聚合实现: {counter.count:5d} 条 SQL, {elapsed:8.1f} ms")
+
+    grouped = {d["id"]: (d["memberCount"], d["activeMembersCount"]) for d in response["data"]}
+    assert grouped == legacy, "成员数统计结果不一致"
+    assert counter.count <= MAX_LIST_QUERIES, f"组织列表查询数 {counter.count} 超过 {MAX_LIST_QUERIES}"
+    print("✅ 统计结果一致，查询数符合预期")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
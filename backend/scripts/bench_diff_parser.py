@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""diff 解析性能基准.
+
+对比旧版 parse_unified_diff + compress_diff（整段 splitlines、hunk 反复 join/split）
+与流式 iter_unified_diff + compress_diff 在合成 1MB / 10MB patch 上的耗时与内存峰值，
+并校验两者输出一致。
+
+用法: python scripts/bench_diff_parser.py [--sizes 1 10]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.ai_service import compress_diff, iter_unified_diff, parse_unified_diff
+
+
+def legacy_parse_unified_diff(patch_text: str):
+    """旧版实现（保留用于对比）."""
+    result = []
+    current_file_entry = None
+    added_lines, added_code, deleted_lines, deleted_code = [], [], [], []
+    file_path_re = re.compile(r'^\+\+\+\s*(?:b/)?(.+)$')
+    hunk_header_re = re.compile(r'^@@ -(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@')
+    old_line_no = new_line_no = 0
+
+    def flush_hunk():
+        nonlocal added_lines, added_code, deleted_lines, deleted_code
+        if current_file_entry and (added_code or deleted_code):
+            current_file_entry["added_lines"].append(added_lines)
+            current_file_entry["added_code"].append("\n".join(added_code))
+            current_file_entry["deleted_lines"].append(deleted_lines)
+            current_file_entry["deleted_code"].append("\n".join(deleted_code))
+        added_lines, added_code, deleted_lines, deleted_code = [], [], [], []
+
+    for line in patch_text.splitlines():
+        if line.startswith("diff --git"):
+            flush_hunk()
+            if current_file_entry:
+                result.append(current_file_entry)
+            current_file_entry = None
+            continue
+        if line.startswith("+++ "):
+            m = file_path_re.match(line)
+            if m:
+                flush_hunk()
+                if current_file_entry:
+                    result.append(current_file_entry)
+                current_file_entry = {"file_path": m.group(1), "added_lines": [], "added_code": [],
+                                      "deleted_lines": [], "deleted_code": []}
+            continue
+        if line.startswith("@@"):
+            flush_hunk()
+            m = hunk_header_re.match(line)
+            if m:
+                old_line_no, new_line_no = int(m.group(1)), int(m.group(2))
+            continue
+        if line.startswith("+"):
+            if current_file_entry is not None:
+                added_lines.append(new_line_no)
+                added_code.append(line[1:])
+                new_line_no += 1
+            continue
+        if line.startswith("-"):
+            if current_file_entry is not None:
+                deleted_lines.append(old_line_no)
+                deleted_code.append(line[1:])
+                old_line_no += 1
+            continue
+        if current_file_entry is not None:
+            old_line_no += 1
+            new_line_no += 1
+    flush_hunk()
+    if current_file_entry:
+        result.append(current_file_entry)
+    return result
+
+
+def make_patch(size_mb: int) -> str:
+    """生成约 size_mb MB 的合成 patch（GitHub files API 拼接格式）."""
+    target = size_mb * 1024 * 1024
+    parts = []
+    total = 0
+    file_idx = 0
+    while total < target:
+        chunk = [f"+++ b/src/module_{file_idx}/file_{file_idx}.py"]
+        for hunk in range(5):
+            start = hunk * 200 + 1
+            chunk.append(f"@@ -{start},60 +{start},80 @@ def func_{hunk}():")
+            for i in range(20):
+                chunk.append(f"     context line {i} = compute(value_{i}, other_{i})")
+                chunk.append(f"-    removed_line_{i} = legacy_call({i}, 'old')")
+                chunk.append(f"+    added_line_{i} = new_call({i}, 'new', flag=True)")
+                chunk.append(f"+    extra_line_{i} = helper({i})")
+        text = "\n".join(chunk) + "\n"
+        parts.append(text)
+        total += len(text)
+        file_idx += 1
+    return "".join(parts)
+
+
+def measure(label, func, repeat: int = 3):
+    """测量 func 的最短耗时与内存峰值，返回其结果."""
+    # 计时与内存统计分开进行，避免 tracemalloc 的开销影响耗时
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<10} {elapsed * 1000:9.1f} ms   峰值内存 {peak / 1024 / 1024:8.1f} MB")
+    return result
+
+
+def main():
+    """运行基准并校验两种实现输出一致."""
+    parser = argparse.ArgumentParser(description="diff 解析性能基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10], help="patch 大小（MB）")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        patch = make_patch(size)
+        print(f"\n📊 patch 大小 {len(patch) / 1024 / 1024:.1f} MB, {patch.count(chr(10))} 行")
+        legacy = measure("旧版", lambda: compress_diff(legacy_parse_unified_diff(patch)))
+        streaming = measure("流式", lambda: compress_diff(iter_unified_diff(patch)))
+        assert legacy == streaming, "输出不一致"
+        assert parse_unified_diff(patch) == legacy_parse_unified_diff(patch), "parse_unified_diff 输出不一致"
+        print("  ✅ 输出一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""全量等级重算基准.
+
+在临时 SQLite 库中生成 10 万名用户（积分随机分布在各等级区间），运行集合式等级重算，
+输出 SQL 语句数、耗时与差异汇总，并校验重算结果与 LevelIndex 逐个计算的结果一致。
+
+用法: python scripts/bench_level_recompute.py [--users 100000] [--notify]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app.models  # noqa: F401  注册全部模型
+from app.core.database import Base
+from app.models import scoring  # noqa: F401
+from app.models.user import User
+from app.services.level_service import LevelService
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+# 不发送通知时的耗时上限（秒）
+MAX_SECONDS = 1.0
+
+
+class QueryCounter:
+    """统计引擎执行的 SQL 语句数."""
+
+    def __init__(self, engine):
+        """注册语句计数监听."""
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+
+async def seed(session_factory, users: int):
+    """生成积分随机分布的用户数据."""
+    async with session_factory() as db:
+        await LevelService(db).get_all_levels()
+        rng = random.Random(42)
+        await db.execute(insert(User), [
+            {
+                "name": f"user-{i}",
+                "email": f"user-{i}@example.com",
+                "points": rng.randint(0, 20000),
+                "is_super_admin": False,
+            }
+            for i in range(users)
+        ])
+        await db.commit()
+
+
+async def main():
+    """运行基准并校验重算结果."""
+    parser = argparse.ArgumentParser(description="全量等级重算基准")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--notify", action="store_true", help="同时写入等级变化通知")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await seed(session_factory, args.users)
+    counter = QueryCounter(engine)
+
+    async with session_factory() as db:
+        service = LevelService(db)
+        index = await service.get_level_index()
+
+        counter.count = 0
+        start = time.perf_counter()
+        summary = await service.recompute_all_levels(notify=args.notify)
+        elapsed = time.perf_counter() - start
+        print(f"首次重算: {counter.count:4d} 条 SQL, {elapsed * 1000:8.1f} ms, "
+              f"变化 {summary['changedUsers']} 人（升级 {summary['upgraded']}，通知 {summary['notified']}）")
+        for transition in summary["transitions"]:
+            print(f"  {transition['from']} -> {transition['to']}: {transition['count']}")
+
+        counter.count = 0
+        start = time.perf_counter()
+        again = await service.recompute_all_levels(notify=args.notify)
+        print(f"再次重算: {counter.count:4d} 条 SQL, {(time.perf_counter() - start) * 1000:8.1f} ms, 变化 {again['changedUsers']} 人")
+
+        rows = (await db.execute(select(User.points, User.level_id))).all()
+        for points, level_id in rows:
+            expected = index.level_for_points(points or 0)
+            assert level_id == (expected.id if expected else None), f"积分 {points} 的等级不正确: {level_id}"
+
+    assert again["changedUsers"] == 0, "重复重算不应产生变化"
+    if not args.notify:
+        assert elapsed < MAX_SECONDS, f"重算耗时 {elapsed:.2f}s 超过 {MAX_SECONDS}s"
+    print("✅ 等级结果与 LevelIndex 一致")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
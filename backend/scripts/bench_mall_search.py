@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""商城商品搜索基准.
+
+在临时 SQLite 库中生成 10 万个中英文混合商品，构建 FTS5 索引，
+对比原 LIKE '%q%' 查询与全文检索（BM25 排序 + 真实总数）的耗时，
+并校验全文检索命中的商品确实包含查询词。
+
+用法: python scripts/bench_mall_search.py [--items 100000] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app.models  # noqa: F401  注册全部模型
+from app.core.database import Base
+from app.models import scoring  # noqa: F401
+from app.models.reward import MallItem
+from app.services.mall_search import mall_search_index
+from sqlalchemy import and_, desc, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+BRANDS = ["Apple", "Xiaomi", "Huawei", "Sony", "Logitech", "Lenovo", "Anker", "Dell"]
+NOUNS = ["蓝牙耳机", "机械键盘", "无线鼠标", "保温杯", "双肩背包", "显示器", "充电宝", "咖啡券",
+         "电影票", "运动手环", "台灯", "笔记本", "雨伞", "抱枕", "音箱", "手机壳"]
+ADJECTIVES = ["限量版", "降噪", "便携", "高清", "智能", "轻薄", "经典", "定制"]
+QUERIES = ["蓝牙耳机", "键盘", "降噪 耳机", "Sony", "logi", "咖啡", "智能手环", "保温"]
+
+
+async def seed(session_factory, items: int):
+    """生成中英文混合商品数据."""
+    rng = random.Random(42)
+    rows = []
+    for i in range(items):
+        brand, noun, adjective = rng.choice(BRANDS), rng.choice(NOUNS), rng.choice(ADJECTIVES)
+        rows.append({
+            "id": f"item-{i:07d}",
+            "name": f"{brand} {adjective}{noun} {i}",
+            "short_description": f"{adjective}{noun}，员工福利兑换",
+            "description": f"{brand} 出品的{noun}，{rng.choice(ADJECTIVES)}设计，适合日常办公与通勤使用。",
+            "tags": [adjective, noun],
+            "category": noun,
+            "points_cost": rng.randint(1, 500) * 1000,
+            "stock": rng.randint(0, 100),
+            "is_available": True,
+            "view_count": rng.randint(0, 10000),
+        })
+    async with session_factory() as db:
+        for start in range(0, len(rows), 10000):
+            await db.execute(insert(MallItem), rows[start:start + 10000])
+        await db.commit()
+
+
+def base_filters():
+    """商品可购买的公共过滤条件."""
+    return [MallItem.deleted_at.is_(None), MallItem.is_available, MallItem.stock > 0]
+
+
+async def like_search(db: AsyncSession, q: str):
+    """原实现：LIKE 扫描 + 按推荐/浏览量排序."""
+    filters = base_filters() + [or_(
+        MallItem.name.ilike(f"%{q}%"),
+        MallItem.description.ilike(f"%{q}%"),
+        MallItem.short_description.ilike(f"%{q}%"),
+    )]
+    total = await db.scalar(select(func.count(MallItem.id)).where(and_(*filters)))
+    items = (await db.execute(
+        select(MallItem).where(and_(*filters))
+        .order_by(desc(MallItem.is_featured), desc(MallItem.view_count)).limit(20)
+    )).scalars().all()
+    return items, total
+
+
+async def fts_search(db: AsyncSession, q: str):
+    """新实现：全文检索 + BM25 排序."""
+    rows, total = await mall_search_index.search(db, q, base_filters(), limit=20)
+    return [item for item, _ in rows], total
+
+
+async def timed(session_factory, fn, q: str, repeat: int):
+    """执行 repeat 次查询，返回平均耗时（毫秒）与最后一次结果."""
+    async with session_factory() as db:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            items, total = await fn(db, q)
+        return (time.perf_counter() - start) / repeat * 1000, items, total
+
+
+async def main():
+    """运行基准并校验检索结果."""
+    parser = argparse.ArgumentParser(description="商城商品搜索基准")
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await seed(session_factory, args.items)
+
+    start = time.perf_counter()
+    async with session_factory() as db:
+        assert await mall_search_index.ensure(db), "当前 SQLite 不支持 FTS5"
+    print(f"📦 生成 {args.items} 个商品并构建索引，索引耗时 {time.perf_counter() - start:.1f}s")
+
+    print(f"{'查询':<12}{'LIKE ms':>10}{'LIKE 总数':>10}{'FTS ms':>10}{'FTS 总数':>10}")
+    for q in QUERIES:
+        like_ms, _, like_total = await timed(session_factory, like_search, q, args.repeat)
+        fts_ms, items, fts_total = await timed(session_factory, fts_search, q, args.repeat)
+        print(f"{q:<12}{like_ms:>10.1f}{like_total:>10}{fts_ms:>10.1f}{fts_total:>10}")
+        words = [w.lower() for w in q.split()]
+        for item in items:
+            haystack = f"{item.name} {item.short_description} {item.description} {' '.join(item.tags)}".lower()
+            assert all(w in haystack for w in words), f"{q!r} 命中了不相关商品: {item.name}"
+
+    print("✅ 全文检索结果均包含查询词")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
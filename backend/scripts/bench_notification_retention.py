@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""通知保留任务基准.
+
+在临时 SQLite 库中生成一批跨越不同时间、不同状态的通知，执行一轮 NotificationService.apply_retention，
+统计每个写事务（第一条写语句到提交完成）持有写锁的时间，并校验：
+- 到期通知全部标记为过期，已处理的旧通知全部移入归档表，超过保留期限的通知与归档全部删除
+- 未读计数与通知表中的待处理通知数一致
+
+用法: python scripts/bench_notification_retention.py [--notifications 100000] [--batch-size 200]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app.models  # noqa: F401  注册全部模型
+from app.core.config import settings
+from app.core.database import Base
+from app.models import scoring  # noqa: F401
+from app.models.notification import (
+    Notification,
+    NotificationArchive,
+    NotificationCategory,
+    NotificationStatus,
+    NotificationUnreadCounter,
+)
+from app.models.user import User
+from app.services.notification_service import NotificationService
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+USERS = 200
+
+
+class WriteLockTimer:
+    """记录每个事务从第一条写语句到提交完成的耗时."""
+
+    def __init__(self, engine):
+        """注册写语句与提交监听."""
+        self.durations: list[float] = []
+        self._started = None
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+        event.listen(Session, "after_commit", self._on_commit)
+
+    def _on_execute(self, conn, cursor, statement, *args):
+        if self._started is None and not statement.lstrip().upper().startswith("SELECT"):
+            self._started = time.perf_counter()
+
+    def _on_commit(self, session):
+        if self._started is not None:
+            self.durations.append((time.perf_counter() - self._started) * 1000)
+            self._started = None
+
+
+async def seed(session_factory, total: int, now: datetime) -> None:
+    """生成跨越不同时间与状态的通知."""
+    rng = random.Random(42)
+    statuses = list(NotificationStatus)
+    rows = []
+    for i in range(total):
+        created_at = now - timedelta(days=rng.uniform(0, 365))
+        expires_at = created_at + timedelta(days=7) if rng.random() < 0.2 else None
+        rows.append({
+            "id": f"n-{i:07d}",
+            "user_id": rng.randint(1, USERS),
+            "category": NotificationCategory.SYSTEM,
+            "status": rng.choice(statuses),
+            "title": f"通知 {i}",
+            "summary": "摘要" * 20,
+            "payload": {"index": i},
+            "created_at": created_at,
+            "expires_at": expires_at,
+        })
+    async with session_factory() as db:
+        await db.execute(insert(User), [
+            {"id": i, "name": f"user-{i}", "email": f"user-{i}@example.com"} for i in range(1, USERS + 1)
+        ])
+        for start in range(0, total, 5000):
+            await db.execute(insert(Notification), rows[start:start + 5000])
+        await NotificationService(db)._recount_unread(list(range(1, USERS + 1)))
+        await db.commit()
+
+
+async def main():
+    """运行一轮保留任务并校验结果."""
+    parser = argparse.ArgumentParser(description="通知保留任务基准")
+    parser.add_argument("--notifications", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=settings.NOTIFICATION_RETENTION_BATCH_SIZE,
+                        help="每个写事务最多处理的行数")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    now = datetime.now(UTC)
+    await seed(session_factory, args.notifications, now)
+
+    timer = WriteLockTimer(engine)
+    start = time.perf_counter()
+    async with session_factory() as db:
+        stats = await NotificationService(db).apply_retention(now=now, batch_size=args.batch_size)
+    elapsed = time.perf_counter() - start
+
+    durations = sorted(timer.durations)
+    p99 = durations[int(len(durations) * 0.99) - 1] if len(durations) >= 100 else durations[-1]
+    print(f"保留任务: {stats}, 总耗时 {elapsed:.2f}s")
+    print(f"写事务 {len(durations)} 个, 每批最多 {args.batch_size} 行, "
+          f"目标 {settings.NOTIFICATION_RETENTION_LOCK_BUDGET_MS} ms, 持有写锁: "
+          f"中位数 {statistics.median(durations):.2f} ms, p99 {p99:.2f} ms, 最大 {durations[-1]:.2f} ms")
+
+    archive_cutoff = now - timedelta(days=settings.NOTIFICATION_ARCHIVE_AFTER_DAYS)
+    horizon = now - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+    async with session_factory() as db:
+        overdue = await db.scalar(select(func.count(Notification.id)).where(
+            Notification.expires_at <= now,
+            Notification.status.in_([NotificationStatus.PENDING, NotificationStatus.READ]),
+        ))
+        unarchived = await db.scalar(select(func.count(Notification.id)).where(
+            Notification.created_at < archive_cutoff, Notification.status != NotificationStatus.PENDING
+        ))
+        beyond_horizon = await db.scalar(select(func.count(Notification.id)).where(Notification.created_at < horizon))
+        stale_archives = await db.scalar(
+            select(func.count(NotificationArchive.id)).where(NotificationArchive.created_at < horizon)
+        )
+        pending = dict((await db.execute(
+            select(Notification.user_id, func.count(Notification.id))
+            .where(Notification.status == NotificationStatus.PENDING)
+            .group_by(Notification.user_id)
+        )).all())
+        counters = dict((await db.execute(
+            select(NotificationUnreadCounter.user_id, NotificationUnreadCounter.unread_count)
+            .where(NotificationUnreadCounter.unread_count > 0)
+        )).all())
+
+    assert overdue == 0, f"仍有 {overdue} 条到期通知未标记过期"
+    assert unarchived == 0, f"仍有 {unarchived} 条已处理旧通知未归档"
+    assert beyond_horizon == stale_archives == 0, f"超过保留期限: 通知 {beyond_horizon} 条, 归档 {stale_archives} 条"
+    assert pending == counters, "未读计数与待处理通知数不一致"
+    print("✅ 过期、归档、删除全部完成，未读计数一致")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""交易序列一致性检查基准.
+
+在临时 SQLite 库中生成合成积分流水（默认 500 万条，每 100000 条注入一处余额错误），
+运行基于窗口函数的流式检查，输出耗时与进程峰值内存，并校验检出的问题恰好是注入的错误。
+加 --legacy 时再运行旧实现（加载全部 ORM 对象后在 Python 中回放），便于在小规模数据上对比。
+
+用法: python scripts/bench_sequence_check.py [--rows 5000000] [--users 50000] [--legacy]
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app.models  # noqa: F401  注册全部模型
+from app.core.database import Base
+from app.models import scoring  # noqa: F401
+from app.models.scoring import PointTransaction
+from app.services.consistency_service import ConsistencyService
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+CORRUPT_EVERY = 100000
+
+
+def peak_rss_mb() -> float:
+    """返回进程峰值内存（MB）."""
+    # Linux 下 ru_maxrss 单位为 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed(path: str, rows: int, users: int) -> set[str]:
+    """用 sqlite3 批量写入合成流水，返回被注入错误的交易 ID."""
+    base = datetime(2026, 1, 1)
+    corrupted = set()
+
+    def generate():
+        balances = [0] * users
+        for i in range(rows):
+            user_idx = i % users
+            amount = (i * 7919) % 200 - 50
+            balances[user_idx] += amount
+            balance_after = balances[user_idx]
+            txn_id = f"txn-{i:09d}"
+            if i % CORRUPT_EVERY == CORRUPT_EVERY - 1:
+                # 只篡改记录值，不影响后续累计
+                balance_after += 1
+                corrupted.add(txn_id)
+            created_at = (base + timedelta(seconds=i // users)).isoformat(sep=" ")
+            yield (txn_id, user_idx + 1, 1, "EARN", amount, balance_after, created_at)
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.executemany(
+        "INSERT INTO point_transactions (id, user_id, company_id, transaction_type, amount, balance_after, created_at)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+        generate(),
+    )
+    conn.commit()
+    conn.close()
+    return corrupted
+
+
+async def legacy_sequence_check(db: AsyncSession) -> list[str]:
+    """旧实现：加载全部交易 ORM 对象，按用户分组回放."""
+    result = await db.execute(
+        select(PointTransaction).order_by(PointTransaction.user_id, PointTransaction.created_at)
+    )
+    user_transactions = {}
+    for txn in result.scalars().all():
+        user_transactions.setdefault(txn.user_id, []).append(txn)
+    mismatched = []
+    for txns in user_transactions.values():
+        running_balance = 0
+        for txn in txns:
+            running_balance += txn.amount
+            if txn.balance_after != running_balance:
+                mismatched.append(txn.id)
+    return mismatched
+
+
+async def main():
+    """运行检查并校验检出的问题."""
+    parser = argparse.ArgumentParser(description="交易序列一致性检查基准")
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--legacy", action="store_true", help="同时运行旧实现")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    start = time.perf_counter()
+    corrupted = seed(path, args.rows, args.users)
+    print(f"📦 生成 {args.rows} 条流水、{args.users} 名用户，耗时 {time.perf_counter() - start:.1f}s")
+
+    baseline = peak_rss_mb()
+    async with session_factory() as db:
+        start = time.perf_counter()
+        issues = await ConsistencyService(db).check_transaction_sequence_consistency()
+        elapsed = time.perf_counter() - start
+    print(f"窗口函数实现: {elapsed:8.2f}s, 峰值内存 {peak_rss_mb():8.1f} MB (检查前 {baseline:.1f} MB), 问题 {len(issues)} 条")
+    assert {issue["transactionId"] for issue in issues} == corrupted, "检出的问题与注入的错误不一致"
+
+    if args.legacy:
+        async with session_factory() as db:
+            start = time.perf_counter()
+            legacy = await legacy_sequence_check(db)
+            elapsed = time.perf_counter() - start
+        print(f"旧实现:       {elapsed:8.2f}s, 峰值内存 {peak_rss_mb():8.1f} MB, 问题 {len(legacy)} 条")
+        assert set(legacy) == corrupted, "旧实现结果与注入的错误不一致"
+
+    print("✅ 检出的问题与注入的错误一致")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""商品浏览量写回基准.
+
+在临时 SQLite 库中生成一批商品，模拟大量商品详情浏览，对比逐次 UPDATE + COMMIT 与
+内存合并后批量写回两种方式的写语句数、提交次数与耗时，并校验最终浏览量一致。
+
+用法: python scripts/bench_view_counter.py [--items 1000] [--views 20000]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app.models  # noqa: F401  注册全部模型
+from app.core.counter_buffer import CounterBuffer
+from app.core.database import Base
+from app.models import scoring  # noqa: F401
+from app.models.reward import MallItem
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+
+class WriteCounter:
+    """统计引擎执行的写语句与提交次数."""
+
+    def __init__(self, engine):
+        """注册写语句与提交监听."""
+        self.writes = 0
+        self.commits = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine.sync_engine, "commit", self._on_commit)
+
+    def _on_execute(self, conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("UPDATE"):
+            self.writes += 1
+
+    def _on_commit(self, conn):
+        self.commits += 1
+
+    def reset(self):
+        """清零计数."""
+        self.writes = self.commits = 0
+
+
+async def create_db(items: int):
+    """创建临时数据库并生成商品，返回引擎与会话工厂."""
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with session_factory() as db:
+        await db.execute(insert(MallItem), [
+            {"id": f"item-{i:05d}", "name": f"商品 {i}", "category": "测试", "points_cost": 1000, "stock": 10}
+            for i in range(items)
+        ])
+        await db.commit()
+    return engine, session_factory
+
+
+async def total_views(session_factory) -> int:
+    """返回全部商品的浏览量之和."""
+    async with session_factory() as db:
+        return await db.scalar(select(func.sum(MallItem.view_count)))
+
+
+async def main():
+    """运行基准并校验浏览量一致."""
+    parser = argparse.ArgumentParser(description="商品浏览量写回基准")
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--views", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    # 热门商品占大部分浏览
+    views = [f"item-{min(int(rng.paretovariate(1.2)) - 1, args.items - 1):05d}" for _ in range(args.views)]
+
+    engine, session_factory = await create_db(args.items)
+    counter = WriteCounter(engine)
+    start = time.perf_counter()
+    async with session_factory() as db:
+        for item_id in views:
+            await db.execute(update(MallItem).where(MallItem.id == item_id).values(view_count=MallItem.view_count + 1))
+            await db.commit()
+    elapsed = time.perf_counter() - start
+    print(f"逐次提交: {counter.writes:6d} 条 UPDATE, {counter.commits:6d} 次提交, {elapsed * 1000:8.1f} ms")
+    direct_total = await total_views(session_factory)
+    await engine.dispose()
+
+    engine, session_factory = await create_db(args.items)
+    counter = WriteCounter(engine)
+    buffer = CounterBuffer(MallItem.view_count, MallItem.id, flush_interval=5, flush_threshold=1000,
+                           session_factory=session_factory)
+    start = time.perf_counter()
+    for item_id in views:
+        buffer.increment(item_id)
+        await asyncio.sleep(0)
+    await buffer.stop()
+    elapsed = time.perf_counter() - start
+    print(f"批量写回: {counter.writes:6d} 条 UPDATE, {counter.commits:6d} 次提交, {elapsed * 1000:8.1f} ms")
+    buffered_total = await total_views(session_factory)
+    await engine.dispose()
+
+    assert direct_total == buffered_total == args.views, f"浏览量不一致: {direct_total} / {buffered_total}"
+    print(f"✅ 两种方式写回的浏览量一致（{args.views}）")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""秒杀压测：并发抢购有限库存商品.
+
+在临时 SQLite 库中创建一个公司、一批余额充足的用户和一个库存有限的商品，
+让所有用户同时调用 MallService.purchase_item，校验：
+- 成功购买数恰好等于库存，其余请求全部以"库存不足"失败，不超卖
+- 商品库存归零，购买记录、消费流水与余额扣减一一对应
+- 单次购买只提交一次事务，并输出每次购买的 SQL 语句数与吞吐
+
+用法: python scripts/loadtest_flash_sale.py [--buyers 1000] [--stock 10]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app.models  # noqa: F401  注册全部模型
+from app.core.database import Base
+from app.models import scoring  # noqa: F401
+from app.models.company import Company
+from app.models.reward import MallItem
+from app.models.scoring import PointBalance, PointPurchase, PointTransaction
+from app.models.user import User
+from app.services.level_service import LevelService
+from app.services.mall_service import MallService
+from app.services.notification_service import wait_deferred_notifications
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+ITEM_ID = "flash-sale-item"
+POINTS_COST = 1000  # 后端存储格式
+INITIAL_BALANCE = 5000
+
+
+class StatementCounter:
+    """统计引擎执行的 SQL 语句与提交次数."""
+
+    def __init__(self, engine):
+        """注册语句与提交监听."""
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine.sync_engine, "commit", self._on_commit)
+
+    def _on_execute(self, *args):
+        self.statements += 1
+
+    def _on_commit(self, conn):
+        self.commits += 1
+
+    def reset(self):
+        """清零计数."""
+        self.statements = self.commits = 0
+
+
+async def seed(session_factory, buyers: int, stock: int) -> int:
+    """创建公司、用户与限量商品，返回公司 ID."""
+    async with session_factory() as db:
+        await db.execute(insert(User), [
+            {"id": i, "name": f"buyer-{i}", "email": f"buyer-{i}@example.com", "points": INITIAL_BALANCE}
+            for i in range(1, buyers + 2)
+        ])
+        company = Company(name="flash-sale", creator_user_id=1)
+        db.add(company)
+        await db.flush()
+        await db.execute(User.__table__.update().values(company_id=company.id))
+        await db.execute(insert(PointBalance), [
+            {"id": f"balance-{i}", "user_id": i, "company_id": company.id, "balance": INITIAL_BALANCE, "version": 0}
+            for i in range(1, buyers + 2)
+        ])
+        await db.execute(insert(MallItem), [
+            {"id": ITEM_ID, "name": "限量秒杀商品", "category": "秒杀", "points_cost": POINTS_COST,
+             "stock": stock, "initial_stock": stock},
+            {"id": "warmup-item", "name": "预热商品", "category": "秒杀", "points_cost": POINTS_COST,
+             "stock": 1, "initial_stock": 1},
+        ])
+        await db.commit()
+        return company.id
+
+
+async def main():
+    """运行压测并校验结果."""
+    parser = argparse.ArgumentParser(description="秒杀压测")
+    parser.add_argument("--buyers", type=int, default=1000)
+    parser.add_argument("--stock", type=int, default=10)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", connect_args={"timeout": 60})
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    company_id = await seed(session_factory, args.buyers, args.stock)
+    counter = StatementCounter(engine)
+
+    # 单次购买的语句数与提交次数（预热用户 buyers+1 购买预热商品，不计通知）
+    async with session_factory() as db:
+        await LevelService(db).get_level_index()  # 预热进程内等级索引
+        counter.reset()
+        await MallService(db).purchase_item(args.buyers + 1, "warmup-item", company_id=company_id)
+        print(f"单次购买: {counter.statements} 条 SQL, {counter.commits} 次提交")
+        assert counter.commits == 1, "购买应只提交一次事务"
+    await wait_deferred_notifications()
+
+    outcomes = Counter()
+
+    async def buy(user_id: int):
+        async with session_factory() as db:
+            try:
+                await MallService(db).purchase_item(user_id, ITEM_ID, company_id=company_id)
+                outcomes["成功"] += 1
+            except ValueError as e:
+                outcomes[str(e)] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(buy(user_id) for user_id in range(1, args.buyers + 1)))
+    elapsed = time.perf_counter() - start
+    await wait_deferred_notifications()
+    print(f"{args.buyers} 人并发抢购 {args.stock} 件: {elapsed:.2f}s, {args.buyers / elapsed:.0f} 请求/秒")
+    for outcome, count in outcomes.most_common():
+        print(f"  {outcome}: {count}")
+
+    async with session_factory() as db:
+        stock = await db.scalar(select(MallItem.stock).where(MallItem.id == ITEM_ID))
+        purchases = await db.scalar(select(func.count(PointPurchase.id)).where(PointPurchase.item_id == ITEM_ID))
+        transactions = await db.scalar(
+            select(func.count(PointTransaction.id)).where(PointTransaction.reference_id == ITEM_ID)
+        )
+        debited = await db.scalar(
+            select(func.count(PointBalance.id)).where(
+                PointBalance.balance == INITIAL_BALANCE - POINTS_COST, PointBalance.user_id <= args.buyers
+            )
+        )
+
+    assert outcomes["成功"] == args.stock, f"成功购买 {outcomes['成功']} 件，库存 {args.stock}"
+    assert outcomes["商品库存不足"] == args.buyers - args.stock, f"失败原因不符: {dict(outcomes)}"
+    assert stock == 0, f"剩余库存 {stock}"
+    assert purchases == transactions == debited == args.stock, (
+        f"购买记录 {purchases}、消费流水 {transactions}、扣款用户 {debited} 与库存 {args.stock} 不一致"
+    )
+    print("✅ 无超卖，库存、购买记录、流水与余额一致")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
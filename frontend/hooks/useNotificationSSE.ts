@@ -2,6 +2,7 @@ import { useEffect, useRef, useCallback } from 'react'
 import { useAuth } from '@/lib/auth-context-rq'
 import { useToast } from '@/components/ui/use-toast'
 import { getBackendApiUrl } from '@/lib/config/api-config'
+import { notificationEvents } from '@/lib/notification-events'
 
 interface SSENotification {
   type: string
@@ -14,6 +15,7 @@ interface SSENotification {
     read: boolean
   }
   message?: string
+  unreadCount?: number
 }
 
 interface UseNotificationSSEProps {
@@ -74,12 +76,19 @@ export function useNotificationSSE({
 
                 // 调用回调函数
                 onNewNotification?.(data.notification)
-
-                // 触发未读数量更新
-                onUnreadCountChange?.(1)
               }
               break
 
+            case 'resync':
+              // 断线期间的事件无法补发（如重连到了另一个 worker），重新拉取通知列表
+              notificationEvents.emit('refresh')
+              break
+
+            case 'unread_count':
+              // 服务端在未读数量变化后推送最新值，无需轮询摘要接口
+              onUnreadCountChange?.(data.unreadCount ?? 0)
+              break
+
             default:
               // 未知事件类型，忽略
           }
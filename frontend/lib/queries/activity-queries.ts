@@ -25,6 +25,29 @@ export interface Activity {
   type: string
 }
 
+export interface ActivityListItem {
+  id: string
+  showId: string
+  title: string
+  points: number
+  userId: string
+  status: string
+  activityType: string
+  createdAt: string
+  completedAt: string | null
+  user: {
+    name: string
+    avatar: string
+    initials: string
+  } | null
+}
+
+export interface ActivityPage {
+  items: ActivityListItem[]
+  nextCursor: string | null
+  hasMore: boolean
+}
+
 export interface ActivityCreate {
   title: string
   description?: string
@@ -85,18 +108,18 @@ export function useActivityByShowId(showId: string) {
 }
 
 /**
- * 获取所有活动
+ * 获取所有活动（游标分页，翻页时传入上一页返回的 nextCursor）
  */
 export function useActivities(params?: {
   search?: string
   user_id?: string
-  page?: number
   per_page?: number
+  cursor?: string
 }) {
   const { user } = useAuth()
   
-  return useApiQuery({
-    queryKey: queryKeys.activity.all,
+  return useApiQuery<ActivityPage>({
+    queryKey: [...queryKeys.activity.all, 'list', params],
     url: '/api/activities',
     params: {
       user_id: user?.id,
@@ -32,6 +32,8 @@ export {
   type Activity,
   type ActivityCreate,
   type ActivityUpdate,
+  type ActivityListItem,
+  type ActivityPage,
 } from '@/lib/queries/activity-queries'
 
 // 导出用户相关查询